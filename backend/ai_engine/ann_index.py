@@ -0,0 +1,451 @@
+"""
+ANN Index - inverted-file (IVF) nearest-neighbour search on NumPy
+Two indexes are kept: student resume embeddings and drive JD embeddings,
+so "best students for this drive" and "best drives for this student" can
+be answered without scoring the whole cohort.
+
+Vectors are partitioned around ~sqrt(n) k-means centroids; a query scores
+the centroids, then only the members of the closest ANN_NPROBE lists, so
+its cost grows with sqrt(n) rather than n. Below ANN_MIN_TRAIN vectors the
+index just does an exact scan. Each index is saved to ANN_INDEX_DIR as an
+.npz together with the text hash behind every vector, so a restart only
+re-embeds rows whose text changed. A process that finds a newer file than
+the one it loaded or saved (another worker's save, a rebuild_indexes job)
+reloads it on its next query, re-applying its own unsaved edits on top.
+"""
+import os
+import time
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from ai_engine.embedding_store import text_hash
+from ai_engine.metrics import registry
+
+ANN_INDEX_DIR = os.getenv("ANN_INDEX_DIR", "./ann_index")
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "16"))
+ANN_MIN_TRAIN = int(os.getenv("ANN_MIN_TRAIN", "256"))
+ANN_SAVE_INTERVAL = float(os.getenv("ANN_SAVE_INTERVAL", "30"))
+ANN_RELOAD_CHECK_S = float(os.getenv("ANN_RELOAD_CHECK_S", "5"))  # how often queries stat the saved file
+
+_search_seconds = registry.histogram("pathfinder_ann_search_seconds", "ANN query latency", ["index"])
+_scanned = registry.histogram("pathfinder_ann_scanned_vectors", "Vectors scored exactly per ANN query", ["index"],
+                              buckets=(16, 64, 256, 1024, 4096, 16384, 65536, 262144))
+
+
+def _kmeans(data: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means (inputs are L2-normalized); returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(data @ centroids.T, axis=1)
+        for c in range(k):
+            members = data[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+            else:  # re-seed an empty list with a random point
+                centroids[c] = data[rng.integers(len(data))]
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """Mutable IVF index from string ids to unit vectors; thread-safe."""
+
+    def __init__(self, name: str, directory: str = ANN_INDEX_DIR, nprobe: int = ANN_NPROBE):
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.npz")
+        self.nprobe = nprobe
+        self.model: Optional[str] = None
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._ids: List[str] = []
+        self._hashes: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._vecs = np.zeros((0, 0), dtype=np.float32)
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[Set[int]] = []
+        self._list_rows: Dict[int, np.ndarray] = {}  # per-list row arrays, rebuilt lazily
+        self._trained_n = 0
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._loaded_from: Optional[Tuple[str, float]] = None  # (model, file mtime) of the last load or save
+        self._unsaved: Dict[str, Optional[Tuple[str, np.ndarray]]] = {}  # key → (hash, vector), None = removed
+        self._checked_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._pos
+
+    def text_hash_of(self, key: str) -> Optional[str]:
+        pos = self._pos.get(key)
+        return None if pos is None else self._hashes[pos]
+
+    # ── Mutation ──────────────────────────────────────────────────────────────
+    def upsert(self, key: str, text: str, vector: np.ndarray) -> None:
+        """Insert or replace the vector for `key` (embedded from `text`)."""
+        self._put(key, text_hash(text), np.asarray(vector, dtype=np.float32))
+
+    def _put(self, key: str, hashed: str, vector: np.ndarray) -> None:
+        with self._lock:
+            pos = self._pos.get(key)
+            if pos is None:
+                pos = len(self._ids)
+                self._grow(pos + 1, vector.shape[0])
+                self._ids.append(key)
+                self._hashes.append("")
+                self._pos[key] = pos
+            elif self._centroids is not None:
+                self._unplace(pos)
+            self._vecs[pos] = vector
+            self._hashes[pos] = hashed
+            if self._centroids is not None:
+                self._place(pos)
+            self._dirty = True
+            self._unsaved[key] = (hashed, vector.copy())
+            self._maybe_train()
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            pos = self._pos.pop(key, None)
+            if pos is None:
+                return
+            self._unsaved[key] = None
+            last = len(self._ids) - 1
+            if self._centroids is not None:
+                self._unplace(pos)
+                if pos != last:
+                    self._unplace(last)
+            if pos != last:  # move the last row into the hole
+                moved = self._ids[last]
+                self._ids[pos], self._hashes[pos] = moved, self._hashes[last]
+                self._vecs[pos] = self._vecs[last]
+                self._pos[moved] = pos
+                if self._centroids is not None:
+                    self._place(pos)
+            self._ids.pop()
+            self._hashes.pop()
+            self._dirty = True
+
+    def _grow(self, size: int, dim: int) -> None:
+        if self._vecs.shape[1] != dim:
+            if len(self._ids):
+                raise ValueError(f"{self.name}: vector dim {dim} != index dim {self._vecs.shape[1]}")
+            self._vecs = np.zeros((0, dim), dtype=np.float32)
+        if size > len(self._vecs):
+            capacity = max(size, 2 * len(self._vecs), 64)
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            grown[:len(self._ids)] = self._vecs[:len(self._ids)]
+            self._vecs = grown
+            assign = np.zeros(capacity, dtype=np.int32)
+            assign[:len(self._assign)] = self._assign[:capacity]
+            self._assign = assign
+
+    def _place(self, pos: int) -> None:
+        c = int(np.argmax(self._centroids @ self._vecs[pos]))
+        self._assign[pos] = c
+        self._lists[c].add(pos)
+        self._list_rows.pop(c, None)
+
+    def _unplace(self, pos: int) -> None:
+        c = int(self._assign[pos])
+        self._lists[c].discard(pos)
+        self._list_rows.pop(c, None)
+
+    def _rows_of(self, c: int) -> np.ndarray:
+        rows = self._list_rows.get(c)
+        if rows is None:
+            rows = self._list_rows[c] = np.fromiter(self._lists[c], dtype=np.int64, count=len(self._lists[c]))
+        return rows
+
+    def _maybe_train(self) -> None:
+        """(Re)build the coarse quantizer once the index has doubled in size."""
+        n = len(self._ids)
+        if n < ANN_MIN_TRAIN or n < 2 * self._trained_n:
+            return
+        data = self._vecs[:n]
+        nlist = max(1, min(1024, int(np.sqrt(n))))
+        sample = data
+        if n > nlist * 64:
+            sample = data[np.random.default_rng(0).choice(n, size=nlist * 64, replace=False)]
+        self._centroids = _kmeans(sample, nlist)
+        self._assign[:n] = np.argmax(data @ self._centroids.T, axis=1)
+        self._lists = [set() for _ in range(nlist)]
+        self._list_rows = {}
+        for pos, c in enumerate(self._assign[:n]):
+            self._lists[c].add(pos)
+        self._trained_n = n
+
+    # ── Query ─────────────────────────────────────────────────────────────────
+    def search(self, query: np.ndarray, k: int) -> List[Tuple[str, float]]:
+        """
+        Approximate top-k ids by cosine similarity, best first. Probes at
+        least `nprobe` lists and keeps probing until k candidates are found.
+        """
+        started = time.monotonic()
+        with self._lock:
+            n = len(self._ids)
+            if n == 0 or k <= 0:
+                return []
+            if self._centroids is None:
+                rows = np.arange(n)
+            else:
+                order = np.argsort(-(self._centroids @ query))
+                picked: List[np.ndarray] = []
+                found = 0
+                for probed, c in enumerate(order):
+                    if probed >= self.nprobe and found >= k:
+                        break
+                    picked.append(self._rows_of(c))
+                    found += len(picked[-1])
+                rows = np.concatenate(picked)
+            scores = self._vecs[rows] @ query
+            top = min(k, len(rows))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            hits = [(self._ids[rows[i]], float(scores[i])) for i in best]
+        _scanned.observe(len(rows), index=self.name)
+        _search_seconds.observe(time.monotonic() - started, index=self.name)
+        return hits
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+    def save(self) -> None:
+        with self._lock:
+            n = len(self._ids)
+            payload = dict(
+                model=np.array(self.model or ""),
+                ids=np.array(self._ids, dtype=str),
+                hashes=np.array(self._hashes, dtype=str),
+                vectors=self._vecs[:n],
+                assign=self._assign[:n],
+                centroids=self._centroids if self._centroids is not None else np.zeros((0, 0), np.float32),
+                trained_n=np.array(self._trained_n),
+            )
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp.npz"
+            np.savez(tmp, **payload)
+            os.replace(tmp, self.path)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+            self._unsaved.clear()
+            self._loaded_from = (self.model, os.path.getmtime(self.path))
+
+    def maybe_save(self) -> None:
+        """Save if there are changes and the last save is ANN_SAVE_INTERVAL old."""
+        if self._dirty and time.monotonic() - self._saved_at >= ANN_SAVE_INTERVAL:
+            self.save()
+
+    def load(self, model: str) -> bool:
+        """Load the saved index if it was built with `model`; else start empty."""
+        with self._lock:
+            stamp = (model, os.path.getmtime(self.path)) if os.path.exists(self.path) else None
+            if stamp is not None and stamp == self._loaded_from and not self._dirty:
+                return True  # already in memory, e.g. loaded by the master before forking workers
+            self._clear()
+            self.model = model
+            if stamp is None:
+                return False
+            try:
+                with np.load(self.path) as data:
+                    if str(data["model"]) != model:
+                        print(f"⚠️  ANN index {self.name} was built with another model; rebuilding")
+                        return False
+                    self._ids = [str(i) for i in data["ids"]]
+                    self._hashes = [str(h) for h in data["hashes"]]
+                    self._vecs = np.array(data["vectors"], dtype=np.float32)
+                    self._assign = np.array(data["assign"], dtype=np.int32)
+                    centroids = data["centroids"]
+                    self._trained_n = int(data["trained_n"])
+            except Exception as e:
+                print(f"⚠️  Could not load ANN index {self.path}: {e}; rebuilding")
+                self._clear()
+                self.model = model
+                return False
+            self._pos = {key: i for i, key in enumerate(self._ids)}
+            if centroids.size:
+                self._centroids = centroids
+                self._lists = [set() for _ in range(len(centroids))]
+                for pos, c in enumerate(self._assign):
+                    self._lists[c].add(pos)
+            self._loaded_from = stamp
+            return True
+
+    def refresh(self) -> bool:
+        """
+        Reload the saved file if another process wrote a newer one since this
+        process last loaded or saved it, keeping this process's unsaved edits.
+        Checks at most every ANN_RELOAD_CHECK_S; True if it reloaded.
+        """
+        now = time.monotonic()
+        if self.model is None or now - self._checked_at < ANN_RELOAD_CHECK_S:
+            return False
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if self._loaded_from == (self.model, mtime):
+            return False
+        # Read into a fresh index outside the lock so searches keep running meanwhile.
+        fresh = IVFIndex(self.name, os.path.dirname(self.path), self.nprobe)
+        if not fresh.load(self.model):
+            return False
+        with self._lock:
+            for key, edit in self._unsaved.items():
+                if edit is None:
+                    fresh.remove(key)
+                else:
+                    fresh._put(key, *edit)
+            self.__dict__.update({k: v for k, v in fresh.__dict__.items() if k != "_lock"})
+            self._checked_at = now
+        print(f"🔄 Reloaded ANN index {self.name} saved by another process ({len(self)} vectors)")
+        return True
+
+    def sync(self, texts: Dict[str, str], embed: Callable[[List[str]], Optional[np.ndarray]]) -> Dict:
+        """
+        Reconcile with the source of truth `texts` (id → text): embed rows
+        that are new or whose text changed, drop ids that no longer exist.
+        """
+        with self._lock:
+            stale = [key for key, text in texts.items() if self.text_hash_of(key) != text_hash(text)]
+            gone = [key for key in self._ids if key not in texts]
+        for key in gone:
+            self.remove(key)
+        for i in range(0, len(stale), 256):
+            chunk = stale[i:i + 256]
+            vectors = embed([texts[key] for key in chunk])
+            if vectors is None:
+                break
+            for key, vec in zip(chunk, vectors):
+                self.upsert(key, texts[key], vec)
+        if stale or gone:
+            self.save()
+        return {"index": self.name, "size": len(self), "embedded": len(stale), "removed": len(gone)}
+
+    def stats(self) -> Dict:
+        return {"index": self.name, "size": len(self), "lists": len(self._lists),
+                "trained_on": self._trained_n, "nprobe": self.nprobe}
+
+
+student_index = IVFIndex("students")
+drive_index = IVFIndex("drives")
+
+
+# ── Keeping the indexes in step with the database ────────────────────────────
+# Until the startup sync finishes, profile updates are queued and replayed
+# afterwards, so nothing written during startup is missed.
+_ready = threading.Event()
+_ready_lock = threading.Lock()
+_backlog: List[Tuple[IVFIndex, str, str]] = []
+
+
+def indexes_ready() -> bool:
+    return _ready.is_set()
+
+
+def sync_indexes(students: List[Dict], drives: List[Dict]) -> List[Dict]:
+    """Load both indexes from disk and reconcile them with the given rows."""
+    from ai_engine.matcher import model_key, embed_cached, resume_text_for, jd_text_for
+    key = model_key()
+    if key is None:
+        print("⚠️  ANN indexes disabled in fallback mode; recommendations use exact scoring")
+        return []
+    results = []
+    for index, texts in ((student_index, {s["id"]: resume_text_for(s) for s in students}),
+                         (drive_index, {d["id"]: jd_text_for(d) for d in drives})):
+        index.load(key)
+        results.append(index.sync(texts, embed_cached))
+    with _ready_lock:
+        for index, key, text in _backlog:
+            _upsert_text(index, key, text)
+        _backlog.clear()
+        _ready.set()
+    print(f"✅ ANN indexes ready: {results}")
+    return results
+
+
+def _upsert_texts(index: IVFIndex, items: List[Tuple[str, str]]) -> None:
+    from ai_engine.matcher import embed_cached
+    items = [(key, text) for key, text in items if text.strip() and index.text_hash_of(key) != text_hash(text)]
+    if not items:
+        return
+    vectors = embed_cached([text for _, text in items])
+    if vectors is not None:
+        for (key, text), vector in zip(items, vectors):
+            index.upsert(key, text, vector)
+        index.maybe_save()
+
+
+def _upsert_text(index: IVFIndex, key: str, text: str) -> None:
+    _upsert_texts(index, [(key, text)])
+
+
+def _index_texts(index: IVFIndex, items: List[Tuple[str, str]]) -> None:
+    with _ready_lock:
+        if not _ready.is_set():
+            _backlog.extend((index, key, text) for key, text in items)
+            return
+    _upsert_texts(index, items)
+
+
+def _index_text(index: IVFIndex, key: str, text: str) -> None:
+    _index_texts(index, [(key, text)])
+
+
+def index_student(student: Dict) -> None:
+    from ai_engine.matcher import resume_text_for
+    _index_text(student_index, student["id"], resume_text_for(student))
+
+
+def index_students(students: List[Dict]) -> None:
+    """index_student() for many rows with one batched embedding lookup."""
+    from ai_engine.matcher import resume_text_for
+    _index_texts(student_index, [(s["id"], resume_text_for(s)) for s in students])
+
+
+def index_drive(drive: Dict) -> None:
+    from ai_engine.matcher import jd_text_for
+    _index_text(drive_index, drive["id"], jd_text_for(drive))
+
+
+def load_indexes(model: str) -> int:
+    """Load both saved indexes built with `model`; returns the number of vectors loaded."""
+    return sum(len(index) for index in (student_index, drive_index) if index.load(model))
+
+
+def save_indexes() -> None:
+    for index in (student_index, drive_index):
+        if index._dirty:
+            index.save()
+
+
+def nearest(index: IVFIndex, text: str, k: int,
+            accept: Callable[[List[str]], List[str]]) -> Optional[List[Tuple[str, float]]]:
+    """
+    Top-k neighbours of `text` that pass `accept` (e.g. the policy filter),
+    best first. The candidate pool is widened until k accepted ids are found
+    or the index is exhausted. None when the indexes aren't usable.
+    """
+    from ai_engine.matcher import embed_cached
+    if not _ready.is_set() or not text.strip():
+        return None
+    vectors = embed_cached([text])
+    if vectors is None:
+        return None
+    index.refresh()
+    want, seen, found = max(4 * k, 32), set(), []
+    while True:
+        hits = index.search(vectors[0], want)
+        fresh = [(key, score) for key, score in hits if key not in seen]
+        seen.update(key for key, _ in fresh)
+        accepted = set(accept([key for key, _ in fresh])) if fresh else set()
+        found.extend((key, score) for key, score in fresh if key in accepted)
+        if len(found) >= k or len(hits) < want or want >= len(index):
+            return found
+        want *= 4
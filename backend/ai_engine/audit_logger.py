@@ -1,16 +1,93 @@
 """
 Governance Audit Logger
 Immutable, timestamped decision log for every action in the system.
-Supports export to JSON and CSV.
+Supports export to JSON and CSV, including streaming (CSV, NDJSON, gzip)
+exports that run in constant memory.
+
+Writes go through an AuditSink. The default "durable" mode writes entries
+in the caller's transaction; "buffered" mode (AUDIT_SINK_MODE=buffered)
+queues them and group-commits from a background thread, trading a small
+window of loss on crash for fewer fsyncs per decision. A batch that still
+fails after retries is appended to a local spill file (AUDIT_SPILL_PATH)
+rather than dropped, and replayed into the database on the next start or
+successful flush.
+
+acreate_log / aget_logs are the AsyncSession equivalents used by async routes.
 """
+import os
 import uuid
+import time
+import queue
 import datetime
+import threading
 import json
 import csv
 import io
-from typing import Dict, List, Optional
+import zlib
+import glob
+from typing import Dict, Iterable, Iterator, List, Optional
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database.models import AuditLog
+from database.models import AuditLog, SessionLocal
+from ai_engine.metrics import registry
+
+AUDIT_SINK_MODE = os.getenv("AUDIT_SINK_MODE", "durable")  # durable | buffered
+AUDIT_SINK_MAX_QUEUE = int(os.getenv("AUDIT_SINK_MAX_QUEUE", "10000"))
+AUDIT_SINK_BATCH = int(os.getenv("AUDIT_SINK_BATCH", "500"))
+AUDIT_SINK_FLUSH_MS = int(os.getenv("AUDIT_SINK_FLUSH_MS", "200"))
+AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", "./audit_spill.ndjson")
+
+_pending = registry.gauge("pathfinder_audit_sink_pending",
+                          "Audit entries queued but not yet committed (lost on crash)")
+_crash_safe = registry.gauge("pathfinder_audit_sink_crash_safe",
+                             "1 if every audit entry is committed before the request returns")
+_flushed = registry.counter("pathfinder_audit_entries_flushed_total",
+                            "Audit entries group-committed by the buffered sink")
+_spilled = registry.counter("pathfinder_audit_entries_spilled_total",
+                            "Audit entries written to the spill file after repeated flush failures")
+_replayed = registry.counter("pathfinder_audit_entries_replayed_total",
+                             "Spilled audit entries committed to the database on replay")
+_sync_fallbacks = registry.counter("pathfinder_audit_sink_sync_writes_total",
+                                   "Entries written inline because the sink queue was full")
+_flush_seconds = registry.histogram("pathfinder_audit_flush_seconds",
+                                    "Latency of one audit group commit")
+_flush_size = registry.histogram("pathfinder_audit_flush_batch_size",
+                                 "Entries per audit group commit",
+                                 buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500))
+_entry_delay = registry.histogram("pathfinder_audit_commit_delay_seconds",
+                                  "Time from submit to durable commit for buffered entries")
+
+
+def build_log_entry(
+    student_id: str,
+    drive_id: str,
+    action: str,
+    policy_check: Optional[str] = None,
+    policy_details: Optional[Dict] = None,
+    ai_score: Optional[float] = None,
+    missing_skills: Optional[List[str]] = None,
+    final_decision: Optional[str] = None,
+    reasoning: Optional[str] = None,
+    actor: str = "SYSTEM",
+    stage_timings: Optional[Dict] = None,
+) -> Dict:
+    """Column values for a new audit log entry (shared by single and bulk writes)."""
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": datetime.datetime.utcnow(),
+        "student_id": student_id,
+        "drive_id": drive_id,
+        "action": action,
+        "policy_check": policy_check,
+        "policy_details": policy_details or {},
+        "ai_score": ai_score,
+        "missing_skills": missing_skills or [],
+        "final_decision": final_decision,
+        "reasoning": reasoning,
+        "actor": actor,
+        "stage_timings": stage_timings,
+    }
 
 
 def create_log(
@@ -25,28 +102,272 @@ def create_log(
     final_decision: Optional[str] = None,
     reasoning: Optional[str] = None,
     actor: str = "SYSTEM",
+    commit: bool = True,
+    stage_timings: Optional[Dict] = None,
 ) -> AuditLog:
-    """Write a new immutable audit log entry."""
-    log = AuditLog(
-        id=str(uuid.uuid4()),
-        timestamp=datetime.datetime.utcnow(),
-        student_id=student_id,
-        drive_id=drive_id,
-        action=action,
-        policy_check=policy_check,
-        policy_details=policy_details or {},
-        ai_score=ai_score,
-        missing_skills=missing_skills or [],
-        final_decision=final_decision,
-        reasoning=reasoning,
-        actor=actor,
+    """
+    Write a new immutable audit log entry.
+    With commit=False the entry joins the caller's transaction and is only
+    written (or, in buffered mode, queued) when the caller commits.
+    stage_timings (tracing.stage_timings()) records how long the pipeline
+    stages leading up to the decision took.
+    """
+    entry = build_log_entry(
+        student_id, drive_id, action, policy_check, policy_details,
+        ai_score, missing_skills, final_decision, reasoning, actor, stage_timings,
     )
+    log = AuditLog(**entry)
+    if audit_sink.buffered:
+        if commit:
+            audit_sink.submit([entry])
+        else:
+            _defer(db, [entry])
+        return log
     db.add(log)
-    db.commit()
-    db.refresh(log)
+    if commit:
+        db.commit()
+        db.refresh(log)
     return log
 
 
+async def acreate_log(
+    db: AsyncSession,
+    student_id: str,
+    drive_id: str,
+    action: str,
+    policy_check: Optional[str] = None,
+    policy_details: Optional[Dict] = None,
+    ai_score: Optional[float] = None,
+    missing_skills: Optional[List[str]] = None,
+    final_decision: Optional[str] = None,
+    reasoning: Optional[str] = None,
+    actor: str = "SYSTEM",
+    commit: bool = True,
+    stage_timings: Optional[Dict] = None,
+) -> AuditLog:
+    """create_log() for an AsyncSession (same commit=False and buffered-mode semantics)."""
+    entry = build_log_entry(
+        student_id, drive_id, action, policy_check, policy_details,
+        ai_score, missing_skills, final_decision, reasoning, actor, stage_timings,
+    )
+    log = AuditLog(**entry)
+    if audit_sink.buffered:
+        if commit:
+            audit_sink.submit([entry])
+        else:
+            _defer(db.sync_session, [entry])
+        return log
+    db.add(log)
+    if commit:
+        await db.commit()
+        await db.refresh(log)
+    return log
+
+
+def create_logs_bulk(db: Session, entries: List[Dict]) -> int:
+    """
+    Insert many entries from build_log_entry in one executemany.
+    Does not commit, so callers can fold it into their own transaction.
+    """
+    if not entries:
+        return 0
+    if audit_sink.buffered:
+        _defer(db, entries)
+    else:
+        db.execute(insert(AuditLog), entries)
+    return len(entries)
+
+
+# ── Audit sink ────────────────────────────────────────────────────────────────
+class AuditSink:
+    """
+    Bounded in-process queue of audit entries flushed by a background thread
+    in group commits of up to `batch_size` rows or every `flush_ms`.
+    When the queue is full, submit() writes inline instead of dropping; a
+    batch that can't be committed is spilled to `spill_path` and replayed.
+    """
+
+    def __init__(self, mode: str = AUDIT_SINK_MODE, max_queue: int = AUDIT_SINK_MAX_QUEUE,
+                 batch_size: int = AUDIT_SINK_BATCH, flush_ms: int = AUDIT_SINK_FLUSH_MS,
+                 spill_path: str = AUDIT_SPILL_PATH):
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self.spill_path = spill_path
+        self._spill_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def buffered(self) -> bool:
+        return self.mode == "buffered"
+
+    def start(self) -> None:
+        self.replay_spill()
+        if self.buffered and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Stop the flusher after draining everything already queued."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self._drain()
+
+    def submit(self, entries: List[Dict]) -> None:
+        overflow = []
+        for entry in entries:
+            try:
+                self._queue.put_nowait((time.monotonic(), entry))
+            except queue.Full:
+                overflow.append(entry)
+        if overflow:
+            _sync_fallbacks.inc(len(overflow))
+            self._write(overflow)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _drain(self) -> None:
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: List) -> None:
+        started = time.monotonic()
+        for attempt in range(3):
+            try:
+                self._write([entry for _, entry in batch])
+                break
+            except Exception as e:
+                print(f"⚠️  Audit flush failed (attempt {attempt + 1}/3): {e}")
+                time.sleep(0.1 * (attempt + 1))
+        else:
+            self._spill([entry for _, entry in batch])
+            return
+        done = time.monotonic()
+        _flush_seconds.observe(done - started)
+        _flush_size.observe(len(batch))
+        _flushed.inc(len(batch))
+        for submitted, _ in batch:
+            _entry_delay.observe(done - submitted)
+        if os.path.exists(self.spill_path):
+            self.replay_spill()  # the database is reachable again
+
+    @staticmethod
+    def _write(entries: List[Dict]) -> None:
+        with SessionLocal() as db:
+            db.execute(insert(AuditLog), entries)
+            db.commit()
+
+    def _spill(self, entries: List[Dict]) -> None:
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, default=lambda v: v.isoformat()) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"❌ AUDIT ENTRIES LOST: could not commit or spill {len(entries)} entries "
+                  f"({[entry['id'] for entry in entries]}): {e}")
+            return
+        _spilled.inc(len(entries))
+        print(f"❌ Audit flush failed 3 times; spilled {len(entries)} entries to {self.spill_path} for replay")
+
+    def replay_spill(self) -> int:
+        """
+        Commit spilled entries that aren't in the database yet; returns how
+        many. The file is first renamed to a per-process claim, so entries
+        spilled meanwhile (by any worker) go to a fresh file; claims left
+        by a crashed replay are picked up too. Safe to repeat: ids already
+        in the table are skipped.
+        """
+        replayed = 0
+        with self._spill_lock:
+            if os.path.exists(self.spill_path):
+                try:
+                    os.replace(self.spill_path, f"{self.spill_path}.{os.getpid()}.replaying")
+                except OSError:
+                    pass  # another process claimed it first
+            for claim in sorted(glob.glob(f"{glob.escape(self.spill_path)}.*.replaying")):
+                try:
+                    with open(claim, encoding="utf-8") as f:
+                        entries = [json.loads(line) for line in f if line.strip()]
+                    for i in range(0, len(entries), self.batch_size):
+                        chunk = entries[i:i + self.batch_size]
+                        with SessionLocal() as db:
+                            known = set(db.execute(select(AuditLog.id).where(
+                                AuditLog.id.in_([e["id"] for e in chunk]))).scalars())
+                            chunk = [{**e, "timestamp": datetime.datetime.fromisoformat(e["timestamp"])}
+                                     for e in chunk if e["id"] not in known]
+                            if chunk:
+                                db.execute(insert(AuditLog), chunk)
+                                db.commit()
+                        replayed += len(chunk)
+                    os.remove(claim)
+                except FileNotFoundError:
+                    continue  # finished by another process
+                except Exception as e:
+                    print(f"❌ Could not replay spilled audit entries from {claim}: {e}; will retry")
+        if replayed:
+            _replayed.inc(replayed)
+            print(f"✅ Replayed {replayed} spilled audit entries")
+        return replayed
+
+
+audit_sink = AuditSink()
+_pending.set_function(audit_sink.pending)
+_crash_safe.set_function(lambda: 0 if audit_sink.buffered else 1)
+
+
+# Deferred entries ride on the caller's session and are handed to the sink
+# only once that session commits, so rolled-back decisions are never logged.
+def _defer(db: Session, entries: List[Dict]) -> None:
+    db.info.setdefault("pending_audit", []).extend(entries)
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_deferred(session: Session) -> None:
+    entries = session.info.pop("pending_audit", None)
+    if entries:
+        audit_sink.submit(entries)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_deferred(session: Session) -> None:
+    session.info.pop("pending_audit", None)
+
+
 def get_logs(
     db: Session,
     student_id: Optional[str] = None,
@@ -54,56 +375,132 @@ def get_logs(
     limit: int = 100,
 ) -> List[AuditLog]:
     """Query audit logs with optional filters."""
-    q = db.query(AuditLog)
+    return list(db.execute(_logs_query(student_id, drive_id, limit)).scalars())
+
+
+async def aget_logs(
+    db: AsyncSession,
+    student_id: Optional[str] = None,
+    drive_id: Optional[str] = None,
+    limit: int = 100,
+) -> List[AuditLog]:
+    """get_logs() for an AsyncSession."""
+    return list((await db.execute(_logs_query(student_id, drive_id, limit))).scalars())
+
+
+def _logs_query(student_id: Optional[str], drive_id: Optional[str], limit: int):
+    q = select(AuditLog)
     if student_id:
-        q = q.filter(AuditLog.student_id == student_id)
+        q = q.where(AuditLog.student_id == student_id)
     if drive_id:
-        q = q.filter(AuditLog.drive_id == drive_id)
-    return q.order_by(AuditLog.timestamp.desc()).limit(limit).all()
+        q = q.where(AuditLog.drive_id == drive_id)
+    return q.order_by(AuditLog.timestamp.desc()).limit(limit)
+
+
+EXPORT_FIELDS = [
+    "id", "timestamp", "student_id", "drive_id", "action",
+    "policy_check", "ai_score", "missing_skills", "final_decision", "reasoning", "actor"
+]
+
+
+def iter_logs(
+    db: Session,
+    student_id: Optional[str] = None,
+    drive_id: Optional[str] = None,
+    batch_size: int = 1000,
+) -> Iterator:
+    """
+    Stream every matching log row, newest first, without a row cap.
+    Rows are plain column tuples fetched `batch_size` at a time from a
+    server-side cursor, so memory stays flat regardless of result size.
+    """
+    q = select(*AuditLog.__table__.c)
+    if student_id:
+        q = q.where(AuditLog.student_id == student_id)
+    if drive_id:
+        q = q.where(AuditLog.drive_id == drive_id)
+    q = q.order_by(AuditLog.timestamp.desc()).execution_options(yield_per=batch_size)
+    yield from db.execute(q)
+
+
+def _json_record(log) -> Dict:
+    return {
+        "id": log.id,
+        "timestamp": log.timestamp.isoformat() if log.timestamp else None,
+        "student_id": log.student_id,
+        "drive_id": log.drive_id,
+        "action": log.action,
+        "policy_check": log.policy_check,
+        "policy_details": log.policy_details,
+        "ai_score": log.ai_score,
+        "missing_skills": log.missing_skills,
+        "final_decision": log.final_decision,
+        "reasoning": log.reasoning,
+        "actor": log.actor,
+        "stage_timings": log.stage_timings,
+    }
+
+
+def _csv_record(log) -> Dict:
+    return {
+        "id": log.id,
+        "timestamp": log.timestamp.isoformat() if log.timestamp else "",
+        "student_id": log.student_id,
+        "drive_id": log.drive_id,
+        "action": log.action,
+        "policy_check": log.policy_check or "",
+        "ai_score": log.ai_score or "",
+        "missing_skills": "|".join(log.missing_skills) if log.missing_skills else "",
+        "final_decision": log.final_decision or "",
+        "reasoning": log.reasoning or "",
+        "actor": log.actor or "SYSTEM",
+    }
 
 
 def export_logs_json(logs: List[AuditLog]) -> str:
     """Serialize logs to JSON string."""
-    data = []
-    for log in logs:
-        data.append({
-            "id": log.id,
-            "timestamp": log.timestamp.isoformat() if log.timestamp else None,
-            "student_id": log.student_id,
-            "drive_id": log.drive_id,
-            "action": log.action,
-            "policy_check": log.policy_check,
-            "policy_details": log.policy_details,
-            "ai_score": log.ai_score,
-            "missing_skills": log.missing_skills,
-            "final_decision": log.final_decision,
-            "reasoning": log.reasoning,
-            "actor": log.actor,
-        })
-    return json.dumps(data, indent=2)
+    return json.dumps([_json_record(log) for log in logs], indent=2)
 
 
 def export_logs_csv(logs: List[AuditLog]) -> str:
     """Serialize logs to CSV string."""
-    output = io.StringIO()
-    fieldnames = [
-        "id", "timestamp", "student_id", "drive_id", "action",
-        "policy_check", "ai_score", "missing_skills", "final_decision", "reasoning", "actor"
-    ]
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    return "".join(stream_logs_csv(logs))
+
+
+# ── Streaming exporters (constant memory) ─────────────────────────────────────
+def stream_logs_csv(logs: Iterable, chunk_rows: int = 500) -> Iterator[str]:
+    """Yield a CSV export in chunks of `chunk_rows` rows."""
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=EXPORT_FIELDS)
     writer.writeheader()
+    for i, log in enumerate(logs, 1):
+        writer.writerow(_csv_record(log))
+        if i % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def stream_logs_ndjson(logs: Iterable) -> Iterator[str]:
+    """Yield one JSON object per line."""
     for log in logs:
-        writer.writerow({
-            "id": log.id,
-            "timestamp": log.timestamp.isoformat() if log.timestamp else "",
-            "student_id": log.student_id,
-            "drive_id": log.drive_id,
-            "action": log.action,
-            "policy_check": log.policy_check or "",
-            "ai_score": log.ai_score or "",
-            "missing_skills": "|".join(log.missing_skills) if log.missing_skills else "",
-            "final_decision": log.final_decision or "",
-            "reasoning": log.reasoning or "",
-            "actor": log.actor or "SYSTEM",
-        })
-    return output.getvalue()
+        yield json.dumps(_json_record(log)) + "\n"
+
+
+def stream_logs_json(logs: Iterable) -> Iterator[str]:
+    """Yield a JSON array incrementally (same records as export_logs_json)."""
+    yield "["
+    for i, log in enumerate(logs):
+        yield ("," if i else "") + "\n  " + json.dumps(_json_record(log))
+    yield "\n]\n"
+
+
+def gzip_stream(chunks: Iterable[str], level: int = 6) -> Iterator[bytes]:
+    """Gzip-compress a text stream on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,508 @@
+"""
+Bulk Student Import
+POST /students/bulk-import stages a CSV or NDJSON roster (and optionally a
+ZIP of resumes) under BULK_IMPORT_DIR and returns a job id. A background
+thread works through queued jobs BULK_IMPORT_CHUNK rows at a time:
+
+  parse → extract resume text (PDFs on a process pool) → extract skills →
+  embed (one batched encode per chunk) → upsert by email → index
+
+A chunk's upserts and the job checkpoint (processed_rows) commit in one
+transaction, so a job stopped by a crash or restart resumes after the last
+committed chunk, and redoing a chunk is harmless because rows are upserted
+by email. Invalid rows are recorded with their row number and skipped.
+Each job is leased by one process at a time (see BulkImporter), so every
+server worker can run an importer thread without importing a roster twice.
+
+Roster columns: email (required), name, branch and cgpa (required for new
+students), active_backlogs, graduation_year, phone, resume_text, skills,
+projects and certifications (separated by ";" or "|", or JSON arrays in
+NDJSON), and resume_file, a path inside the ZIP (defaults to <email>.pdf
+or <email>.txt when the archive has one). Fields left empty keep their
+stored values; skills are merged.
+"""
+import os
+import re
+import csv
+import json
+import time
+import uuid
+import queue
+import shutil
+import socket
+import zipfile
+import datetime
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from database.models import BulkImport, SessionLocal, Student
+from ai_engine.metrics import registry
+from ai_engine.inference_pool import inference_pool
+from ai_engine.resume_parser import extract_resume_text
+from ai_engine.ann_index import index_students
+from ai_engine.response_cache import response_cache
+from ai_engine.rescore import rescorer
+from ai_engine.matcher import extract_skills_batch, precompute_embeddings, resume_text_for
+
+BULK_IMPORT_DIR = os.getenv("BULK_IMPORT_DIR", "./imports")
+BULK_IMPORT_CHUNK = int(os.getenv("BULK_IMPORT_CHUNK", "500"))
+BULK_IMPORT_WORKERS = int(os.getenv("BULK_IMPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+BULK_IMPORT_MAX_ERRORS = int(os.getenv("BULK_IMPORT_MAX_ERRORS", "1000"))  # per-row errors kept per job
+BULK_IMPORT_LEASE_S = float(os.getenv("BULK_IMPORT_LEASE_S", "300"))
+BULK_IMPORT_POLL_S = float(os.getenv("BULK_IMPORT_POLL_S", "15"))  # look for jobs left by stopped processes
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+PROFILE_FIELDS = ("name", "email", "branch", "cgpa", "active_backlogs", "graduation_year", "phone",
+                  "resume_text", "skills", "projects", "certifications")
+_REQUIRED_NEW = ("name", "branch", "cgpa")
+_LIST_FIELDS = ("skills", "projects", "certifications")
+_INT_FIELDS = ("active_backlogs", "graduation_year")
+_TEXT_FIELDS = ("name", "branch", "phone", "resume_text")
+
+_rows = registry.counter("pathfinder_bulk_import_rows_total", "Roster rows processed by bulk imports", ["result"])
+_stage_seconds = registry.histogram("pathfinder_bulk_import_stage_seconds",
+                                    "Time spent per chunk in each bulk import stage", ["stage"])
+
+
+def roster_format(filename: str) -> Optional[str]:
+    return FORMATS.get(os.path.splitext(filename or "")[1].lower())
+
+
+def _paths(job_id: str, fmt: str) -> Tuple[str, str]:
+    directory = os.path.join(BULK_IMPORT_DIR, job_id)
+    return os.path.join(directory, f"roster.{fmt}"), os.path.join(directory, "resumes.zip")
+
+
+def stage_upload(job_id: str, fmt: str, roster: BinaryIO, resumes: Optional[BinaryIO]) -> None:
+    """Copy the uploads to the job's staging directory (blocking; run off the event loop)."""
+    roster_path, archive_path = _paths(job_id, fmt)
+    os.makedirs(os.path.dirname(roster_path), exist_ok=True)
+    with open(roster_path, "wb") as out:
+        shutil.copyfileobj(roster, out, 1 << 20)
+    if resumes is not None:
+        with open(archive_path, "wb") as out:
+            shutil.copyfileobj(resumes, out, 1 << 20)
+        if not zipfile.is_zipfile(archive_path):
+            shutil.rmtree(os.path.dirname(roster_path), ignore_errors=True)
+            raise ValueError("resumes must be a ZIP archive")
+
+
+# ── Parsing ───────────────────────────────────────────────────────────────────
+def read_roster(path: str, fmt: str) -> Iterator[Any]:
+    """Yield each roster row as a dict, or a ValueError for an unparseable line."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                yield row if isinstance(row, dict) else ValueError("line is not a JSON object")
+            except json.JSONDecodeError as e:
+                yield ValueError(f"invalid JSON: {e.msg}")
+
+
+def _as_list(value) -> List[str]:
+    items = value if isinstance(value, list) else re.split(r"[;|]", str(value))
+    return [str(v).strip() for v in items if str(v).strip()]
+
+
+def clean_row(raw: Dict) -> Dict:
+    """Validate one roster row; only the non-empty fields are returned."""
+    values = {}
+    for key, value in raw.items():
+        if key is None:  # CSV cells beyond the header
+            continue
+        value = value.strip() if isinstance(value, str) else value
+        if value not in (None, "", []):
+            values[key.strip().lower()] = value
+    email = str(values.get("email", "")).lower()
+    if "@" not in email:
+        raise ValueError("missing or invalid email")
+    row = {"email": email}
+    for field in _TEXT_FIELDS:
+        if field in values:
+            row[field] = str(values[field])
+    if "cgpa" in values:
+        try:
+            row["cgpa"] = float(values["cgpa"])
+        except (TypeError, ValueError):
+            raise ValueError(f"cgpa '{values['cgpa']}' is not a number")
+        if not 0 <= row["cgpa"] <= 10:
+            raise ValueError(f"cgpa {row['cgpa']} is outside 0-10")
+    for field in _INT_FIELDS:
+        if field in values:
+            try:
+                row[field] = int(float(values[field]))
+            except (TypeError, ValueError):
+                raise ValueError(f"{field} '{values[field]}' is not a whole number")
+    for field in _LIST_FIELDS:
+        if field in values:
+            row[field] = _as_list(values[field])
+    if "resume_file" in values:
+        row["resume_file"] = str(values["resume_file"])
+    return row
+
+
+def _merge(*lists: List[str]) -> List[str]:
+    return list(dict.fromkeys(item for items in lists for item in items))
+
+
+def _new_student_id() -> str:
+    return f"STU_{datetime.datetime.utcnow().year}_{uuid.uuid4().hex[:8].upper()}"
+
+
+# ── Job runner ────────────────────────────────────────────────────────────────
+class LeaseLost(Exception):
+    """This process no longer holds the job's lease (it lapsed and another process claimed it)."""
+
+
+class BulkImporter:
+    """
+    Background thread that claims import jobs and runs them one at a time.
+    A job is claimed with a conditional UPDATE that only succeeds while it is
+    queued or its lease has lapsed, so with several server processes (or
+    hosts sharing the staging directory) each job runs in exactly one. The
+    lease is renewed while the job runs and every chunk commit is guarded on
+    still holding it; jobs left by a stopped process are picked up by the
+    next poll once their lease lapses (a clean shutdown releases it at once).
+    """
+
+    def __init__(self, chunk_size: int = BULK_IMPORT_CHUNK, workers: int = BULK_IMPORT_WORKERS,
+                 lease_s: float = BULK_IMPORT_LEASE_S, poll_s: float = BULK_IMPORT_POLL_S):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.lease_s = lease_s
+        self.poll_s = poll_s
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def owner(self) -> str:
+        # Read at use, not import, so forked server workers get distinct lease owners.
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="bulk-import", daemon=True)
+                self._thread.start()
+
+    def submit(self, job_id: str) -> None:
+        """Wake the runner to try claiming `job_id` now rather than at the next poll."""
+        self.start()
+        self._queue.put(job_id)
+
+    def resume_interrupted(self) -> List[str]:
+        """Start polling; returns the jobs left queued or running that are claimable now."""
+        self.start()
+        with SessionLocal() as db:
+            return self._claimable(db)
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Stop after the current chunk; an unfinished job resumes from its checkpoint."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _claimable_condition(self, now: datetime.datetime):
+        return or_(BulkImport.status == "queued",
+                   and_(BulkImport.status == "running",
+                        or_(BulkImport.lease_expires_at.is_(None), BulkImport.lease_expires_at < now)))
+
+    def _claimable(self, db) -> List[str]:
+        rows = db.execute(select(BulkImport.id, BulkImport.roster_format)
+                          .where(self._claimable_condition(datetime.datetime.utcnow()))
+                          .order_by(BulkImport.created_at)).all()
+        # Staged files live on the host that took the upload; leave other hosts' jobs alone.
+        return [job_id for job_id, fmt in rows if os.path.exists(_paths(job_id, fmt)[0])]
+
+    def _claim(self, job_id: str) -> bool:
+        now = datetime.datetime.utcnow()
+        with SessionLocal() as db:
+            claimed = db.execute(update(BulkImport)
+                                 .where(BulkImport.id == job_id, self._claimable_condition(now))
+                                 .values(status="running", error=None, lease_owner=self.owner,
+                                         lease_expires_at=now + datetime.timedelta(seconds=self.lease_s)))
+            db.commit()
+        return claimed.rowcount == 1
+
+    def _heartbeat(self, job_id: str, done: threading.Event) -> None:
+        while not done.wait(self.lease_s / 3):
+            try:
+                with SessionLocal() as db:
+                    renewed = db.execute(update(BulkImport).where(*self._held(job_id)).values(
+                        lease_expires_at=datetime.datetime.utcnow() + datetime.timedelta(seconds=self.lease_s)))
+                    db.commit()
+                if renewed.rowcount == 0:
+                    return  # lost; the next guarded commit stops the job
+            except Exception as e:
+                print(f"⚠️  Could not renew the lease of bulk import {job_id}: {e}")
+
+    def _held(self, job_id: str) -> tuple:
+        return BulkImport.id == job_id, BulkImport.lease_owner == self.owner, BulkImport.status == "running"
+
+    def _release(self, job_id: str, **values) -> bool:
+        with SessionLocal() as db:
+            released = db.execute(update(BulkImport).where(*self._held(job_id))
+                                  .values(lease_owner=None, lease_expires_at=None, **values))
+            db.commit()
+        return released.rowcount == 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                hint = self._queue.get(timeout=self.poll_s)
+            except queue.Empty:
+                hint = None
+            if self._stop.is_set():
+                break
+            try:
+                if hint is not None:
+                    candidates = [hint]
+                else:
+                    with SessionLocal() as db:
+                        candidates = self._claimable(db)
+            except Exception as e:
+                print(f"⚠️  Could not poll for bulk imports: {e}")
+                continue
+            for job_id in candidates:
+                if self._stop.is_set():
+                    break
+                if self._claim(job_id):
+                    self._run_claimed(job_id)
+
+    def _run_claimed(self, job_id: str) -> None:
+        done = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, done), name="bulk-import-lease", daemon=True).start()
+        try:
+            self._run_job(job_id)
+        except LeaseLost:
+            print(f"⚠️  Bulk import {job_id}: lease lost; another process continues it from the checkpoint")
+        except Exception as e:
+            print(f"⚠️  Bulk import {job_id} failed: {e}")
+            self._release(job_id, status="failed", stage=None, error=str(e))
+        finally:
+            done.set()
+
+    def _run_job(self, job_id: str) -> None:
+        with SessionLocal() as db:
+            job = db.get(BulkImport, job_id)
+            if job is None or job.lease_owner != self.owner:
+                return
+            fmt, has_resumes, done = job.roster_format, job.has_resumes, job.processed_rows
+            roster_path, archive_path = _paths(job_id, fmt)
+            job.started_at = job.started_at or datetime.datetime.utcnow()
+            if job.total_rows is None:
+                job.stage = "counting"
+                job.total_rows = sum(1 for _ in read_roster(roster_path, fmt))
+            db.commit()
+
+        archive = zipfile.ZipFile(archive_path) if has_resumes else None
+        executor = (ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+                    if archive is not None and self.workers > 1 else None)
+        try:
+            members = {name.lower(): name for name in archive.namelist()} if archive else {}
+            chunk: List[Tuple[int, Any]] = []
+            for number, raw in enumerate(read_roster(roster_path, fmt), 1):
+                if number <= done:
+                    continue
+                chunk.append((number, raw))
+                if len(chunk) == self.chunk_size:
+                    self._import_chunk(job_id, chunk, archive, members, executor)
+                    chunk = []
+                    if self._stop.is_set():
+                        # Still "running"; releasing the lease lets any process resume it right away.
+                        self._release(job_id)
+                        return
+            if chunk:
+                self._import_chunk(job_id, chunk, archive, members, executor)
+        finally:
+            if archive is not None:
+                archive.close()
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if not self._release(job_id, status="completed", stage=None, finished_at=datetime.datetime.utcnow()):
+            raise LeaseLost(job_id)
+        with SessionLocal() as db:
+            job = db.get(BulkImport, job_id)
+            print(f"✅ Bulk import {job_id}: {job.created} created, {job.updated} updated, {job.failed} failed")
+        shutil.rmtree(os.path.dirname(roster_path), ignore_errors=True)
+
+    # ── One chunk through the pipeline ────────────────────────────────────────
+    def _import_chunk(self, job_id: str, chunk: List[Tuple[int, Any]], archive: Optional[zipfile.ZipFile],
+                      members: Dict[str, str], executor: Optional[ProcessPoolExecutor]) -> None:
+        errors: List[Dict] = []
+
+        def fail(number: int, email: Optional[str], message: str) -> None:
+            errors.append({"row": number, "email": email, "error": message})
+
+        with _stage(job_id, "parsing"):
+            latest: Dict[str, Tuple[int, Dict]] = {}
+            for number, raw in chunk:
+                try:
+                    if isinstance(raw, Exception):
+                        raise raw
+                    row = clean_row(raw)
+                except ValueError as e:
+                    fail(number, raw.get("email") if isinstance(raw, dict) else None, str(e))
+                    continue
+                if row["email"] in latest:
+                    fail(latest[row["email"]][0], row["email"], f"duplicate email; superseded by row {number}")
+                latest[row["email"]] = (number, row)
+            rows = sorted(latest.values(), key=lambda item: item[0])
+
+        if archive is not None:
+            with _stage(job_id, "extracting"):
+                rows = self._attach_resumes(rows, archive, members, executor, fail)
+
+        with _stage(job_id, "skills"):
+            with_text = [row for _, row in rows if row.get("resume_text")]
+            found = inference_pool.call(extract_skills_batch, [row["resume_text"] for row in with_text])
+            for row, skills in zip(with_text, found):
+                row["extracted_skills"] = skills
+
+        for attempt in range(2):
+            with SessionLocal() as db:
+                # clean_row lowercased the rows; match older mixed-case rows too.
+                existing = {s.email.lower(): s for s in db.execute(select(Student).where(
+                    func.lower(Student.email).in_([row["email"] for _, row in rows]))).scalars()}
+            profiles, new_rows, changed_rows, row_errors = self._profiles(rows, existing)
+            if attempt == 0:
+                with _stage(job_id, "embedding"):
+                    texts = [resume_text_for(p) for p in profiles] + [" ".join(p["projects"]) for p in profiles]
+                    inference_pool.call(precompute_embeddings, texts)
+            failures = sorted(errors + row_errors, key=lambda e: e["row"])
+            with _stage(job_id, "saving"), SessionLocal() as db:
+                try:
+                    if new_rows:
+                        db.execute(insert(Student), new_rows)
+                    if changed_rows:
+                        db.execute(update(Student), changed_rows)
+                    kept = db.execute(select(BulkImport.errors).where(*self._held(job_id))).scalar_one_or_none()
+                    # The checkpoint only commits while this process still holds the lease.
+                    checkpoint = db.execute(update(BulkImport).where(*self._held(job_id)).values(
+                        errors=(kept or []) + failures[:max(0, BULK_IMPORT_MAX_ERRORS - len(kept or []))],
+                        processed_rows=chunk[-1][0], created=BulkImport.created + len(new_rows),
+                        updated=BulkImport.updated + len(changed_rows), failed=BulkImport.failed + len(failures)))
+                    if checkpoint.rowcount == 0:
+                        db.rollback()
+                        raise LeaseLost(job_id)
+                    db.commit()
+                    break
+                except IntegrityError:
+                    # A student with one of these emails (or a colliding id)
+                    # was created concurrently; reload and retry once.
+                    db.rollback()
+                    if attempt:
+                        raise
+
+        response_cache.invalidate("students")
+        # Core updates skip the ORM change hook; queue the updated students' applications explicitly.
+        rescorer.enqueue(students=[p["id"] for p in changed_rows])
+        _rows.inc(len(new_rows), result="created")
+        _rows.inc(len(changed_rows), result="updated")
+        _rows.inc(len(failures), result="failed")
+        with _stage(job_id, "indexing"):
+            index_students(profiles)
+
+    def _attach_resumes(self, rows, archive, members, executor, fail):
+        files, kept = [], []
+        for number, row in rows:
+            name = row.pop("resume_file", None)
+            if name is None and "resume_text" not in row:
+                name = next((members[c] for c in (f"{row['email']}.pdf", f"{row['email']}.txt") if c in members), None)
+            elif name is not None:
+                name = members.get(name.lower())
+                if name is None:
+                    fail(number, row["email"], "resume_file not found in archive")
+                    continue
+            kept.append((number, row))
+            if name is not None:
+                files.append((row, name))
+        contents = [archive.read(name) for _, name in files]
+        names = [name for _, name in files]
+        texts = (executor.map(extract_resume_text, contents, names, chunksize=8) if executor is not None
+                 else map(extract_resume_text, contents, names))
+        for (row, _), text in zip(files, texts):
+            if text.strip():
+                row["resume_text"] = text
+        return kept
+
+    @staticmethod
+    def _profiles(rows, existing: Dict[str, Student]):
+        """Merge roster rows with stored students into full profiles and insert/update rows."""
+        profiles, new_rows, changed_rows, errors = [], [], [], []
+        for number, row in rows:
+            extracted = row.get("extracted_skills", [])
+            values = {k: v for k, v in row.items() if k in PROFILE_FIELDS}
+            student = existing.get(row["email"])
+            if student is None:
+                missing = [f for f in _REQUIRED_NEW if f not in values]
+                if missing:
+                    errors.append({"row": number, "email": row["email"],
+                                   "error": f"missing {', '.join(missing)} (required for new students)"})
+                    continue
+                profile = {f: None for f in PROFILE_FIELDS}
+                profile.update(active_backlogs=0, skills=[], projects=[], certifications=[])
+                profile.update(values, id=_new_student_id())
+                profile["skills"] = _merge(profile["skills"], extracted)
+                new_rows.append(profile)
+            else:
+                profile = {f: getattr(student, f) for f in PROFILE_FIELDS}
+                for field in _LIST_FIELDS:
+                    profile[field] = list(profile[field] or [])
+                stored_skills = profile["skills"]
+                profile.update(values, id=student.id)
+                profile["skills"] = _merge(stored_skills, values.get("skills", []), extracted)
+                changed_rows.append(profile)
+            profiles.append(profile)
+        return profiles, new_rows, changed_rows, errors
+
+
+@contextmanager
+def _stage(job_id: str, stage: str) -> Iterator[None]:
+    """Record the job's current stage and time it into the stage histogram."""
+    with SessionLocal() as db:
+        db.execute(update(BulkImport).where(BulkImport.id == job_id).values(stage=stage))
+        db.commit()
+    started = time.perf_counter()
+    yield
+    _stage_seconds.observe(time.perf_counter() - started, stage=stage)
+
+
+def job_summary(job: BulkImport, errors_limit: int = 100) -> Dict:
+    """Progress report for GET /students/bulk-import/{job_id}."""
+    end = job.finished_at or datetime.datetime.utcnow()
+    elapsed = (end - job.started_at).total_seconds() if job.started_at else 0.0
+    rate = job.processed_rows / elapsed if elapsed > 0 else None
+    remaining = (job.total_rows or 0) - job.processed_rows
+    errors = job.errors or []
+    return {"job_id": job.id, "status": job.status, "stage": job.stage, "roster": job.roster_name,
+            "has_resumes": job.has_resumes, "total_rows": job.total_rows, "processed_rows": job.processed_rows,
+            "percent": round(100 * job.processed_rows / job.total_rows, 1) if job.total_rows else None,
+            "created": job.created, "updated": job.updated, "failed": job.failed,
+            "rows_per_s": round(rate, 1) if rate else None,
+            "eta_s": round(remaining / rate, 1) if rate and job.status == "running" else None,
+            "error": job.error, "errors": errors[:errors_limit],
+            "errors_truncated": job.failed > min(len(errors), errors_limit),
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None}
+
+
+bulk_importer = BulkImporter()
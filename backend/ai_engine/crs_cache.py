@@ -0,0 +1,149 @@
+"""
+CRS Cache
+compute_crs is a pure function of a handful of profile and drive fields,
+so results are memoized under a fingerprint of exactly those fields plus
+the scorer identity (version, weights, embedding model). Editing a
+profile, changing a weight or swapping the model changes the fingerprint,
+so stale results are never served and nothing needs explicit invalidation.
+
+Tier 1 is an in-process LRU (CRS_CACHE_SIZE entries). Tier 2, enabled by
+setting CRS_CACHE_DB_PATH, is a SQLite table that survives restarts; rows
+written by a different scorer identity are pruned when it is opened.
+"""
+import os
+import copy
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from ai_engine.metrics import registry
+
+CRS_CACHE_SIZE = int(os.getenv("CRS_CACHE_SIZE", "10000"))
+CRS_CACHE_DB_PATH = os.getenv("CRS_CACHE_DB_PATH", "")
+
+# The only inputs compute_crs reads.
+STUDENT_FIELDS = ("skills", "projects", "certifications", "phone", "resume_text")
+DRIVE_FIELDS = ("required_skills", "jd_text")
+
+_lookups = registry.counter("pathfinder_crs_cache_lookups_total", "CRS cache lookups by outcome", ["result"])
+
+
+def fingerprint(student: Dict, drive: Dict, scorer: str) -> str:
+    payload = [scorer,
+               [student.get(f) for f in STUDENT_FIELDS],
+               [drive.get(f) for f in DRIVE_FIELDS]]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def scorer_identity(version: str, weights: Dict[str, float], model: str) -> str:
+    return json.dumps({"version": version, "weights": weights, "model": model}, sort_keys=True)
+
+
+class CRSCache:
+    def __init__(self, size: int = CRS_CACHE_SIZE, path: str = CRS_CACHE_DB_PATH):
+        self.size = size
+        self.path = path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._scorer: Optional[str] = None
+
+    def _connect(self, scorer: str) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS crs_cache ("
+                         " fingerprint TEXT PRIMARY KEY, scorer TEXT NOT NULL, result TEXT NOT NULL)")
+            self._conn = conn
+        if self._scorer != scorer:
+            pruned = self._conn.execute("DELETE FROM crs_cache WHERE scorer <> ?", (scorer,)).rowcount
+            self._conn.commit()
+            if pruned:
+                print(f"🧹 Pruned {pruned} CRS cache rows from a previous scorer")
+            self._scorer = scorer
+        return self._conn
+
+    def _remember(self, key: str, result: Dict) -> None:
+        self._lru[key] = result
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.size:
+            self._lru.popitem(last=False)
+
+    def get_many(self, keys: List[str], scorer: str) -> Dict[str, Dict]:
+        """Cached results for whichever keys are present (copies, safe to mutate)."""
+        found: Dict[str, Dict] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+            self.hits += len(found)
+            _lookups.inc(len(found), result="memory")
+            missing = [k for k in dict.fromkeys(keys) if k not in found]
+            conn = self._connect(scorer) if missing else None
+            if conn is not None:
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    rows = conn.execute(f"SELECT fingerprint, result FROM crs_cache WHERE fingerprint IN "
+                                        f"({','.join('?' * len(chunk))})", chunk).fetchall()
+                    for key, result in rows:
+                        found[key] = json.loads(result)
+                        self._remember(key, found[key])
+            disk = sum(1 for k in missing if k in found)
+            self.disk_hits += disk
+            self.misses += len(missing) - disk
+            _lookups.inc(disk, result="disk")
+            _lookups.inc(len(missing) - disk, result="miss")
+        return {k: copy.deepcopy(v) for k, v in found.items()}
+
+    def contains(self, keys: Iterable[str], scorer: str) -> int:
+        """How many of `keys` are cached, without touching LRU order or counters."""
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            missing = [k for k in keys if k not in self._lru]
+            present = len(keys) - len(missing)
+            conn = self._connect(scorer) if missing else None
+            if conn is not None:
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    present += conn.execute(f"SELECT COUNT(*) FROM crs_cache WHERE fingerprint IN "
+                                            f"({','.join('?' * len(chunk))})", chunk).fetchone()[0]
+        return present
+
+    def put_many(self, items: Dict[str, Dict], scorer: str) -> None:
+        with self._lock:
+            for key, result in items.items():
+                self._remember(key, copy.deepcopy(result))
+            conn = self._connect(scorer)
+            if conn is not None and items:
+                conn.executemany("INSERT OR REPLACE INTO crs_cache VALUES (?, ?, ?)",
+                                 [(k, scorer, json.dumps(v)) for k, v in items.items()])
+                conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._lru.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM crs_cache")
+                self._conn.commit()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        with self._lock:
+            disk_rows = self._conn.execute("SELECT COUNT(*) FROM crs_cache").fetchone()[0] if self._conn else None
+            return {"memory_entries": len(self._lru), "memory_capacity": self.size,
+                    "disk_path": self.path or None, "disk_entries": disk_rows,
+                    "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else None}
+
+
+crs_cache = CRSCache()
@@ -0,0 +1,108 @@
+"""
+Embedding Store
+Persistent cache of sentence embeddings for resumes, projects and JDs.
+Vectors are stored as float32 blobs in a small SQLite file next to
+pathfinder.db, keyed by a SHA-256 of the text and the encoder key (model
+plus backend, e.g. "all-MiniLM-L6-v2:onnx-int8"), so a drive JD is
+encoded once no matter how many students apply to it.
+
+Entries are content-addressed, so they never go stale: an edited resume
+or JD hashes to a new key, and the old vector (possibly shared with other
+rows holding the same text) is simply no longer looked up.
+"""
+import os
+import sqlite3
+import hashlib
+import datetime
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMBEDDING_DB_PATH = os.getenv("EMBEDDING_DB_PATH", "./embeddings.db")
+
+
+def text_hash(text: str) -> str:
+    """Content hash used as the store key (together with the model name)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """Thread-safe SQLite-backed map of (text hash, model) → float32 vector."""
+
+    def __init__(self, path: str = EMBEDDING_DB_PATH):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " text_hash TEXT NOT NULL,"
+                " model TEXT NOT NULL,"
+                " dim INTEGER NOT NULL,"
+                " vector BLOB NOT NULL,"
+                " created_at TEXT NOT NULL,"
+                " PRIMARY KEY (text_hash, model))"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, texts: List[str], model: str) -> Dict[str, np.ndarray]:
+        """Return the stored vectors for whichever of `texts` are present."""
+        hashes = {text_hash(t): t for t in texts}
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            conn = self._connect()
+            keys = list(hashes)
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND text_hash IN ({','.join('?' * len(chunk))})",
+                    [model, *chunk],
+                ).fetchall()
+                for h, blob in rows:
+                    found[hashes[h]] = np.frombuffer(blob, dtype=np.float32)
+            self.hits += len(found)
+            self.misses += len(hashes) - len(found)
+        return found
+
+    def put_many(self, texts: List[str], vectors: np.ndarray, model: str) -> None:
+        """Insert or replace vectors for `texts` (row-aligned with `vectors`)."""
+        now = datetime.datetime.utcnow().isoformat()
+        rows = [
+            (text_hash(t), model, int(v.shape[0]), np.asarray(v, dtype=np.float32).tobytes(), now)
+            for t, v in zip(texts, vectors)
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            conn.commit()
+
+    def invalidate(self, text: str) -> None:
+        """Drop every model's vector for `text`."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM embeddings WHERE text_hash = ?", (text_hash(text),))
+            conn.commit()
+
+    def ping(self) -> None:
+        """Open the store if needed and run a trivial query (readiness check)."""
+        with self._lock:
+            self._connect().execute("SELECT 1").fetchone()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"path": self.path, "vectors": count, "hits": self.hits, "misses": self.misses}
+
+
+store = EmbeddingStore()
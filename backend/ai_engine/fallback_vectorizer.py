@@ -0,0 +1,120 @@
+"""
+Fallback Vectorizer - hashed TF-IDF on NumPy
+Used when sentence-transformers is unavailable. Tokens are hashed into a
+fixed FALLBACK_DIM-dimensional space (signed feature hashing, crc32), so
+vectors are comparable across calls without a shared vocabulary. Term
+frequencies are sublinear (1 + log tf) and weighted by IDF fitted on the
+corpus of resumes and JDs.
+
+Vectors are kept sparse as CSR arrays (indptr / indices / data), and
+similarities against a query come from one vectorized sparse
+matrix-vector product, so memory is proportional to the tokens present,
+not to the vocabulary.
+"""
+import os
+import re
+import zlib
+import hashlib
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+FALLBACK_DIM = int(os.getenv("FALLBACK_DIM", "2048"))
+FALLBACK_VERSION = "1"
+
+_TOKEN = re.compile(r"\b\w+\b")
+
+Csr = Tuple[np.ndarray, np.ndarray, np.ndarray]  # indptr, indices, data
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token: str, dim: int) -> Tuple[int, float]:
+    h = zlib.crc32(token.encode("utf-8"))
+    return h % dim, (1.0 if h & 0x80000000 else -1.0)
+
+
+class HashedTfidfVectorizer:
+    def __init__(self, dim: int = FALLBACK_DIM):
+        self.dim = dim
+        self.idf = np.ones(dim, dtype=np.float32)
+        self.documents = 0
+        self._lock = threading.Lock()
+        self._digest = "unfitted"
+
+    @property
+    def model_name(self) -> str:
+        """Identifies the vector space: changes whenever the IDF is refitted."""
+        return f"hashed-tfidf-{self.dim}-v{FALLBACK_VERSION}-{self._digest}"
+
+    def fit(self, corpus: Iterable[str]) -> "HashedTfidfVectorizer":
+        """Fit smoothed IDF, log((1 + N) / (1 + df)) + 1, over `corpus`."""
+        texts = list(corpus)
+        _, indices, _ = self.transform(texts)
+        df = np.bincount(indices, minlength=self.dim)
+        idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+        with self._lock:
+            self.idf, self.documents = idf, len(texts)
+            self._digest = hashlib.sha256(idf.tobytes()).hexdigest()[:8]
+        return self
+
+    def transform(self, texts: List[str]) -> Csr:
+        """
+        L2-normalized TF-IDF rows as CSR arrays. Only tokenization is a
+        Python loop; counting, hashing and weighting are array operations.
+        """
+        n = len(texts)
+        vocab: Dict[str, int] = {}
+        token_ids: List[int] = []
+        lengths = np.zeros(n, dtype=np.int64)
+        for i, text in enumerate(texts):
+            tokens = _TOKEN.findall((text or "").lower())
+            token_ids.extend(vocab.setdefault(t, len(vocab)) for t in tokens)
+            lengths[i] = len(tokens)
+        if not token_ids:
+            return np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+
+        hashed = [_bucket(t, self.dim) for t in vocab]
+        bucket_of = np.fromiter((b for b, _ in hashed), dtype=np.int64, count=len(hashed))
+        sign_of = np.fromiter((s for _, s in hashed), dtype=np.float32, count=len(hashed))
+
+        # (row, token) → tf, then sum signed weights into (row, bucket) cells.
+        rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        pairs, tf = np.unique(rows * len(vocab) + np.asarray(token_ids, dtype=np.int64), return_counts=True)
+        pair_rows, pair_tokens = np.divmod(pairs, len(vocab))
+        buckets = bucket_of[pair_tokens]
+        weights = sign_of[pair_tokens] * (1.0 + np.log(tf)).astype(np.float32) * self.idf[buckets]
+        cells, inverse = np.unique(pair_rows * self.dim + buckets, return_inverse=True)
+        data = np.bincount(inverse, weights=weights).astype(np.float32)
+        cell_rows, indices = np.divmod(cells, self.dim)
+
+        norms = np.sqrt(np.bincount(cell_rows, weights=data.astype(np.float64) ** 2, minlength=n))
+        data /= np.where(norms > 0, norms, 1.0)[cell_rows].astype(np.float32)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(cell_rows, minlength=n))
+        return indptr, indices.astype(np.int32), data
+
+    def transform_dense(self, texts: List[str]) -> np.ndarray:
+        indptr, indices, data = self.transform(texts)
+        dense = np.zeros((len(texts), self.dim), dtype=np.float32)
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        dense[rows, indices] = data
+        return dense
+
+    def similarities(self, texts: List[str], query: str) -> np.ndarray:
+        """Cosine similarity of every text against `query` (sparse mat-vec)."""
+        indptr, indices, data = self.transform(list(texts) + [query])
+        q = np.zeros(self.dim, dtype=np.float32)
+        q[indices[indptr[-2]:]] = data[indptr[-2]:]
+        indptr = indptr[:-1]
+        contributions = data[:indptr[-1]] * q[indices[:indptr[-1]]]
+        # Row sums via a cumulative sum over the CSR data (handles empty rows).
+        cumulative = np.concatenate(([0.0], np.cumsum(contributions, dtype=np.float64)))
+        sims = cumulative[indptr[1:]] - cumulative[indptr[:-1]]
+        # Signed hashing lets unrelated colliding tokens cancel slightly below
+        # zero; like unhashed TF-IDF, report those pairs as unrelated.
+        return np.clip(sims, 0.0, 1.0).astype(np.float32)
+
+
+fallback_vectorizer = HashedTfidfVectorizer()
@@ -0,0 +1,193 @@
+"""
+Inference Pool
+Dedicated executor for CPU-bound work — model encodes, PDF parsing and
+skill extraction — so it never runs on the event loop or competes with
+request handlers in Starlette's shared threadpool.
+
+INFERENCE_WORKERS > 0 → process pool; each worker loads the model once.
+INFERENCE_WORKERS = 0 → dedicated in-process thread pool (INFERENCE_THREADS).
+At most INFERENCE_MAX_PENDING jobs are in flight; further callers wait up
+to INFERENCE_QUEUE_TIMEOUT seconds and then get InferenceBusy (HTTP 503).
+"""
+import os
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from ai_engine.metrics import registry
+
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "2"))
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "64"))
+INFERENCE_QUEUE_TIMEOUT = float(os.getenv("INFERENCE_QUEUE_TIMEOUT", "30"))
+
+_inflight = registry.gauge("pathfinder_inference_inflight", "Jobs queued or running on the inference pool")
+_rejected = registry.counter("pathfinder_inference_rejected_total",
+                             "Jobs refused because the inference queue stayed full")
+_job_seconds = registry.histogram("pathfinder_inference_job_seconds",
+                                  "Submit-to-result latency of inference pool jobs", ["task"])
+
+# True inside pool workers, so nested calls run inline instead of re-submitting.
+_IN_WORKER = False
+_local = threading.local()
+
+
+class InferenceBusy(Exception):
+    """Raised when the inference queue is full for longer than the timeout."""
+
+
+def _process_worker_init() -> None:
+    global _IN_WORKER
+    _IN_WORKER = True
+    from ai_engine.matcher import get_model
+    get_model()
+
+
+def _thread_worker_init() -> None:
+    _local.in_worker = True
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def _model_key() -> Optional[str]:
+    from ai_engine.matcher import loaded_model_key
+    return loaded_model_key()
+
+
+class InferencePool:
+    def __init__(self, workers: int = INFERENCE_WORKERS, threads: int = INFERENCE_THREADS,
+                 max_pending: int = INFERENCE_MAX_PENDING, timeout: float = INFERENCE_QUEUE_TIMEOUT):
+        self.workers = workers
+        self.threads = threads
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        # Coroutines in run() waiting for a slot; woken from whichever thread frees one.
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._pending = 0
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._model_key: Optional[str] = None
+        self._model_checked = False
+
+    @property
+    def uses_processes(self) -> bool:
+        return self.workers > 0 and not _IN_WORKER
+
+    @staticmethod
+    def in_worker() -> bool:
+        return _IN_WORKER or getattr(_local, "in_worker", False)
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_process_worker_init,
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.threads, thread_name_prefix="inference",
+                        initializer=_thread_worker_init,
+                    )
+            return self._executor
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        started = time.monotonic()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            # e.g. RuntimeError after shutdown or BrokenProcessPool: no future will release the slot.
+            self._release()
+            raise
+        with self._lock:
+            self._pending += 1
+            _inflight.set(self._pending)
+
+        def _done(_):
+            self._release()
+            with self._lock:
+                self._pending -= 1
+                _inflight.set(self._pending)
+            _job_seconds.observe(time.monotonic() - started, task=fn.__name__)
+
+        future.add_done_callback(_done)
+        return future
+
+    def _release(self) -> None:
+        self._slots.release()
+        with self._lock:
+            waiters, self._waiters = self._waiters, []
+        # Wake them all: each retries the semaphore and the losers wait again.
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:  # that loop has closed
+                pass
+
+    async def _acquire_async(self) -> bool:
+        """Take a slot without blocking the event loop; False after the timeout."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            waiter = loop.create_future()
+            with self._lock:
+                self._waiters.append((loop, waiter))
+            try:
+                # Registered before trying, so a slot freed in between still wakes us.
+                if self._slots.acquire(blocking=False):
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(waiter, remaining)
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Queue `fn(*args)`; blocks while the queue is full, up to the timeout."""
+        if not self._slots.acquire(timeout=self.timeout):
+            _rejected.inc()
+            raise InferenceBusy("Inference queue is full, try again shortly")
+        return self._submit(fn, *args)
+
+    def call(self, fn: Callable, *args) -> Any:
+        """Run `fn(*args)` on the pool and wait; inline when already on a worker."""
+        if self.in_worker():
+            return fn(*args)
+        return self.submit(fn, *args).result()
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Async variant of call() that never blocks the event loop."""
+        if not await self._acquire_async():
+            _rejected.inc()
+            raise InferenceBusy("Inference queue is full, try again shortly")
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def model_key(self) -> Optional[str]:
+        """The workers' encoder key, None in fallback (checked once per pool)."""
+        if not self._model_checked:
+            self._model_key = self.call(_model_key)
+            self._model_checked = True
+        return self._model_key
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+inference_pool = InferencePool()
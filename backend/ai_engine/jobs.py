@@ -0,0 +1,297 @@
+"""
+Durable Job Queue
+Long-running work (scoring a whole drive, rebuilding the ANN indexes) runs
+as jobs stored in the jobs / job_shards tables of the main database, so it
+survives restarts and can be drained by any number of worker processes or
+hosts sharing DATABASE_URL — no external broker.
+
+enqueue_job() plans a job into shards (e.g. JOB_SHARD_SIZE students each).
+Workers claim a shard with a conditional UPDATE that only succeeds while it
+is pending or its lease has lapsed, then renew the lease every third of
+JOB_LEASE_S while it runs. A shard's writes and its "done" mark commit in
+one transaction, guarded on still holding the lease, so a worker that lost
+its lease (stalled, crashed, partitioned) can't double-apply its shard.
+Failed shards are retried up to JOB_MAX_ATTEMPTS times, lapsed leases are
+picked up by the next claim, and the job completes once every shard is done
+or failed. Shard handlers must be idempotent (skip work already committed).
+Lease expiry uses each worker's clock, so hosts need synced clocks (NTP).
+
+Job kinds are registered with register_job_kind(kind, plan, run); main.py registers
+them, and worker.py runs dedicated workers (JOB_WORKER_THREADS runs some
+inside the API process too).
+"""
+import os
+import uuid
+import time
+import random
+import socket
+import datetime
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from database.models import Job, JobShard, SessionLocal
+from ai_engine.metrics import registry
+
+JOB_LEASE_S = float(os.getenv("JOB_LEASE_S", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_POLL_S = float(os.getenv("JOB_POLL_S", "1.0"))
+JOB_SHARD_SIZE = int(os.getenv("JOB_SHARD_SIZE", "500"))
+JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", "1"))  # in the API process; 0 = dedicated workers only
+
+ACTIVE = ("queued", "running")
+TERMINAL = ("completed", "failed", "cancelled")
+
+_shards = registry.counter("pathfinder_job_shards_total", "Job shards finished by outcome",
+                           ["kind", "result"])
+_shard_seconds = registry.histogram("pathfinder_job_shard_seconds", "Time to run one job shard", ["kind"],
+                                    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+
+
+@dataclass
+class JobKind:
+    plan: Callable[[Session, Dict], List[Dict]]  # (db, params) -> shard payloads
+    run: Callable[[Session, Dict, Dict], Dict]  # (db, params, payload) -> shard result; must not commit
+
+
+job_kinds: Dict[str, JobKind] = {}
+
+
+def register_job_kind(kind: str, plan: Callable[[Session, Dict], List[Dict]],
+             run: Callable[[Session, Dict, Dict], Dict]) -> None:
+    job_kinds[kind] = JobKind(plan, run)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+def enqueue_job(db: Session, kind: str, params: Optional[Dict] = None) -> Job:
+    """Plan and store a job. Raises KeyError for an unknown kind; plan() may raise ValueError."""
+    params = params or {}
+    payloads = job_kinds[kind].plan(db, params)
+    job = Job(id=str(uuid.uuid4()), kind=kind, params=params, total_shards=len(payloads),
+              status="queued" if payloads else "completed", finished_at=None if payloads else _now())
+    db.add(job)
+    db.flush()
+    db.add_all([JobShard(id=f"{job.id}:{seq}", job_id=job.id, seq=seq, payload=payload)
+                for seq, payload in enumerate(payloads)])
+    db.commit()
+    return job
+
+
+def cancel_job(db: Session, job_id: str) -> bool:
+    """Stop handing out a job's remaining shards (a shard already running still finishes)."""
+    result = db.execute(update(Job).where(Job.id == job_id, Job.status.in_(ACTIVE))
+                        .values(status="cancelled", finished_at=_now()))
+    if result.rowcount:
+        db.execute(update(JobShard).where(JobShard.job_id == job_id, JobShard.status == "pending")
+                   .values(status="cancelled", updated_at=_now()))
+    db.commit()
+    return bool(result.rowcount)
+
+
+def job_progress(db: Session, job: Job, errors_limit: int = 20) -> Dict:
+    """Progress report for GET /jobs/{job_id}: shard counts, summed shard results, recent errors."""
+    counts = dict(db.execute(select(JobShard.status, func.count()).where(JobShard.job_id == job.id)
+                             .group_by(JobShard.status)).all())
+    totals: Dict[str, float] = {}
+    for (result,) in db.execute(select(JobShard.result).where(JobShard.job_id == job.id,
+                                                             JobShard.status == "done")):
+        for key, value in (result or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+    errors = [{"shard": seq, "attempts": attempts, "error": error} for seq, attempts, error in db.execute(
+        select(JobShard.seq, JobShard.attempts, JobShard.error)
+        .where(JobShard.job_id == job.id, JobShard.error.is_not(None))
+        .order_by(JobShard.seq).limit(errors_limit))]
+    end = job.finished_at or _now()
+    return {"job_id": job.id, "kind": job.kind, "params": job.params, "status": job.status,
+            "total_shards": job.total_shards, "done_shards": job.done_shards, "failed_shards": job.failed_shards,
+            "percent": round(100 * (job.done_shards + job.failed_shards) / job.total_shards, 1)
+                       if job.total_shards else 100.0,
+            "shards": counts, "result": totals, "errors": errors,
+            "elapsed_s": round((end - job.started_at).total_seconds(), 1) if job.started_at else None,
+            "created_at": job.created_at.isoformat() if job.created_at else None,
+            "started_at": job.started_at.isoformat() if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() if job.finished_at else None}
+
+
+def _finalize(db: Session, job_id: str) -> None:
+    # One atomic UPDATE over the shard counters, so two workers finishing the
+    # last shards at once can't both miss (or both apply) the transition.
+    db.execute(update(Job)
+               .where(Job.id == job_id, Job.status == "running",
+                      Job.done_shards + Job.failed_shards >= Job.total_shards)
+               .values(status=case((Job.failed_shards > 0, "failed"), else_="completed"), finished_at=_now()))
+    db.commit()
+
+
+# ── Workers ───────────────────────────────────────────────────────────────────
+@dataclass
+class _Lease:
+    shard_id: str
+    job_id: str
+    kind: str
+    params: Dict
+    payload: Dict
+    attempts: int
+
+
+class JobWorker:
+    """Threads that claim and run shards until stopped."""
+
+    def __init__(self, lease_s: float = JOB_LEASE_S, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 poll_s: float = JOB_POLL_S):
+        self.lease_s = lease_s
+        self.max_attempts = max_attempts
+        self.poll_s = poll_s
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def prefix(self) -> str:
+        # Read at use, not import, so forked server workers get distinct lease owners.
+        return f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self, threads: int = JOB_WORKER_THREADS) -> None:
+        self._stop.clear()
+        for n in range(threads):
+            thread = threading.Thread(target=self._loop, args=(f"{self.prefix}:{n}",), name=f"job-worker-{n}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Stop claiming; a shard still running past `timeout` is left to lapse and be retried."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run_until_idle(self, owner: Optional[str] = None) -> int:
+        """Run shards on the calling thread until none is claimable; returns the number run."""
+        owner = owner or f"{self.prefix}:inline"
+        ran = 0
+        while (lease := self.claim(owner)) is not None:
+            self.run_shard(lease, owner)
+            ran += 1
+        return ran
+
+    def _loop(self, owner: str) -> None:
+        while not self._stop.is_set():
+            try:
+                lease = self.claim(owner)
+                if lease is None:
+                    self._stop.wait(self.poll_s)
+                    continue
+                self.run_shard(lease, owner)
+            except Exception as e:
+                print(f"⚠️  Job worker {owner}: {e}")
+                self._stop.wait(self.poll_s)
+
+    def claim(self, owner: str) -> Optional[_Lease]:
+        """Lease the next runnable shard (pending, or whose lease lapsed), or None."""
+        now = _now()
+        claimable = or_(JobShard.status == "pending",
+                        and_(JobShard.status == "leased", JobShard.lease_expires_at < now))
+        with SessionLocal() as db:
+            candidates = db.execute(
+                select(JobShard.id, JobShard.job_id, JobShard.attempts, Job.kind, Job.params, JobShard.payload)
+                .join(Job, Job.id == JobShard.job_id)
+                .where(Job.status.in_(ACTIVE), claimable)
+                .order_by(Job.created_at, JobShard.seq).limit(16)).all()
+            # Workers polling together would all race for the first row; spread them out.
+            random.shuffle(candidates)
+            for shard_id, job_id, attempts, kind, params, payload in candidates:
+                if attempts >= self.max_attempts:
+                    # Its last attempt's lease lapsed (worker died mid-shard); give up on it.
+                    failed = db.execute(update(JobShard).where(JobShard.id == shard_id, claimable).values(
+                        status="failed", lease_owner=None, updated_at=now,
+                        error=f"lease expired on attempt {attempts}/{self.max_attempts}"))
+                    if failed.rowcount:
+                        db.execute(update(Job).where(Job.id == job_id)
+                                   .values(failed_shards=Job.failed_shards + 1))
+                        _shards.inc(kind=kind, result="failed")
+                    db.commit()
+                    _finalize(db, job_id)
+                    continue
+                leased = db.execute(update(JobShard).where(JobShard.id == shard_id, claimable).values(
+                    status="leased", lease_owner=owner, attempts=JobShard.attempts + 1, updated_at=now,
+                    lease_expires_at=now + datetime.timedelta(seconds=self.lease_s)))
+                if leased.rowcount == 0:
+                    continue  # another worker got it first
+                db.execute(update(Job).where(Job.id == job_id, Job.status == "queued")
+                           .values(status="running", started_at=now))
+                db.commit()
+                return _Lease(shard_id, job_id, kind, params or {}, payload or {}, attempts + 1)
+        return None
+
+    def _heartbeat(self, lease: _Lease, owner: str, done: threading.Event) -> None:
+        while not done.wait(self.lease_s / 3):
+            try:
+                with SessionLocal() as db:
+                    renewed = db.execute(update(JobShard)
+                                         .where(JobShard.id == lease.shard_id, JobShard.lease_owner == owner,
+                                                JobShard.status == "leased")
+                                         .values(lease_expires_at=_now() + datetime.timedelta(seconds=self.lease_s)))
+                    db.commit()
+            except Exception as e:
+                # e.g. SQLite busy while the shard itself is writing; try again next beat.
+                print(f"⚠️  Lease renewal for {lease.shard_id} failed: {e}")
+                continue
+            if renewed.rowcount == 0:
+                return  # lease lost; run_shard's guarded commit will notice
+
+    def run_shard(self, lease: _Lease, owner: str) -> str:
+        """Run a leased shard; returns done, retried, failed or lost."""
+        holds_lease = and_(JobShard.id == lease.shard_id, JobShard.lease_owner == owner,
+                           JobShard.status == "leased")
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(lease, owner, done),
+                                     name=f"job-lease-{lease.shard_id}", daemon=True)
+        heartbeat.start()
+        started = time.perf_counter()
+        try:
+            with SessionLocal() as db:
+                kind = job_kinds.get(lease.kind)
+                if kind is None:
+                    raise RuntimeError(f"no handler registered for job kind '{lease.kind}'")
+                result = kind.run(db, lease.params, lease.payload)
+                finished = db.execute(update(JobShard).where(holds_lease).values(
+                    status="done", result=result, error=None, lease_expires_at=None, updated_at=_now()))
+                if finished.rowcount == 0:
+                    db.rollback()
+                    outcome = "lost"
+                else:
+                    db.execute(update(Job).where(Job.id == lease.job_id).values(done_shards=Job.done_shards + 1))
+                    db.commit()
+                    outcome = "done"
+        except Exception as e:
+            outcome = "failed" if lease.attempts >= self.max_attempts else "retried"
+            with SessionLocal() as db:
+                marked = db.execute(update(JobShard).where(holds_lease).values(
+                    status="failed" if outcome == "failed" else "pending", lease_owner=None,
+                    lease_expires_at=None, error=f"{type(e).__name__}: {e}", updated_at=_now()))
+                if marked.rowcount and outcome == "failed":
+                    db.execute(update(Job).where(Job.id == lease.job_id)
+                               .values(failed_shards=Job.failed_shards + 1))
+                db.commit()
+                if not marked.rowcount:
+                    outcome = "lost"
+            if outcome != "lost":
+                print(f"⚠️  Job {lease.job_id} shard {lease.shard_id} attempt {lease.attempts} failed: {e}")
+        finally:
+            done.set()
+            heartbeat.join()
+        _shards.inc(kind=lease.kind, result=outcome)
+        _shard_seconds.observe(time.perf_counter() - started, kind=lease.kind)
+        with SessionLocal() as db:
+            _finalize(db, lease.job_id)
+        return outcome
+
+
+job_worker = JobWorker()
@@ -5,27 +5,88 @@ CRS Formula:
   Project Relevance     → 30%
   Resume Completeness   → 20%
 Uses: all-MiniLM-L6-v2 (local, no external API calls)
+Fallback: hashed TF-IDF (fallback_vectorizer.py) when the model is unavailable
 """
-from typing import Dict, List, Tuple
-import re
+from typing import Dict, List, Optional, Tuple
+import os
+import copy
 import math
+import threading
+
+import numpy as np
+
+from ai_engine.embedding_store import store
+from ai_engine.inference_pool import inference_pool
+from ai_engine.microbatch import MicroBatcher, EMBED_MICROBATCH, EMBED_MAX_BATCH
+from ai_engine.skill_extractor import skill_matcher
+from ai_engine.crs_cache import crs_cache, fingerprint, scorer_identity
+from ai_engine.fallback_vectorizer import fallback_vectorizer
+from ai_engine.metrics import registry
+from ai_engine.tracing import span
+
+# EMBED_MODEL may also be a local directory holding a saved copy (offline deployments).
+MODEL_NAME = os.getenv("EMBED_MODEL", "all-MiniLM-L6-v2")
+
+# Bump SCORER_VERSION whenever _assemble_crs changes meaning; together with
+# the weights and model it keys the CRS cache.
+SCORER_VERSION = "1"
+CRS_WEIGHTS = {"semantic": 0.5, "project": 0.3, "completeness": 0.2}
 
 # ── Lazy-load model to avoid slow startup ────────────────────────────────────
+# EMBED_BACKEND selects the encoder: "torch" (sentence-transformers, float32)
+# or "onnx" (ONNX Runtime, int8-quantized by default; see onnx_backend.py).
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+
+_fallbacks = registry.counter("pathfinder_model_fallback_total",
+                              "Embedding/similarity calls served by the TF-IDF fallback instead of the model",
+                              ["operation"])
+_store_lookups = registry.counter("pathfinder_embedding_store_lookups_total",
+                                  "Embedding store lookups by outcome (per text)", ["result"])
+
 _model = None
+_model_key: Optional[str] = None
+_model_lock = threading.Lock()
+
+
+def _load_backend(backend: str):
+    """Build an encoder exposing SentenceTransformer.encode(); returns (encoder, store key)."""
+    if backend == "onnx":
+        from ai_engine.onnx_backend import OnnxEncoder
+        encoder = OnnxEncoder(MODEL_NAME)
+        return encoder, f"{MODEL_NAME}:{encoder.variant}"
+    if backend != "torch":
+        raise ValueError(f"Unknown EMBED_BACKEND '{backend}' (expected 'torch' or 'onnx')")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME), MODEL_NAME
+
 
 def get_model():
-    global _model
+    global _model, _model_key
     if _model is None:
-        try:
-            from sentence_transformers import SentenceTransformer
-            _model = SentenceTransformer("all-MiniLM-L6-v2")
-            print("✅ Loaded sentence-transformers model: all-MiniLM-L6-v2")
-        except Exception as e:
-            print(f"⚠️  Could not load sentence-transformers: {e}. Using fallback similarity.")
-            _model = "FALLBACK"
+        with _model_lock:
+            if _model is None:
+                try:
+                    encoder, key = _load_backend(EMBED_BACKEND)
+                    print(f"✅ Loaded {EMBED_BACKEND} embedding backend: {key}")
+                    _model, _model_key = encoder, key
+                except Exception as e:
+                    print(f"⚠️  Could not load {EMBED_BACKEND} embedding backend: {e}. Using fallback similarity.")
+                    _model = "FALLBACK"
     return _model
 
 
+def loaded_model_key() -> Optional[str]:
+    """Store/cache key of this process's encoder (model + backend); None in fallback."""
+    return None if get_model() == "FALLBACK" else _model_key
+
+
+def model_key() -> Optional[str]:
+    """Key of the encoder that serves embeddings (asks the pool if it owns the model)."""
+    if inference_pool.uses_processes:
+        return inference_pool.model_key()
+    return loaded_model_key()
+
+
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """Pure-python cosine similarity (fallback)."""
     dot = sum(a * b for a, b in zip(vec1, vec2))
@@ -36,80 +97,127 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     return dot / (mag1 * mag2)
 
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
-    """Generate embeddings; fall back to keyword-overlap if model unavailable."""
+def model_available() -> bool:
+    """True when real embeddings can be produced."""
+    return model_key() is not None
+
+
+def _encode_local(texts: List[str], batch_size: int = 32) -> Optional[np.ndarray]:
+    """Normalized float32 embeddings from this process's model; None in fallback."""
     model = get_model()
     if model == "FALLBACK":
-        return _fallback_embeddings(texts)
+        return None
     try:
-        embeddings = model.encode(texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        return model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                            normalize_embeddings=True).astype(np.float32)
     except Exception:
-        return _fallback_embeddings(texts)
+        return None
 
 
-def _fallback_embeddings(texts: List[str]) -> List[List[float]]:
+_batcher = MicroBatcher(lambda texts: inference_pool.submit(_encode_local, texts, EMBED_MAX_BATCH))
+
+
+def _encode(texts: List[str], batch_size: int = 32) -> Optional[np.ndarray]:
     """
-    Simple TF-based bag-of-words vector when sentence-transformers unavailable.
-    Returns 300-dim sparse vector.
+    Run an encode on the inference pool (inline when already on a worker).
+    Small requests are merged with concurrent callers' by the micro-batcher;
+    bulk requests are already large enough and go straight to the pool.
     """
-    vocab = {}
-    tokenized = []
-    for text in texts:
-        tokens = re.findall(r'\b\w+\b', text.lower())
-        tokenized.append(tokens)
-        for t in tokens:
-            if t not in vocab:
-                vocab[t] = len(vocab)
-
-    vecs = []
-    for tokens in tokenized:
-        vec = [0.0] * max(300, len(vocab))
-        for t in tokens:
-            if t in vocab:
-                vec[vocab[t]] += 1.0
-        # L2 normalize
-        norm = math.sqrt(sum(x * x for x in vec)) or 1.0
-        vecs.append([x / norm for x in vec])
-    return vecs
+    if EMBED_MICROBATCH and not inference_pool.in_worker() and len(texts) < _batcher.max_batch:
+        return _batcher.encode(texts)
+    return inference_pool.call(_encode_local, texts, batch_size)
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Generate embeddings; fall back to hashed TF-IDF if model unavailable."""
+    if model_available():
+        embeddings = _encode(texts)
+        if embeddings is not None:
+            return embeddings.tolist()
+    _fallbacks.inc(operation="embed")
+    return _fallback_embeddings(texts)
+
+
+def embed_cached(texts: List[str], batch_size: int = 32) -> Optional[np.ndarray]:
+    """
+    L2-normalized embeddings for `texts`, served from the embedding store
+    under the active encoder's key (model + backend). Only texts missing
+    from the store are encoded, in a single batch, and then persisted.
+    Returns None in fallback mode.
+    """
+    key = model_key()
+    if key is None:
+        return None
+    unique = list(dict.fromkeys(texts))
+    found = store.get_many(unique, key)
+    missing = [t for t in unique if t not in found]
+    _store_lookups.inc(len(found), result="hit")
+    _store_lookups.inc(len(missing), result="miss")
+    if missing:
+        encoded = _encode(missing, batch_size)
+        if encoded is None:
+            return None
+        store.put_many(missing, encoded, key)
+        found.update(zip(missing, encoded))
+    return np.stack([found[t] for t in texts])
+
+
+def warm_up(text: str = "Python developer with SQL, REST APIs and machine learning projects") -> int:
+    """
+    First encode after startup, bypassing the store so it always runs. In
+    process-pool mode one job per worker is queued so every worker warms.
+    Returns the number of warm-up encodes run.
+    """
+    if model_key() is None:
+        fallback_vectorizer.similarities([text], text)
+        return 0
+    jobs = inference_pool.workers if inference_pool.uses_processes else 1
+    for future in [inference_pool.submit(_encode_local, [text]) for _ in range(jobs)]:
+        future.result()
+    return jobs
+
+
+def precompute_embeddings(texts: List[str]) -> None:
+    """Fill the embedding store ahead of scoring (e.g. on resume upload)."""
+    texts = [t for t in texts if t and t.strip()]
+    if texts:
+        embed_cached(texts)
+
+
+def _fallback_embeddings(texts: List[str]) -> List[List[float]]:
+    """Hashed TF-IDF vectors (FALLBACK_DIM dims) when sentence-transformers is unavailable."""
+    return fallback_vectorizer.transform_dense(texts).tolist()
+
+
+def _fallback_similarities(texts: List[str], query: str) -> np.ndarray:
+    """Hashed TF-IDF cosine of every text against `query`, as one sparse mat-vec."""
+    return fallback_vectorizer.similarities(texts, query)
+
+
+def fit_fallback_idf(corpus: List[str]) -> None:
+    """Fit the fallback vectorizer's IDF on the resume and JD corpus."""
+    fallback_vectorizer.fit(corpus)
+    print(f"✅ Fitted fallback TF-IDF on {fallback_vectorizer.documents} documents "
+          f"({fallback_vectorizer.model_name})")
 
 
 def extract_skills_from_text(text: str) -> List[str]:
-    """Extract skill keywords from resume or JD text."""
-    # Tech skills dictionary for matching
-    KNOWN_SKILLS = {
-        "python", "java", "javascript", "typescript", "golang", "go", "c++", "c#",
-        "react", "vue", "angular", "next.js", "node.js", "express", "django", "flask",
-        "fastapi", "spring", "spring boot", "hibernate", "laravel", "php",
-        "sql", "mysql", "postgresql", "mongodb", "redis", "elasticsearch", "kafka",
-        "docker", "kubernetes", "aws", "azure", "gcp", "terraform", "jenkins", "ci/cd",
-        "machine learning", "deep learning", "nlp", "computer vision", "pytorch", "tensorflow",
-        "pandas", "numpy", "scikit-learn", "transformers", "hugging face",
-        "rest api", "graphql", "grpc", "microservices", "system design",
-        "data structures", "algorithms", "oop", "devops", "agile", "scrum",
-        "power bi", "tableau", "data analysis", "statistics",
-        "android", "kotlin", "ios", "swift", "react native", "flutter",
-        "cybersecurity", "ethical hacking", "network security",
-        "html", "css", "bootstrap", "tailwind",
-        "git", "linux", "bash", "shell scripting",
-        "socket.io", "websocket", "redis", "celery",
-        "embedded c", "rtos", "arduino", "raspberry pi", "iot", "vlsi", "verilog", "matlab",
-    }
-    text_lower = text.lower()
-    found = []
-    for skill in KNOWN_SKILLS:
-        if skill in text_lower:
-            found.append(skill.title())
-    return list(set(found))
+    """Extract canonical skill names from resume or JD text (see skill_taxonomy.json)."""
+    return skill_matcher.extract(text)
+
+
+def extract_skills_batch(texts: List[str]) -> List[List[str]]:
+    """Row-aligned extract_skills_from_text() for bulk ingestion."""
+    return skill_matcher.extract_batch(texts)
 
 
 def compute_semantic_similarity(text1: str, text2: str) -> float:
     """Compute semantic cosine similarity between two texts."""
-    embeddings = embed_texts([text1, text2])
-    # Ensure same dimension for fallback
-    v1, v2 = embeddings[0], embeddings[1]
-    min_len = min(len(v1), len(v2))
-    return cosine_similarity(v1[:min_len], v2[:min_len])
+    cached = embed_cached([text1, text2])
+    if cached is not None:
+        return float(np.dot(cached[0], cached[1]))
+    _fallbacks.inc(operation="similarity")
+    return float(_fallback_similarities([text1], text2)[0])
 
 
 def compute_project_relevance(projects: List[str], jd_text: str) -> float:
@@ -117,10 +225,12 @@ def compute_project_relevance(projects: List[str], jd_text: str) -> float:
     if not projects:
         return 0.3  # some base score if no projects listed
     project_text = " ".join(projects)
-    sim = compute_semantic_similarity(project_text, jd_text)
+    return _project_relevance_from_sim(compute_semantic_similarity(project_text, jd_text))
+
+
+def _project_relevance_from_sim(sim: float) -> float:
     # Scale: 0.3–1.0 → normalize to 0–100
-    normalized = min(1.0, max(0.0, (sim - 0.1) / 0.7))
-    return normalized
+    return min(1.0, max(0.0, (sim - 0.1) / 0.7))
 
 
 def compute_completeness_score(student: Dict) -> float:
@@ -148,20 +258,139 @@ def compute_completeness_score(student: Dict) -> float:
     return score / 100.0
 
 
+def resume_text_for(student: Dict) -> str:
+    """Text embedded for a student: the resume, else skills and projects."""
+    return student.get("resume_text") or " ".join(student.get("skills", []) + student.get("projects", []))
+
+
+def jd_text_for(drive: Dict) -> str:
+    """Text embedded for a drive: the JD, else its required skills."""
+    return drive.get("jd_text") or " ".join(drive.get("required_skills", []))
+
+
+def _crs_inputs(student: Dict, drive: Dict) -> Tuple[str, str, str]:
+    """Texts compared by the matcher: (resume, projects, JD)."""
+    return resume_text_for(student), " ".join(student.get("projects", [])), jd_text_for(drive)
+
+
 def compute_crs(student: Dict, drive: Dict) -> Dict:
     """
     Compute Career Readiness Score (CRS).
 
     CRS = (Semantic Skill Match × 0.5) + (Project Relevance × 0.3) + (Resume Completeness × 0.2)
     All components normalized to 0–100. Final CRS is 0–100.
+    Results are memoized in the CRS cache (see crs_cache.py).
+    """
+    scorer = _scorer()
+    key = fingerprint(student, drive, scorer)
+    cached = crs_cache.get_many([key], scorer)
+    if cached:
+        return cached[key]
+    result, exact = _compute_crs(student, drive)
+    if exact:
+        crs_cache.put_many({key: result}, scorer)
+    return result
+
+
+def _exact(vecs: Optional[np.ndarray]) -> bool:
     """
+    False when the model is loaded but its encode failed and the fallback
+    scored instead: the result doesn't belong under the model's scorer key.
+    """
+    return vecs is not None or model_key() is None
+
+
+def _compute_crs(student: Dict, drive: Dict) -> Tuple[Dict, bool]:
+    """CRS for one pair, plus whether it came from the scorer _scorer() names (see _exact)."""
+    student_resume, project_text, jd_text = _crs_inputs(student, drive)
+
+    # Fetch all three vectors in one go so a cold application costs at most one encode call.
+    with span("embed"):
+        vecs = embed_cached([student_resume, jd_text] + ([project_text] if project_text else []))
+
+    with span("similarity"):
+        if vecs is not None:
+            skill_sim = float(np.dot(vecs[0], vecs[1]))
+            # Same base score as compute_project_relevance when there are no projects.
+            project_relevance = _project_relevance_from_sim(float(np.dot(vecs[2], vecs[1]))) if project_text else 0.3
+        else:
+            skill_sim = compute_semantic_similarity(student_resume, jd_text)
+            project_relevance = compute_project_relevance(student.get("projects", []), jd_text)
+    with span("skill_match"):
+        return _assemble_crs(student, drive, skill_sim, project_relevance), _exact(vecs)
+
+
+def compute_crs_batch(students: List[Dict], drive: Dict, batch_size: int = 256) -> List[Dict]:
+    """
+    Score many students against one drive in a single vectorized pass.
+
+    Resumes and project texts are embedded together (store misses go through
+    one batched encode) and every cosine similarity comes out of one
+    matrix-vector product against the JD vector. Results are row-aligned
+    with `students` and identical to calling compute_crs per student; only
+    students missing from the CRS cache are scored.
+    """
+    if not students:
+        return []
+    scorer = _scorer()
+    keys = [fingerprint(s, drive, scorer) for s in students]
+    found = crs_cache.get_many(keys, scorer)
+    todo = [i for i, key in enumerate(keys) if key not in found]
+    if todo:
+        scored, exact = _score_batch([students[i] for i in todo], drive, batch_size)
+        fresh = {keys[i]: crs for i, crs in zip(todo, scored)}
+        if exact:
+            crs_cache.put_many(fresh, scorer)
+        found.update(fresh)
+    # Identical profiles share a key; hand each row its own copy.
+    results, seen = [], set()
+    for key in keys:
+        results.append(copy.deepcopy(found[key]) if key in seen else found[key])
+        seen.add(key)
+    return results
+
+
+def warm_crs_cache(students: List[Dict], drive: Dict) -> Dict:
+    """Score whichever of `students` aren't cached for `drive` yet."""
+    scorer = _scorer()
+    already = crs_cache.contains([fingerprint(s, drive, scorer) for s in students], scorer)
+    compute_crs_batch(students, drive)
+    return {"students": len(students), "already_cached": already, "computed": len(students) - already}
+
+
+def _scorer() -> str:
+    return scorer_identity(SCORER_VERSION, CRS_WEIGHTS, model_key() or fallback_vectorizer.model_name)
+
+
+def _score_batch(students: List[Dict], drive: Dict, batch_size: int) -> Tuple[List[Dict], bool]:
+    inputs = [_crs_inputs(s, drive) for s in students]
+    jd_text = inputs[0][2]
+    resumes = [r for r, _, _ in inputs]
+    project_rows = [i for i, (_, p, _) in enumerate(inputs) if p]
+    project_texts = [inputs[i][1] for i in project_rows]
+
+    texts = resumes + project_texts
+    vecs = embed_cached(texts + [jd_text], batch_size=batch_size)
+    if vecs is not None:
+        sims = vecs[:-1] @ vecs[-1]
+    else:
+        _fallbacks.inc(operation="batch_similarity")
+        sims = _fallback_similarities(texts, jd_text)
+
+    skill_sims = sims[:len(resumes)]
+    project_relevance = [0.3] * len(students)  # same base score as compute_project_relevance
+    for row, sim in zip(project_rows, sims[len(resumes):]):
+        project_relevance[row] = _project_relevance_from_sim(float(sim))
+
+    return [_assemble_crs(s, drive, float(skill_sims[i]), project_relevance[i])
+            for i, s in enumerate(students)], _exact(vecs)
+
+
+def _assemble_crs(student: Dict, drive: Dict, skill_sim: float, project_relevance: float) -> Dict:
     student_skills = student.get("skills", [])
     drive_skills = drive.get("required_skills", [])
-    jd_text = drive.get("jd_text", " ".join(drive_skills))
-    student_resume = student.get("resume_text", " ".join(student_skills + student.get("projects", [])))
 
     # ── Component 1: Semantic Skill Match (50%) ───────────────────────────────
-    skill_sim = compute_semantic_similarity(student_resume, jd_text)
     semantic_score = min(100.0, skill_sim * 150)  # scale up for better discrimination
 
     # Identify matched and missing skills
@@ -176,7 +405,6 @@ def compute_crs(student: Dict, drive: Dict) -> Dict:
         semantic_score = max(semantic_score, direct_match_ratio * 100)
 
     # ── Component 2: Project Relevance (30%) ──────────────────────────────────
-    project_relevance = compute_project_relevance(student.get("projects", []), jd_text)
     project_score = project_relevance * 100
 
     # ── Component 3: Resume Completeness (20%) ────────────────────────────────
@@ -184,7 +412,8 @@ def compute_crs(student: Dict, drive: Dict) -> Dict:
     completeness_score = completeness * 100
 
     # ── Final CRS ─────────────────────────────────────────────────────────────
-    crs = (semantic_score * 0.5) + (project_score * 0.3) + (completeness_score * 0.2)
+    crs = (semantic_score * CRS_WEIGHTS["semantic"] + project_score * CRS_WEIGHTS["project"]
+           + completeness_score * CRS_WEIGHTS["completeness"])
     crs = round(min(100.0, max(0.0, crs)), 1)
 
     return {
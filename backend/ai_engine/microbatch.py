@@ -0,0 +1,109 @@
+"""
+Encode Micro-Batcher
+Concurrent /apply requests each need a couple of sentences encoded, which
+wastes most of the transformer's batched throughput. The batcher gathers
+encode requests from concurrent callers for up to EMBED_MAX_WAIT_MS (or
+until EMBED_MAX_BATCH texts are waiting), runs one encode, and hands each
+caller back its own rows.
+"""
+import os
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from ai_engine.metrics import registry
+
+EMBED_MICROBATCH = os.getenv("EMBED_MICROBATCH", "1") == "1"
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+_batch_fill = registry.histogram("pathfinder_embed_batch_fill_ratio",
+                                 "Texts per micro-batched encode as a fraction of EMBED_MAX_BATCH",
+                                 buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0))
+_batch_requests = registry.histogram("pathfinder_embed_batch_requests",
+                                     "Caller requests merged into one encode",
+                                     buckets=(1, 2, 4, 8, 16, 32, 64))
+_queue_wait = registry.histogram("pathfinder_embed_queue_wait_seconds",
+                                 "Time an encode request waited before its batch was dispatched",
+                                 buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0))
+
+
+class MicroBatcher:
+    """
+    `submit_batch(texts)` must return a Future resolving to an (n, dim) array
+    (or None in fallback mode). One collector thread forms the batches;
+    dispatch is asynchronous, so several batches can be encoding at once
+    when the underlying executor has more than one worker.
+    """
+
+    def __init__(self, submit_batch: Callable[[List[str]], Future],
+                 max_batch: int = EMBED_MAX_BATCH, max_wait_ms: float = EMBED_MAX_WAIT_MS):
+        self.submit_batch = submit_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[List[str], Future, float]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def encode(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Encode `texts` as part of whatever batch is forming; blocks for the result."""
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((texts, future, time.monotonic()))
+        return future.result()
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            size = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                size += len(item[0])
+            self._dispatch(batch, size)
+
+    def _dispatch(self, batch: List[Tuple[List[str], Future, float]], size: int) -> None:
+        now = time.monotonic()
+        for _, _, enqueued in batch:
+            _queue_wait.observe(now - enqueued)
+        _batch_fill.observe(min(1.0, size / self.max_batch))
+        _batch_requests.observe(len(batch))
+
+        texts = [t for item_texts, _, _ in batch for t in item_texts]
+        try:
+            pending = self.submit_batch(texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        def _split(done: Future) -> None:
+            error = done.exception()
+            vectors = None if error else done.result()
+            offset = 0
+            for item_texts, future, _ in batch:
+                if error:
+                    future.set_exception(error)
+                else:
+                    future.set_result(None if vectors is None else vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+        pending.add_done_callback(_split)
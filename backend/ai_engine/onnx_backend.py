@@ -0,0 +1,109 @@
+"""
+ONNX Backend - all-MiniLM-L6-v2 on ONNX Runtime
+Selected with EMBED_BACKEND=onnx. The transformer is exported to ONNX once
+(into ONNX_MODEL_DIR) and, unless ONNX_QUANTIZE=0, dynamically quantized to
+int8 weights, which shrinks the model roughly 4x and speeds up CPU
+inference. Mean pooling and L2 normalization match sentence-transformers,
+so embeddings stay interchangeable within a small tolerance (checked by
+benchmarks/embedding_backends.py parity).
+
+ONNX_INTRA_OP_THREADS caps the threads one encode may use; keep
+INFERENCE_WORKERS × ONNX_INTRA_OP_THREADS at or below the core count.
+
+Export ahead of deployment (needs torch + transformers once):
+  python -m ai_engine.onnx_backend export
+"""
+import os
+import sys
+from typing import List
+
+import numpy as np
+
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./models")
+ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "1") == "1"
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "1"))
+ONNX_MAX_SEQ_LENGTH = int(os.getenv("ONNX_MAX_SEQ_LENGTH", "256"))  # sentence-transformers' limit for MiniLM
+
+_INPUTS = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+def _paths(model_name: str):
+    base = os.path.join(ONNX_MODEL_DIR, model_name)
+    return base + ".onnx", base + "-int8.onnx", base + "-tokenizer"
+
+
+def export(model_name: str, quantize: bool = ONNX_QUANTIZE) -> str:
+    """Export the Hugging Face model to ONNX (and int8); returns the model path."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    fp32_path, int8_path, tokenizer_dir = _paths(model_name)
+    os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+    hub_name = f"sentence-transformers/{model_name}"
+    tokenizer = AutoTokenizer.from_pretrained(hub_name)
+    model = AutoModel.from_pretrained(hub_name).eval()
+    sample = tokenizer(["PathFinder export sample"], return_tensors="pt")
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in _INPUTS + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(sample[name] for name in _INPUTS), fp32_path,
+                          input_names=_INPUTS, output_names=["last_hidden_state"],
+                          dynamic_axes=dynamic, opset_version=14)
+    tokenizer.save_pretrained(tokenizer_dir)
+    print(f"✅ Exported {hub_name} to {fp32_path}")
+    if not quantize:
+        return fp32_path
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✅ Quantized to int8: {int8_path}")
+    return int8_path
+
+
+class OnnxEncoder:
+    """Drop-in for SentenceTransformer.encode() backed by an ONNX Runtime session."""
+
+    def __init__(self, model_name: str, quantize: bool = ONNX_QUANTIZE, threads: int = ONNX_INTRA_OP_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        fp32_path, int8_path, tokenizer_dir = _paths(model_name)
+        path = int8_path if quantize else fp32_path
+        if not os.path.exists(path):
+            export(model_name, quantize)
+        self.variant = "onnx-int8" if quantize else "onnx"
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            tokenizer_dir if os.path.isdir(tokenizer_dir) else f"sentence-transformers/{model_name}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = True, **_) -> np.ndarray:
+        # Length-sorted batches keep padding low, as sentence-transformers does.
+        order = np.argsort([-len(t) for t in texts], kind="stable")
+        pooled = []
+        for start in range(0, len(texts), batch_size):
+            batch = [texts[i] for i in order[start:start + batch_size]]
+            tokens = self.tokenizer(batch, padding=True, truncation=True,
+                                    max_length=ONNX_MAX_SEQ_LENGTH, return_tensors="np")
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, feeds)[0]
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled.append((hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None))
+        if not pooled:
+            return np.zeros((0, 0), dtype=np.float32)
+        vectors = np.empty((len(texts), pooled[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.concatenate(pooled)
+        if normalize_embeddings:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["export"]:
+        sys.exit("usage: python -m ai_engine.onnx_backend export")
+    from ai_engine.matcher import MODEL_NAME
+    export(MODEL_NAME)
@@ -2,22 +2,34 @@
 Policy Gateway - Deterministic Rule Engine
 Filters candidates before any AI processing occurs.
 Hard rules: CGPA, backlogs, branch, package, location.
+Rules can also be compiled into array predicates and evaluated for a whole
+cohort × many drives at once (evaluate_policies).
 """
 from typing import Dict, Any, List
 
+import numpy as np
+
 
 def check_eligibility(student: Dict, drive: Dict) -> Dict[str, Any]:
     """
     Run all policy checks. Returns structured result with per-rule breakdown.
     If ANY rule fails → student is rejected. No AI runs.
     """
+    cgpa_pass = student.get("cgpa", 0) >= drive.get("min_cgpa", 0)
+    backlog_pass = student.get("active_backlogs", 0) <= drive.get("max_backlogs", 0)
+    eligible_branches = drive.get("eligible_branches", [])
+    branch_pass = not eligible_branches or student.get("branch", "") in eligible_branches
+    return _policy_result(student, drive, cgpa_pass, backlog_pass, branch_pass)
+
+
+def _policy_result(student: Dict, drive: Dict, cgpa_pass: bool, backlog_pass: bool,
+                   branch_pass: bool) -> Dict[str, Any]:
+    """Build the per-rule breakdown and reasoning for already-evaluated rules."""
     checks = []
-    overall_passed = True
 
     # ── Rule 1: CGPA ─────────────────────────────────────────────────────────
     cgpa_rule = drive.get("min_cgpa", 0)
     student_cgpa = student.get("cgpa", 0)
-    cgpa_pass = student_cgpa >= cgpa_rule
     checks.append({
         "rule": "Minimum CGPA",
         "required": cgpa_rule,
@@ -25,13 +37,10 @@ def check_eligibility(student: Dict, drive: Dict) -> Dict[str, Any]:
         "passed": cgpa_pass,
         "detail": f"CGPA {student_cgpa} {'≥' if cgpa_pass else '<'} required {cgpa_rule}"
     })
-    if not cgpa_pass:
-        overall_passed = False
 
     # ── Rule 2: Active Backlogs ───────────────────────────────────────────────
     max_backlogs = drive.get("max_backlogs", 0)
     student_backlogs = student.get("active_backlogs", 0)
-    backlog_pass = student_backlogs <= max_backlogs
     checks.append({
         "rule": "Active Backlogs",
         "required": f"≤ {max_backlogs}",
@@ -39,13 +48,10 @@ def check_eligibility(student: Dict, drive: Dict) -> Dict[str, Any]:
         "passed": backlog_pass,
         "detail": f"Student has {student_backlogs} backlog(s), max allowed is {max_backlogs}"
     })
-    if not backlog_pass:
-        overall_passed = False
 
     # ── Rule 3: Branch Eligibility ────────────────────────────────────────────
     eligible_branches = drive.get("eligible_branches", [])
     student_branch = student.get("branch", "")
-    branch_pass = not eligible_branches or student_branch in eligible_branches
     checks.append({
         "rule": "Branch Eligibility",
         "required": ", ".join(eligible_branches) if eligible_branches else "All",
@@ -53,10 +59,9 @@ def check_eligibility(student: Dict, drive: Dict) -> Dict[str, Any]:
         "passed": branch_pass,
         "detail": f"Branch '{student_branch}' {'is' if branch_pass else 'is NOT'} in eligible list"
     })
-    if not branch_pass:
-        overall_passed = False
 
     # ── Build reasoning text ──────────────────────────────────────────────────
+    overall_passed = cgpa_pass and backlog_pass and branch_pass
     failed_rules = [c for c in checks if not c["passed"]]
     if overall_passed:
         reasoning = f"Student '{student.get('name')}' passed all {len(checks)} policy checks. Proceeding to AI matching."
@@ -72,6 +77,68 @@ def check_eligibility(student: Dict, drive: Dict) -> Dict[str, Any]:
     }
 
 
+# ── Compiled engine: rules as predicates over columnar cohort arrays ─────────
+class Cohort:
+    """
+    Students as columns: cgpa (float32), active backlogs (int16) and branch
+    as categorical codes into `branches`. Missing CGPA is NaN, which fails
+    every minimum; missing backlogs count as zero.
+    """
+
+    def __init__(self, students: List[Dict]):
+        self.students = students
+        self.ids = [s.get("id") for s in students]
+        self.cgpa = np.array([np.nan if s.get("cgpa") is None else s["cgpa"] for s in students],
+                             dtype=np.float32)
+        self.backlogs = np.array([s.get("active_backlogs") or 0 for s in students], dtype=np.int16)
+        self.branches: Dict[str, int] = {}
+        self.branch_codes = np.array(
+            [self.branches.setdefault(s.get("branch") or "", len(self.branches)) for s in students],
+            dtype=np.int32,
+        )
+
+    def __len__(self) -> int:
+        return len(self.students)
+
+
+class PolicyMatrix:
+    """Per-rule boolean matrices (students × drives) from evaluate_policies."""
+
+    def __init__(self, cohort: Cohort, drives: List[Dict], cgpa_ok: np.ndarray,
+                 backlog_ok: np.ndarray, branch_ok: np.ndarray):
+        self.cohort = cohort
+        self.drives = drives
+        self.cgpa_ok = cgpa_ok
+        self.backlog_ok = backlog_ok
+        self.branch_ok = branch_ok
+        self.eligible = cgpa_ok & backlog_ok & branch_ok
+
+    def explain(self, i: int, j: int) -> Dict[str, Any]:
+        """Full check_eligibility-style breakdown for student i × drive j."""
+        return _policy_result(self.cohort.students[i], self.drives[j], bool(self.cgpa_ok[i, j]),
+                              bool(self.backlog_ok[i, j]), bool(self.branch_ok[i, j]))
+
+
+def evaluate_policies(cohort: Cohort, drives: List[Dict]) -> PolicyMatrix:
+    """
+    Evaluate every drive's rules against the whole cohort at once.
+    No per-pair strings are built; call PolicyMatrix.explain for the pairs
+    whose details are actually needed.
+    """
+    min_cgpa = np.array([d.get("min_cgpa") or 0 for d in drives], dtype=np.float32)
+    max_backlogs = np.array([d.get("max_backlogs") or 0 for d in drives], dtype=np.int16)
+    cgpa_ok = cohort.cgpa[:, None] >= min_cgpa[None, :]
+    backlog_ok = cohort.backlogs[:, None] <= max_backlogs[None, :]
+
+    branch_ok = np.ones((len(cohort), len(drives)), dtype=bool)
+    for j, d in enumerate(drives):
+        allowed = d.get("eligible_branches") or []
+        if allowed:
+            codes = [cohort.branches[b] for b in allowed if b in cohort.branches]
+            branch_ok[:, j] = np.isin(cohort.branch_codes, codes)
+    return PolicyMatrix(cohort, drives, cgpa_ok, backlog_ok, branch_ok)
+
+
 def extract_policy_summary(drive: Dict) -> List[str]:
     """Return human-readable list of rules for a drive."""
     rules = []
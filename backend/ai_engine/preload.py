@@ -0,0 +1,60 @@
+"""
+Pre-fork Preloading
+Shares the read-only serving state between gunicorn workers. With
+preload_app the master imports the app (which already builds the skill
+taxonomy automaton) and preload() then loads the embedding model and the
+saved ANN index matrices before forking, so every worker starts with them
+mapped copy-on-write instead of loading its own copy. gunicorn.conf.py
+disables the cyclic GC during this and freezes everything loaded into the
+permanent generation, so later collections in the workers don't write to
+(and un-share) those pages.
+
+preload() only loads: it starts no threads, opens no database or sqlite
+connections and runs no encode, because none of those survive a fork.
+init_worker() runs in each worker right after the fork: it caps the
+intra-op threads so N workers don't oversubscribe the CPU (N workers × all
+cores each), and drops any pooled DB connections inherited from the master.
+"""
+import os
+import sys
+from typing import Optional
+
+# Intra-op threads per worker; 0 = the host's cores divided between the workers.
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))
+
+
+def preload() -> Optional[str]:
+    """Load the encoder and saved ANN indexes in the master; returns the model key (None if skipped)."""
+    # HF tokenizers warn (and fall back to one thread) if their pool was used before a fork.
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    from ai_engine.matcher import EMBED_BACKEND, loaded_model_key
+    from ai_engine.inference_pool import inference_pool
+    from ai_engine.ann_index import load_indexes
+
+    if EMBED_BACKEND != "torch":
+        # ONNX Runtime sessions own native thread pools, which don't survive a fork.
+        print(f"ℹ️  Not preloading the {EMBED_BACKEND} backend; each worker loads its own")
+        return None
+    if inference_pool.workers > 0:
+        print("ℹ️  Not preloading the model: INFERENCE_WORKERS > 0 loads it in the pool processes")
+        return None
+    key = loaded_model_key()
+    if key is None:
+        return None
+    vectors = load_indexes(key)
+    print(f"📦 Preloaded {key} and {vectors} ANN vectors for the workers to share")
+    return key
+
+
+def init_worker(workers: int) -> int:
+    """Per-worker setup after fork; returns the intra-op thread count."""
+    threads = TORCH_THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // max(1, workers))
+    os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(threads)
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    if "database.models" in sys.modules:
+        models = sys.modules["database.models"]
+        # Leave the master's connections open for it; just forget them here.
+        models.engine.dispose(close=False)
+        models.async_engine.sync_engine.dispose(close=False)
+    return threads
@@ -0,0 +1,266 @@
+"""
+Incremental Re-scoring
+Keeps stored application scores in step with edits to their inputs. A
+session hook notices when a commit changes a scoring input of a Student
+(resume, skills, projects, ... and the policy fields) or a PlacementDrive
+(JD, required skills, eligibility rules) and queues its id; a background
+thread then re-runs the Policy Gateway and compute_crs_batch over just the
+applications of those students and drives, grouped per drive. Unchanged
+texts hit the embedding store, so a rescore costs one batched encode of
+whatever actually changed.
+
+An application whose result changes gets its score_version bumped and a
+RESCORED audit entry, in one transaction per drive. Shortlisted
+applications are re-scored but keep their status (that's a TPO decision).
+Writes that bypass the ORM (bulk import) call rescorer.enqueue() directly.
+RESCORE_ON_CHANGE=0 turns the hook off.
+"""
+import os
+import time
+import datetime
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from database.models import Application, PlacementDrive, SessionLocal, Student
+from database import analytics
+from ai_engine.metrics import registry
+from ai_engine.crs_cache import STUDENT_FIELDS, DRIVE_FIELDS
+from ai_engine.policy_gateway import Cohort, evaluate_policies
+from ai_engine.matcher import compute_crs_batch
+from ai_engine.audit_logger import build_log_entry, create_logs_bulk
+
+RESCORE_ON_CHANGE = os.getenv("RESCORE_ON_CHANGE", "1") == "1"
+RESCORE_DELAY_MS = int(os.getenv("RESCORE_DELAY_MS", "500"))  # coalesce bursts of edits
+RESCORE_CHUNK = int(os.getenv("RESCORE_CHUNK", "500"))
+
+# Everything check_eligibility or compute_crs reads.
+TRACKED_STUDENT_FIELDS = STUDENT_FIELDS + ("cgpa", "active_backlogs", "branch")
+TRACKED_DRIVE_FIELDS = DRIVE_FIELDS + ("min_cgpa", "max_backlogs", "eligible_branches")
+
+_SCORE_FIELDS = ("crs_score", "semantic_score", "project_score", "completeness_score")
+
+_applications = registry.counter("pathfinder_rescore_applications_total",
+                                 "Applications re-scored after a profile or drive change, by outcome", ["result"])
+_batch_seconds = registry.histogram("pathfinder_rescore_batch_seconds", "Duration of one re-scoring batch")
+_pending = registry.gauge("pathfinder_rescore_pending", "Students and drives waiting to be re-scored")
+
+
+def _profile(s: Student) -> Dict:
+    return {"id": s.id, "name": s.name, "branch": s.branch, "cgpa": s.cgpa,
+            "active_backlogs": s.active_backlogs, "resume_text": s.resume_text, "phone": s.phone,
+            "skills": s.skills or [], "projects": s.projects or [], "certifications": s.certifications or []}
+
+
+def _drive(d: PlacementDrive) -> Dict:
+    return {"id": d.id, "jd_text": d.jd_text, "required_skills": d.required_skills or [],
+            "min_cgpa": d.min_cgpa, "max_backlogs": d.max_backlogs,
+            "eligible_branches": d.eligible_branches or []}
+
+
+def _chunks(ids: List[str], size: int = RESCORE_CHUNK) -> Iterable[List[str]]:
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+class Rescorer:
+    """Debounced queue of changed students/drives, drained by one background thread."""
+
+    def __init__(self, delay_ms: int = RESCORE_DELAY_MS):
+        self.delay = delay_ms / 1000.0
+        self._students: Set[str] = set()
+        self._drives: Set[str] = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.last_batch: Optional[Dict] = None
+        _pending.set_function(self.pending)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="rescorer", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Stop the worker after re-scoring everything already queued."""
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self._drain()
+
+    def enqueue(self, students: Iterable[str] = (), drives: Iterable[str] = ()) -> None:
+        with self._lock:
+            self._students.update(students)
+            self._drives.update(drives)
+            if self._students or self._drives:
+                self._idle.clear()
+                self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._students) + len(self._drives)
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until the queue is empty and no batch is running."""
+        return self._idle.wait(timeout)
+
+    def stats(self) -> Dict:
+        return {"running": self._thread is not None, "pending": self.pending(), "batches": self.batches,
+                "rescored": self.changed, "unchanged": self.unchanged, "last_batch": self.last_batch}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            if self._stop.is_set():
+                break
+            time.sleep(self.delay)  # let a burst of edits (e.g. an import) land in one batch
+            self._wake.clear()
+            try:
+                self._drain()
+            except Exception as e:
+                print(f"⚠️  Re-scoring batch failed: {e}")
+
+    def _drain(self) -> None:
+        with self._lock:
+            students, drives = sorted(self._students), sorted(self._drives)
+            self._students.clear()
+            self._drives.clear()
+        try:
+            if students or drives:
+                self.rescore(students, drives)
+        finally:
+            with self._lock:
+                if not (self._students or self._drives):
+                    self._idle.set()
+
+    def rescore(self, student_ids: List[str], drive_ids: List[str]) -> Dict:
+        """Re-score every application of the given students and drives now."""
+        started = time.perf_counter()
+        changed_students, changed_drives = set(student_ids), set(drive_ids)
+        with SessionLocal() as db:
+            apps: Dict[str, Application] = {}
+            for ids, column in ((student_ids, Application.student_id), (drive_ids, Application.drive_id)):
+                for chunk in _chunks(ids):
+                    apps.update((a.id, a) for a in db.execute(select(Application).where(column.in_(chunk))).scalars())
+            by_drive: Dict[str, List[Application]] = {}
+            for a in apps.values():
+                by_drive.setdefault(a.drive_id, []).append(a)
+
+            changed = unchanged = 0
+            for drive_id, rows in sorted(by_drive.items()):
+                drive = db.get(PlacementDrive, drive_id)
+                if drive is None:
+                    continue
+                students = {s.id: s for chunk in _chunks(sorted({a.student_id for a in rows}))
+                            for s in db.execute(select(Student).where(Student.id.in_(chunk))).scalars()}
+                rows = [a for a in rows if a.student_id in students]
+                cause = {a.id: " and ".join(c for c, hit in (("profile", a.student_id in changed_students),
+                                                            ("drive", drive_id in changed_drives)) if hit)
+                         for a in rows}
+                n = self._rescore_drive(db, _drive(drive), rows,
+                                        [_profile(students[a.student_id]) for a in rows], cause)
+                changed += n
+                unchanged += len(rows) - n
+
+        _applications.inc(changed, result="changed")
+        _applications.inc(unchanged, result="unchanged")
+        elapsed = time.perf_counter() - started
+        _batch_seconds.observe(elapsed)
+        self.batches += 1
+        self.changed += changed
+        self.unchanged += unchanged
+        self.last_batch = {"students": len(student_ids), "drives": len(drive_ids), "applications": len(apps),
+                           "rescored": changed, "unchanged": unchanged, "duration_ms": round(elapsed * 1000, 1),
+                           "finished_at": datetime.datetime.utcnow().isoformat()}
+        return self.last_batch
+
+    @staticmethod
+    def _rescore_drive(db: Session, drive: Dict, apps: List[Application], profiles: List[Dict],
+                       cause: Dict[str, str]) -> int:
+        matrix = evaluate_policies(Cohort(profiles), [drive])
+        passed = [i for i in range(len(apps)) if matrix.eligible[i, 0]]
+        scores = dict(zip(passed, compute_crs_batch([profiles[i] for i in passed], drive)))
+
+        log_rows, written = [], 0
+        for i, app in enumerate(apps):
+            policy = matrix.explain(i, 0)
+            crs = scores.get(i)
+            values = {"policy_passed": policy["passed"], "policy_details": policy,
+                      **{f: crs[f] if crs else None for f in _SCORE_FIELDS},
+                      "matched_skills": crs["matched_skills"] if crs else [],
+                      "missing_skills": crs["missing_skills"] if crs else []}
+            if app.status != "shortlisted":
+                values["status"] = "eligible" if crs else "rejected"
+            if all(getattr(app, k) == v for k, v in values.items()):
+                continue
+            version = (app.score_version or 1) + 1
+            # Guard on the version read above so a concurrent rescore of the
+            # same row (another worker process) doesn't apply twice.
+            result = db.execute(update(Application)
+                                .where(Application.id == app.id, Application.score_version == app.score_version)
+                                .values(**values, score_version=version, updated_at=datetime.datetime.utcnow())
+                                .execution_options(synchronize_session=False))
+            if result.rowcount == 0:
+                continue
+            analytics.record_rescore(db, app.drive_id, app.status, values.get("status", app.status),
+                                     app.crs_score, values["crs_score"])
+            before = f"{app.crs_score:.1f}" if app.crs_score is not None else "none"
+            after = f"{crs['crs_score']:.1f}" if crs else "none"
+            reasoning = f"Re-scored (v{version}) after {cause[app.id]} change: CRS {before} → {after}."
+            if not crs:
+                reasoning += f" {policy['reasoning']}"
+            log_rows.append(build_log_entry(app.student_id, app.drive_id, "RESCORED",
+                                            "PASSED" if crs else "FAILED", policy,
+                                            ai_score=crs["crs_score"] if crs else None,
+                                            missing_skills=values["missing_skills"],
+                                            final_decision=values.get("status", app.status).upper(),
+                                            reasoning=reasoning))
+            written += 1
+        create_logs_bulk(db, log_rows)
+        db.commit()
+        return written
+
+
+rescorer = Rescorer()
+
+
+# ── Change tracking ───────────────────────────────────────────────────────────
+def _changed(obj, fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+@event.listens_for(Session, "before_flush")
+def _track_changes(session: Session, flush_context, instances) -> None:
+    if not RESCORE_ON_CHANGE:
+        return
+    for obj in session.dirty:
+        if isinstance(obj, Student) and _changed(obj, TRACKED_STUDENT_FIELDS):
+            session.info.setdefault("rescore_students", set()).add(obj.id)
+        elif isinstance(obj, PlacementDrive) and _changed(obj, TRACKED_DRIVE_FIELDS):
+            session.info.setdefault("rescore_drives", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_changes(session: Session) -> None:
+    students = session.info.pop("rescore_students", None)
+    drives = session.info.pop("rescore_drives", None)
+    if students or drives:
+        rescorer.enqueue(students or (), drives or ())
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop("rescore_students", None)
+    session.info.pop("rescore_drives", None)
@@ -0,0 +1,107 @@
+"""
+Response Cache
+Serialized JSON bodies for the read-heavy list/detail endpoints (/students,
+/drives, /drives/{id}, ...), keyed by namespace plus the request's path and
+query parameters. Writers call invalidate(namespace), which swaps the
+namespace's generation token, so every cached body built before the write
+is ignored from then on.
+
+ETags are a hash of the body itself, so they're identical across workers
+and restarts and a client's If-None-Match keeps producing 304s until the
+content really changes. Generations are per process: another worker's
+write is picked up once an entry is older than RESPONSE_CACHE_TTL seconds.
+RESPONSE_CACHE=0 disables caching (ETags are still sent).
+"""
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from ai_engine.metrics import registry
+
+RESPONSE_CACHE = os.getenv("RESPONSE_CACHE", "1") == "1"
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "10"))
+
+_requests = registry.counter("pathfinder_response_cache_requests_total",
+                             "Cached endpoint responses by namespace and outcome", ["namespace", "result"])
+
+
+@dataclass
+class CachedBody:
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    token: str = ""
+    built_at: float = 0.0
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True if an If-None-Match header names this body's ETag."""
+        if not if_none_match:
+            return False
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or any(t.removeprefix("W/") == self.etag for t in tags)
+
+
+def build_body(payload: Any, headers: Optional[Dict[str, str]] = None) -> CachedBody:
+    body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return CachedBody(body, f'"{hashlib.sha1(body).hexdigest()[:20]}"', headers or {})
+
+
+class ResponseCache:
+    def __init__(self, size: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL,
+                 enabled: bool = RESPONSE_CACHE):
+        self.size = size
+        self.ttl = ttl
+        self.enabled = enabled
+        self._tokens: Dict[str, str] = {}
+        self._entries: "OrderedDict[Tuple[str, Hashable], CachedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _token(self, namespace: str) -> str:
+        return self._tokens.setdefault(namespace, uuid.uuid4().hex)
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Drop every cached body in `namespaces` (call after the write commits)."""
+        with self._lock:
+            for namespace in namespaces:
+                self._tokens[namespace] = uuid.uuid4().hex
+
+    async def get_or_build(self, namespace: str, key: Hashable,
+                           loader: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]) -> CachedBody:
+        """The cached body for (namespace, key), or build one from `await loader()`."""
+        with self._lock:
+            token = self._token(namespace)
+            entry = self._entries.get((namespace, key))
+            if (entry is not None and self.enabled and entry.token == token
+                    and time.monotonic() - entry.built_at < self.ttl):
+                self._entries.move_to_end((namespace, key))
+                _requests.inc(namespace=namespace, result="hit")
+                return entry
+        payload, headers = await loader()
+        entry = build_body(payload, headers)
+        entry.token, entry.built_at = token, time.monotonic()
+        _requests.inc(namespace=namespace, result="miss")
+        if self.enabled:
+            with self._lock:
+                self._entries[(namespace, key)] = entry
+                self._entries.move_to_end((namespace, key))
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def not_modified(self, namespace: str) -> None:
+        _requests.inc(namespace=namespace, result="not_modified")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"enabled": self.enabled, "entries": len(self._entries), "size": self.size,
+                    "ttl_s": self.ttl, "namespaces": sorted(self._tokens)}
+
+
+response_cache = ResponseCache()
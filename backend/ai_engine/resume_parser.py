@@ -0,0 +1,21 @@
+"""
+Resume Parser
+Turns an uploaded resume file into plain text. PDFs go through pdfminer;
+anything else (or a PDF pdfminer can't read) is decoded as UTF-8.
+Runs on the inference pool because pdfminer is pure-Python and CPU-bound.
+"""
+import io
+
+
+def extract_resume_text(content: bytes, filename: str = "") -> str:
+    """Extract text from a resume upload."""
+    if filename.lower().endswith(".pdf"):
+        try:
+            from pdfminer.high_level import extract_text_to_fp
+            from pdfminer.layout import LAParams
+            out = io.StringIO()
+            extract_text_to_fp(io.BytesIO(content), out, laparams=LAParams())
+            return out.getvalue()
+        except Exception:
+            pass
+    return content.decode("utf-8", errors="ignore")
@@ -0,0 +1,124 @@
+"""
+Skill Extractor - Aho-Corasick matcher over a data-driven skill taxonomy
+The taxonomy (skill_taxonomy.json, or SKILL_TAXONOMY_PATH) maps canonical
+skill names to aliases. It is compiled once at import into a single
+automaton, so a whole document is scanned in one linear pass instead of
+one substring search per known skill.
+
+Matching rules:
+  - aliases match case-insensitively; cased_aliases must match exactly
+  - an alias edge that is a letter/digit must sit on a word boundary,
+    so "java" does not fire inside "javascript" nor "go" inside "good"
+  - results are canonical names, in order of first appearance
+"""
+import os
+import json
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH", os.path.join(os.path.dirname(__file__), "skill_taxonomy.json")
+)
+
+# (pattern length, canonical name, exact cased form or None)
+_Output = Tuple[int, str, Optional[str]]
+
+
+def load_taxonomy(path: str = SKILL_TAXONOMY_PATH) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _lower_same_length(text: str) -> str:
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. "İ") expand when lower-cased; keep offsets aligned.
+    return "".join(ch.lower()[:1] or ch for ch in text)
+
+
+class SkillMatcher:
+    """Compiled automaton for one taxonomy."""
+
+    def __init__(self, taxonomy: Dict):
+        self.version = taxonomy.get("version")
+        self.skills = [entry["name"] for entry in taxonomy["skills"]]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[_Output]] = [[]]
+        for entry in taxonomy["skills"]:
+            for alias in entry.get("aliases", []):
+                self._add(alias.lower(), entry["name"], None)
+            for cased in entry.get("cased_aliases", []):
+                self._add(cased.lower(), entry["name"], cased)
+        self._link()
+
+    def _add(self, pattern: str, name: str, cased: Optional[str]) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), name, cased))
+
+    def _link(self) -> None:
+        """
+        Breadth-first failure links; outputs inherit their suffix states'.
+        Failure transitions are then folded into each state's goto table
+        (a DFA), so the scan does one dict lookup per character.
+        """
+        order = []
+        todo = deque(self._goto[0].values())
+        while todo:
+            state = todo.popleft()
+            order.append(state)
+            for ch, nxt in self._goto[state].items():
+                todo.append(nxt)
+                if state:
+                    fail = self._fail[state]
+                    while fail and ch not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        # BFS order guarantees a state's failure target is already complete.
+        for state in order:
+            inherited = self._goto[self._fail[state]]
+            self._goto[state] = {**inherited, **self._goto[state]}
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical skills mentioned in `text`, in order of first appearance."""
+        if not text:
+            return []
+        lowered = _lower_same_length(text)
+        goto, out = self._goto, self._out
+        n = len(text)
+        found: Dict[str, None] = {}
+        state = 0
+        for end, ch in enumerate(lowered):
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for length, name, cased in out[state]:
+                if name in found:
+                    continue
+                start = end - length + 1
+                if cased is not None and text[start:end + 1] != cased:
+                    continue
+                if lowered[start].isalnum() and start > 0 and lowered[start - 1].isalnum():
+                    continue
+                if lowered[end].isalnum() and end + 1 < n and lowered[end + 1].isalnum():
+                    continue
+                found[name] = None
+        return list(found)
+
+    def extract_batch(self, texts: List[str]) -> List[List[str]]:
+        """Row-aligned extract() over many documents (bulk resume ingestion)."""
+        return [self.extract(t) for t in texts]
+
+
+skill_matcher = SkillMatcher(load_taxonomy())
@@ -0,0 +1,101 @@
+"""
+Request Tracing
+Per-stage latency spans for the scoring pipeline and per-request counters,
+exported through the metrics registry (/metrics).
+
+span("policy") times a block into pathfinder_pipeline_stage_seconds{stage}.
+Inside an HTTP request (TracingMiddleware) the same timings are also kept
+on the request's Trace, so /apply can store them in its audit entry, and
+every SQL statement the request runs is counted through a SQLAlchemy
+cursor event. Sync routes run in the threadpool with a copy of the
+request's context, so spans and queries there land on the same Trace.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ai_engine.metrics import registry
+
+_stage_seconds = registry.histogram("pathfinder_pipeline_stage_seconds",
+                                    "Latency of each scoring pipeline stage", ["stage"])
+_request_seconds = registry.histogram("pathfinder_http_request_seconds",
+                                      "HTTP request latency by route template", ["method", "route", "status"])
+_request_queries = registry.histogram("pathfinder_db_queries_per_request",
+                                      "SQL statements executed per HTTP request", ["route"],
+                                      buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250))
+
+
+@dataclass
+class Trace:
+    stages: Dict[str, float] = field(default_factory=dict)
+    queries: int = 0
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("pathfinder_trace", default=None)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as pipeline stage `stage`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _stage_seconds.observe(elapsed, stage=stage)
+        trace = _current.get()
+        if trace is not None:
+            trace.stages[stage] = trace.stages.get(stage, 0.0) + elapsed
+
+
+def stage_timings() -> Optional[Dict]:
+    """The current request's stage timings in ms (plus its query count so far); None outside a request."""
+    trace = _current.get()
+    if trace is None:
+        return None
+    timings = {stage: round(seconds * 1000, 3) for stage, seconds in trace.stages.items()}
+    timings["db_queries"] = trace.queries
+    return timings
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    trace = _current.get()
+    if trace is not None:
+        trace.queries += 1
+
+
+class TracingMiddleware:
+    """ASGI middleware giving each HTTP request a Trace and recording its latency and query count."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace = Trace()
+        token = _current.set(trace)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            # Label by route template (/drives/{drive_id}), not raw path, to bound cardinality.
+            route = getattr(scope.get("route"), "path", "unmatched")
+            _request_seconds.observe(time.perf_counter() - started, method=scope["method"], route=route,
+                                     status=status[0])
+            _request_queries.observe(trace.queries, route=route)
@@ -0,0 +1,83 @@
+"""
+Startup Warm-up
+Runs the slow parts of startup — loading the embedding model, a warm-up
+encode, fitting the fallback IDF and syncing the ANN indexes — on a
+background thread, so the server accepts connections immediately and the
+first applicant after a deploy doesn't pay for the model load.
+
+Every stage's status and duration is reported by /readyz and exported as
+pathfinder_startup_stage_seconds, which makes cold-start time measurable.
+A worker only reports ready once its required stages are done, so a load
+balancer can keep traffic on warm workers. WARMUP_ON_STARTUP=0 restores
+lazy loading.
+"""
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ai_engine.metrics import registry
+
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+
+_stage_seconds = registry.gauge("pathfinder_startup_stage_seconds", "Duration of each startup warm-up stage",
+                                ["stage"])
+_ready_gauge = registry.gauge("pathfinder_startup_ready", "1 once the required warm-up stages have finished")
+
+
+class Warmup:
+    def __init__(self):
+        self.stages: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.required: List[str] = []
+        self.started_at: Optional[float] = None
+        self.ready_after: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        _ready_gauge.set_function(lambda: 1.0 if self.ready() else 0.0)
+
+    def start(self, stages: List[Tuple[str, Callable[[], Any]]], required: List[str]) -> None:
+        """Run `stages` in order on a background thread; `required` gate ready()."""
+        self.started_at = time.monotonic()
+        self.required = required
+        for name, _ in stages:
+            self.stages[name] = {"status": "pending"}
+        self._thread = threading.Thread(target=self._run, args=(stages,), name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self, stages: List[Tuple[str, Callable[[], Any]]]) -> None:
+        for name, fn in stages:
+            with self._lock:
+                self.stages[name]["status"] = "running"
+            started = time.monotonic()
+            try:
+                detail = fn()
+                outcome = {"status": "done"}
+                if detail is not None:
+                    outcome["detail"] = detail
+            except Exception as e:
+                print(f"⚠️  Warm-up stage '{name}' failed: {e}")
+                outcome = {"status": "failed", "error": str(e)}
+            elapsed = time.monotonic() - started
+            _stage_seconds.set(round(elapsed, 3), stage=name)
+            with self._lock:
+                self.stages[name] = {**outcome, "seconds": round(elapsed, 3)}
+                if self.ready_after is None and self.ready():
+                    self.ready_after = time.monotonic() - self.started_at
+                    print(f"✅ Warm-up complete in {self.ready_after:.1f}s")
+
+    def ready(self) -> bool:
+        """True when every required stage is done (or warm-up was never started)."""
+        if self.started_at is None:
+            return True
+        return all(self.stages.get(name, {}).get("status") == "done" for name in self.required)
+
+    def report(self) -> Dict:
+        with self._lock:
+            stages = {name: dict(info) for name, info in self.stages.items()}
+        return {"enabled": self.started_at is not None, "stages": stages,
+                "elapsed_s": round(time.monotonic() - self.started_at, 3) if self.started_at else None,
+                "ready_after_s": round(self.ready_after, 3) if self.ready_after is not None else None}
+
+
+warmup = Warmup()
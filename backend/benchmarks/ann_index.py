@@ -0,0 +1,59 @@
+"""
+ANN Index Benchmark
+Builds an IVFIndex over synthetic clustered unit vectors (MiniLM-sized,
+384 dims) at several cohort sizes and reports query latency and recall@k
+against an exact matrix-vector scan.
+
+Run from backend/:  python -m benchmarks.ann_index [--sizes 1000 10000 100000]
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from ai_engine.ann_index import IVFIndex
+
+
+def _synthetic(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    centres = rng.normal(size=(max(8, n // 200), dim)).astype(np.float32)
+    vecs = centres[rng.integers(len(centres), size=n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--nprobe", type=int, default=None, help="lists probed per query (default ANN_NPROBE)")
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'n':>8} {'build s':>8} {'exact ms':>9} {'ann ms':>8} {'recall@k':>9}")
+    for n in args.sizes:
+        vecs = _synthetic(n, args.dim, rng)
+        queries = _synthetic(args.queries, args.dim, rng)
+        index = IVFIndex("bench", directory=tempfile.mkdtemp())
+        if args.nprobe:
+            index.nprobe = args.nprobe
+        started = time.perf_counter()
+        for i, v in enumerate(vecs):
+            index.upsert(str(i), str(i), v)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        exact = [set(np.argpartition(-(vecs @ q), args.k)[:args.k].astype(str)) for q in queries]
+        exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        started = time.perf_counter()
+        approx = [{key for key, _ in index.search(q, args.k)} for q in queries]
+        ann_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        recall = np.mean([len(a & e) / args.k for a, e in zip(approx, exact)])
+        print(f"{n:>8} {build:>8.1f} {exact_ms:>9.2f} {ann_ms:>8.2f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
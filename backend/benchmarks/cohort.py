@@ -0,0 +1,142 @@
+"""
+Synthetic Cohort Generator
+Scales the seed data (MOCK_STUDENTS, MOCK_RESUME_TEXTS, MOCK_DRIVES) into
+cohorts of any size. Each synthetic student starts from a seed student's
+profile (so skill sets stay coherent), with CGPA, backlogs and branch
+drawn from campus-like distributions, extra skills from the taxonomy and a
+generated resume. Drives vary the seed drives' eligibility rules, so the
+policy gateway rejects a realistic share of applicants. Output is
+deterministic for a given --seed.
+
+Run from backend/:
+  python -m benchmarks.cohort --students 10000 --drives 50 --out cohort.ndjson
+The NDJSON roster can be fed to POST /students/bulk-import; --load inserts
+students and drives straight into DATABASE_URL instead.
+"""
+import os
+import json
+import argparse
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from database.seed import MOCK_STUDENTS, MOCK_RESUME_TEXTS, MOCK_DRIVES
+
+_TAXONOMY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ai_engine",
+                         "skill_taxonomy.json")
+_BRANCHES = ["CSE", "IT", "ECE", "MCA", "EEE", "ME"]
+_BRANCH_WEIGHTS = [0.38, 0.24, 0.18, 0.1, 0.06, 0.04]
+_FIRST = sorted({s["name"].split()[0] for s in MOCK_STUDENTS})
+_LAST = sorted({s["name"].split()[-1] for s in MOCK_STUDENTS})
+_PROJECTS = sorted({p for s in MOCK_STUDENTS for p in s["projects"]})
+
+
+def _taxonomy_skills() -> List[str]:
+    with open(_TAXONOMY) as f:
+        return [entry["name"] for entry in json.load(f)["skills"]]
+
+
+def _resume(name: str, branch: str, cgpa: float, skills: List[str], projects: List[str],
+            certifications: List[str], rng: np.random.Generator) -> str:
+    lines = [f"{name} - {branch} Student", f"Skills: {', '.join(skills)}"]
+    for project in projects:
+        used = rng.choice(skills, size=min(2, len(skills)), replace=False)
+        lines.append(f"Built {project} using {' and '.join(used)}.")
+    if certifications:
+        lines.append(f"Certifications: {', '.join(certifications)}")
+    lines.append(f"CGPA: {cgpa} | Branch: {branch}")
+    return "\n".join(lines)
+
+
+def generate_students(n: int, rng: np.random.Generator) -> List[Dict]:
+    """`n` synthetic students, each with a resume_text."""
+    extra_pool = _taxonomy_skills()
+    branches = rng.choice(_BRANCHES, size=n, p=_BRANCH_WEIGHTS)
+    cgpas = np.clip(rng.normal(7.6, 0.9, size=n), 5.0, 10.0).round(2)
+    backlogs = np.minimum(rng.poisson(0.35, size=n), 4)
+    templates = rng.integers(len(MOCK_STUDENTS), size=n)
+    students = []
+    for i in range(n):
+        t = MOCK_STUDENTS[templates[i]]
+        keep = rng.choice(t["skills"], size=rng.integers(2, len(t["skills"]) + 1), replace=False).tolist()
+        extra = rng.choice(extra_pool, size=rng.integers(0, 4), replace=False).tolist()
+        skills = list(dict.fromkeys(keep + extra))
+        projects = list(dict.fromkeys(t["projects"][:rng.integers(1, len(t["projects"]) + 1)]
+                                      + rng.choice(_PROJECTS, size=rng.integers(0, 2)).tolist()))
+        certifications = t["certifications"] if rng.random() < 0.6 else []
+        name = f"{_FIRST[rng.integers(len(_FIRST))]} {_LAST[rng.integers(len(_LAST))]}"
+        branch, cgpa = str(branches[i]), float(cgpas[i])
+        students.append({
+            "id": f"STU_SYN_{i:06d}", "name": name, "email": f"syn{i:06d}@college.edu",
+            "branch": branch, "cgpa": cgpa, "active_backlogs": int(backlogs[i]), "graduation_year": 2026,
+            "skills": skills, "projects": projects, "certifications": certifications,
+            "phone": f"9{rng.integers(10 ** 8, 10 ** 9)}",
+            # A quarter keep the seed student's own resume wording for variety.
+            "resume_text": (MOCK_RESUME_TEXTS.get(t["id"]) if rng.random() < 0.25 else None)
+                           or _resume(name, branch, cgpa, skills, projects, certifications, rng),
+        })
+    return students
+
+
+def generate_drives(n: int, rng: np.random.Generator) -> List[Dict]:
+    """`n` active drives derived from the seed drives with varied eligibility rules."""
+    extra_pool = _taxonomy_skills()
+    drives = []
+    for j in range(n):
+        t = MOCK_DRIVES[j % len(MOCK_DRIVES)]
+        required = list(dict.fromkeys(t["required_skills"] + rng.choice(extra_pool, size=rng.integers(0, 2)).tolist()))
+        drives.append({
+            **t, "id": f"DRIVE_SYN_{j:04d}", "company_name": f"{t['company_name']} {j // len(MOCK_DRIVES) + 1}",
+            "jd_text": f"{t['jd_text']} Key skills: {', '.join(required)}.",
+            "required_skills": required,
+            "min_cgpa": float(np.clip(t["min_cgpa"] + rng.choice([-0.5, 0.0, 0.5]), 5.0, 9.5)),
+            "max_backlogs": int(max(0, t["max_backlogs"] + rng.choice([-1, 0, 0, 1]))),
+            "status": "active",
+        })
+    return drives
+
+
+def generate_cohort(students: int, drives: int, seed: int = 0) -> Tuple[List[Dict], List[Dict]]:
+    rng = np.random.default_rng(seed)
+    return generate_students(students, rng), generate_drives(drives, rng)
+
+
+def load_cohort(students: List[Dict], drives: List[Dict], chunk: int = 2000) -> None:
+    """Bulk-insert a cohort into the configured database."""
+    from sqlalchemy import insert
+    from database.models import Base, engine, SessionLocal, Student, PlacementDrive
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        for i in range(0, len(students), chunk):
+            db.execute(insert(Student), students[i:i + chunk])
+        if drives:
+            db.execute(insert(PlacementDrive), drives)
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--students", type=int, default=10000)
+    parser.add_argument("--drives", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the students as an NDJSON roster")
+    parser.add_argument("--drives-out", help="write the drives as a JSON array")
+    parser.add_argument("--load", action="store_true", help="insert into DATABASE_URL")
+    args = parser.parse_args()
+
+    students, drives = generate_cohort(args.students, args.drives, args.seed)
+    if args.out:
+        with open(args.out, "w") as f:
+            for s in students:
+                f.write(json.dumps({k: v for k, v in s.items() if k != "id"}) + "\n")
+    if args.drives_out:
+        with open(args.drives_out, "w") as f:
+            json.dump(drives, f, indent=2)
+    if args.load:
+        load_cohort(students, drives)
+    print(f"✅ Generated {len(students)} students and {len(drives)} drives (seed {args.seed})")
+
+
+if __name__ == "__main__":
+    main()
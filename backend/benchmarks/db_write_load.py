@@ -0,0 +1,155 @@
+"""
+Database Write Load Test
+Runs /apply-shaped write transactions (one application, one audit log
+entry and a drive counter bump, committed together) from concurrent
+threads while reader threads keep querying, and reports write throughput,
+commit latency and failed transactions for each database mode:
+
+  sqlite-legacy — the old engine: default pool, no pragmas
+  sqlite-tuned  — build_engine(): QueuePool, WAL, synchronous=NORMAL, busy timeout
+  postgres      — build_engine() against --postgres-url (skipped without it)
+
+Run from backend/:
+  python -m benchmarks.db_write_load [--threads 8] [--writes 200] [--readers 2]
+                                     [--postgres-url postgresql://user:pw@host/db]
+"""
+import os
+import time
+import uuid
+import argparse
+import tempfile
+import threading
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from ai_engine.audit_logger import create_log
+from database.models import Base, Application, AuditLog, DriveCounter, PlacementDrive, Student, build_engine
+
+_DRIVES = 4
+
+
+def _legacy_engine(url: str) -> Engine:
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def _prepare(engine: Engine, students: int) -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(PlacementDrive), [{"id": f"D{d}", "company_name": "Bench", "job_role": "SDE",
+                                               "required_skills": ["Python"], "eligible_branches": ["CSE"]}
+                                              for d in range(_DRIVES)])
+        conn.execute(insert(DriveCounter), [{"drive_id": f"D{d}"} for d in range(_DRIVES)])
+        conn.execute(insert(Student), [{"id": f"S{i}", "name": f"Student {i}", "email": f"s{i}@bench.edu",
+                                        "branch": "CSE", "cgpa": 8.0, "skills": ["Python", "SQL"]}
+                                       for i in range(students)])
+
+
+def _apply_once(Session, student_id: str, drive_id: str) -> None:
+    db = Session()
+    try:
+        policy = {"passed": True, "checks": [], "reasoning": "bench"}
+        db.add(Application(id=str(uuid.uuid4()), student_id=student_id, drive_id=drive_id, policy_passed=True,
+                           policy_details=policy, crs_score=72.5, semantic_score=70.0, project_score=60.0,
+                           completeness_score=90.0, matched_skills=["Python"], missing_skills=["Docker"],
+                           status="eligible"))
+        db.execute(update(DriveCounter).where(DriveCounter.drive_id == drive_id)
+                   .values(total=DriveCounter.total + 1, eligible=DriveCounter.eligible + 1))
+        create_log(db, student_id, drive_id, "AI_SCORED", "PASSED", policy, ai_score=72.5,
+                   missing_skills=["Docker"], final_decision="ELIGIBLE", reasoning="bench", commit=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def run_mode(name: str, engine: Engine, threads: int, writes: int, readers: int) -> Dict:
+    _prepare(engine, threads * writes)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    latencies: List[float] = []
+    errors: List[str] = []
+    reads = [0]
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def writer(t: int) -> None:
+        for i in range(writes):
+            started = time.perf_counter()
+            try:
+                _apply_once(Session, f"S{t * writes + i}", f"D{i % _DRIVES}")
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                with lock:
+                    errors.append(type(e).__name__)
+
+    def reader() -> None:
+        while not stop.is_set():
+            db = Session()
+            try:
+                db.query(func.count(Application.id)).scalar()
+                db.query(AuditLog).order_by(AuditLog.timestamp.desc()).limit(20).all()
+                with lock:
+                    reads[0] += 1
+            except Exception:
+                pass
+            finally:
+                db.close()
+
+    read_threads = [threading.Thread(target=reader, daemon=True) for _ in range(readers)]
+    write_threads = [threading.Thread(target=writer, args=(t,)) for t in range(threads)]
+    for th in read_threads:
+        th.start()
+    started = time.perf_counter()
+    for th in write_threads:
+        th.start()
+    for th in write_threads:
+        th.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for th in read_threads:
+        th.join()
+    engine.dispose()
+
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {"mode": name, "commits": len(latencies), "failed": len(errors),
+            "writes_per_s": round(len(latencies) / elapsed, 1), "reads_per_s": round(reads[0] / elapsed, 1),
+            "p50_ms": round(float(np.percentile(lat, 50)), 2), "p95_ms": round(float(np.percentile(lat, 95)), 2),
+            "p99_ms": round(float(np.percentile(lat, 99)), 2),
+            "error_types": sorted(set(errors))}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8, help="concurrent writer threads")
+    parser.add_argument("--writes", type=int, default=200, help="transactions per writer thread")
+    parser.add_argument("--readers", type=int, default=2, help="concurrent reader threads")
+    parser.add_argument("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"))
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="pathfinder-dbload-")
+    modes = [("sqlite-legacy", _legacy_engine(f"sqlite:///{workdir}/legacy.db")),
+             ("sqlite-tuned", build_engine(f"sqlite:///{workdir}/tuned.db", sqlite_tuning=True))]
+    if args.postgres_url:
+        modes.append(("postgres", build_engine(args.postgres_url)))
+    else:
+        print("ℹ️  No --postgres-url given; skipping PostgreSQL")
+
+    print(f"{args.threads} writers × {args.writes} transactions, {args.readers} readers")
+    print(f"{'mode':<14} {'commits':>8} {'failed':>7} {'writes/s':>9} {'reads/s':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}")
+    for name, engine in modes:
+        r = run_mode(name, engine, args.threads, args.writes, args.readers)
+        print(f"{r['mode']:<14} {r['commits']:>8} {r['failed']:>7} {r['writes_per_s']:>9} {r['reads_per_s']:>8} "
+              f"{r['p50_ms']:>7} {r['p95_ms']:>7} {r['p99_ms']:>7}"
+              + (f"  ({', '.join(r['error_types'])})" if r["error_types"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Embedding Backend Benchmark
+  parity     — encode the seed resumes/JDs with the torch and ONNX backends,
+               report the minimum cosine between matching vectors and the
+               largest CRS difference over every (student, drive) pair;
+               exits non-zero if it exceeds --tolerance CRS points.
+  throughput — per backend, in a fresh process: load time, encodes/sec at
+               the given batch size, and resident memory after loading.
+
+Run from backend/:
+  python -m benchmarks.embedding_backends parity [--tolerance 2.0]
+  python -m benchmarks.embedding_backends throughput [--backends torch onnx]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from typing import Dict, List
+
+import numpy as np
+
+from ai_engine import matcher
+from database.seed import MOCK_STUDENTS, MOCK_DRIVES, MOCK_RESUME_TEXTS
+
+
+def _rss_mb() -> float:
+    """Current resident set size (Linux /proc), else peak RSS."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _profiles():
+    """Seed students as seed_database() stores them (with a resume text each)."""
+    students = [dict(s, resume_text=MOCK_RESUME_TEXTS.get(
+        s["id"], f"{s['name']} - {s['branch']} Student\nSkills: {', '.join(s['skills'])}\n"
+                 f"Projects: {', '.join(s['projects'])}")) for s in MOCK_STUDENTS]
+    return students, MOCK_DRIVES
+
+
+def _crs_table(encoder, students: List[Dict], drives: List[Dict]) -> np.ndarray:
+    """CRS for every (student, drive) pair, using `encoder` directly (no caches)."""
+    scores = np.zeros((len(students), len(drives)))
+    for j, drive in enumerate(drives):
+        inputs = [matcher._crs_inputs(s, drive) for s in students]
+        texts = [r for r, _, _ in inputs] + [p or " " for _, p, _ in inputs] + [inputs[0][2]]
+        vecs = encoder.encode(texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+        sims = vecs[:-1] @ vecs[-1]
+        for i, s in enumerate(students):
+            project = matcher._project_relevance_from_sim(float(sims[len(students) + i])) if inputs[i][1] else 0.3
+            scores[i, j] = matcher._assemble_crs(s, drive, float(sims[i]), project)["crs_score"]
+    return scores
+
+
+def parity(args) -> int:
+    students, drives = _profiles()
+    torch_encoder, _ = matcher._load_backend("torch")
+    onnx_encoder, onnx_key = matcher._load_backend("onnx")
+    texts = [matcher.resume_text_for(s) for s in students] + [matcher.jd_text_for(d) for d in drives]
+    a = torch_encoder.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    b = onnx_encoder.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    cosine = np.sum(a * b, axis=1)
+    diff = np.abs(_crs_table(torch_encoder, students, drives) - _crs_table(onnx_encoder, students, drives))
+    print(f"📐 torch vs {onnx_key} over {len(texts)} texts, {diff.size} CRS pairs")
+    print(f"   embedding cosine  min {cosine.min():.4f}  mean {cosine.mean():.4f}")
+    print(f"   CRS |Δ| points    max {diff.max():.2f}  mean {diff.mean():.3f}")
+    if diff.max() > args.tolerance:
+        print(f"❌ CRS drift exceeds tolerance {args.tolerance}")
+        return 1
+    print(f"✅ Within tolerance {args.tolerance}")
+    return 0
+
+
+def _throughput_one(backend: str, batch_size: int, texts: int) -> Dict:
+    baseline = _rss_mb()
+    started = time.perf_counter()
+    encoder, key = matcher._load_backend(backend)
+    load_s = time.perf_counter() - started
+    corpus = (list(MOCK_RESUME_TEXTS.values()) + [d["jd_text"] for d in MOCK_DRIVES if d.get("jd_text")])
+    corpus = (corpus * (texts // len(corpus) + 1))[:texts]
+    encoder.encode(corpus[:batch_size], batch_size=batch_size)  # warm-up
+    started = time.perf_counter()
+    encoder.encode(corpus, batch_size=batch_size)
+    elapsed = time.perf_counter() - started
+    return {"backend": key, "load_s": round(load_s, 2), "encodes_per_s": round(len(corpus) / elapsed, 1),
+            "rss_mb": round(_rss_mb(), 1), "model_rss_mb": round(_rss_mb() - baseline, 1),
+            "batch_size": batch_size, "texts": len(corpus)}
+
+
+def throughput(args) -> int:
+    if args.child:
+        print(json.dumps(_throughput_one(args.child, args.batch_size, args.texts)))
+        return 0
+    print(f"{'backend':<28} {'load s':>7} {'enc/s':>8} {'RSS MB':>8} {'model MB':>9}")
+    for backend in args.backends:
+        # A fresh interpreter per backend so RSS isn't shared between them.
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.embedding_backends", "throughput",
+                               "--child", backend, "--batch-size", str(args.batch_size), "--texts", str(args.texts)],
+                              capture_output=True, text=True, cwd=os.getcwd())
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if proc.returncode or not lines:
+            print(f"{backend:<28} failed: {proc.stderr.strip().splitlines()[-1:] or proc.stdout}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{r['backend']:<28} {r['load_s']:>7} {r['encodes_per_s']:>8} {r['rss_mb']:>8} {r['model_rss_mb']:>9}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("parity")
+    p.add_argument("--tolerance", type=float, default=2.0, help="max allowed CRS difference (points)")
+    t = sub.add_parser("throughput")
+    t.add_argument("--backends", nargs="+", default=["torch", "onnx"])
+    t.add_argument("--batch-size", type=int, default=32)
+    t.add_argument("--texts", type=int, default=512)
+    t.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sys.exit(parity(args) if args.command == "parity" else throughput(args))
+
+
+if __name__ == "__main__":
+    main()
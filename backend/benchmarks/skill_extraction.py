@@ -0,0 +1,72 @@
+"""
+Skill Extraction Benchmark
+Compares the taxonomy automaton against the previous per-skill substring
+scan on the seed resumes and JDs: per-document latency, and which skills
+each one reports (the old scan also fired on substrings such as "java"
+inside "javascript").
+
+Run from backend/:  python -m benchmarks.skill_extraction [--repeat 200]
+"""
+import argparse
+import time
+from typing import List
+
+from ai_engine.skill_extractor import skill_matcher
+from database.seed import MOCK_RESUME_TEXTS, MOCK_DRIVES
+
+
+def legacy_extract(text: str) -> List[str]:
+    """The pre-taxonomy extract_skills_from_text, verbatim in behaviour."""
+    known_skills = {
+        "python", "java", "javascript", "typescript", "golang", "go", "c++", "c#",
+        "react", "vue", "angular", "next.js", "node.js", "express", "django", "flask",
+        "fastapi", "spring", "spring boot", "hibernate", "laravel", "php",
+        "sql", "mysql", "postgresql", "mongodb", "redis", "elasticsearch", "kafka",
+        "docker", "kubernetes", "aws", "azure", "gcp", "terraform", "jenkins", "ci/cd",
+        "machine learning", "deep learning", "nlp", "computer vision", "pytorch", "tensorflow",
+        "pandas", "numpy", "scikit-learn", "transformers", "hugging face",
+        "rest api", "graphql", "grpc", "microservices", "system design",
+        "data structures", "algorithms", "oop", "devops", "agile", "scrum",
+        "power bi", "tableau", "data analysis", "statistics",
+        "android", "kotlin", "ios", "swift", "react native", "flutter",
+        "cybersecurity", "ethical hacking", "network security",
+        "html", "css", "bootstrap", "tailwind",
+        "git", "linux", "bash", "shell scripting",
+        "socket.io", "websocket", "redis", "celery",
+        "embedded c", "rtos", "arduino", "raspberry pi", "iot", "vlsi", "verilog", "matlab",
+    }
+    text_lower = text.lower()
+    return list({skill.title() for skill in known_skills if skill in text_lower})
+
+
+def _time_per_doc(fn, docs: List[str], repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for doc in docs:
+            fn(doc)
+    return (time.perf_counter() - started) / (repeat * len(docs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    docs = list(MOCK_RESUME_TEXTS.values()) + [d["jd_text"] for d in MOCK_DRIVES if d.get("jd_text")]
+    legacy = _time_per_doc(legacy_extract, docs, args.repeat)
+    new = _time_per_doc(skill_matcher.extract, docs, args.repeat)
+    print(f"📄 {len(docs)} documents, {args.repeat} passes")
+    print(f"   legacy scan : {legacy * 1e6:8.1f} µs/doc")
+    print(f"   automaton   : {new * 1e6:8.1f} µs/doc  ({legacy / new:.1f}x)")
+
+    for doc in docs:
+        old = {s.lower() for s in legacy_extract(doc)}
+        cur = {s.lower() for s in skill_matcher.extract(doc)}
+        if old != cur:
+            print(f"\n• {doc[:60]!r}...")
+            print(f"   only legacy   : {sorted(old - cur)}")
+            print(f"   only automaton: {sorted(cur - old)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Placement Pipeline Benchmark Suite
+  run      — on a synthetic cohort (benchmarks/cohort.py):
+             micro-benchmarks of check_eligibility, extract_skills_from_text
+             and compute_crs (cold and cached), then an in-process HTTP
+             "drive day" load test against the real app: a burst of /apply
+             calls concentrated on a few drives while TPOs poll the
+             shortlist and students check eligibility and the dashboard
+             refreshes. Writes p50/p95/p99 latency, throughput, errors and
+             peak RSS to a JSON file, tagged with the git commit.
+  compare  — diff two result files and flag p95 regressions.
+
+The app runs against a scratch database and stores in a temp directory,
+and the HTTP client shares the process (httpx ASGITransport), so absolute
+numbers include client overhead; compare runs made on the same machine.
+
+Run from backend/:
+  python -m benchmarks.suite run [--students 10000] [--drives 50] [--requests 3000]
+                                 [--concurrency 32] [--out bench_results.json]
+  python -m benchmarks.suite compare old.json new.json [--threshold 0.15]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import datetime
+import tempfile
+import subprocess
+from collections import defaultdict
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Point every store at a scratch directory before the app modules are imported.
+_WORKDIR = tempfile.mkdtemp(prefix="pathfinder-bench-")
+for _name, _value in {"DATABASE_URL": f"sqlite:///{_WORKDIR}/bench.db",
+                      "EMBEDDING_DB_PATH": f"{_WORKDIR}/embeddings.db",
+                      "ANN_INDEX_DIR": f"{_WORKDIR}/ann_index",
+                      "BULK_IMPORT_DIR": f"{_WORKDIR}/imports",
+                      "SEED_DATABASE": "0"}.items():
+    os.environ.setdefault(_name, _value)
+
+from benchmarks.cohort import generate_cohort, load_cohort
+from ai_engine.policy_gateway import check_eligibility
+from ai_engine.matcher import compute_crs, extract_skills_from_text, model_key
+from ai_engine.crs_cache import crs_cache
+
+
+def _summary(latencies_s: List[float], elapsed_s: float = None) -> Dict:
+    ms = np.asarray(latencies_s) * 1000
+    if not len(ms):
+        return {"count": 0}
+    out = {"count": int(len(ms)), "mean_ms": round(float(ms.mean()), 3),
+           "p50_ms": round(float(np.percentile(ms, 50)), 3), "p95_ms": round(float(np.percentile(ms, 95)), 3),
+           "p99_ms": round(float(np.percentile(ms, 99)), 3), "max_ms": round(float(ms.max()), 3)}
+    out["throughput_per_s"] = round(len(ms) / (elapsed_s or ms.sum() / 1000), 1)
+    return out
+
+
+def _time_calls(fn: Callable, args: List[tuple]) -> Dict:
+    latencies = []
+    for a in args:
+        started = time.perf_counter()
+        fn(*a)
+        latencies.append(time.perf_counter() - started)
+    return _summary(latencies)
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def micro(students: List[Dict], drives: List[Dict], samples: int, rng: random.Random) -> Dict:
+    pairs = [(rng.choice(students), rng.choice(drives)) for _ in range(samples)]
+    resumes = [(rng.choice(students)["resume_text"],) for _ in range(samples)]
+    crs_cache.clear()
+    results = {"check_eligibility": _time_calls(check_eligibility, pairs),
+               "extract_skills_from_text": _time_calls(extract_skills_from_text, resumes),
+               "compute_crs_cold": _time_calls(compute_crs, pairs),
+               "compute_crs_cached": _time_calls(compute_crs, pairs)}
+    for name, r in results.items():
+        print(f"   {name:<26} p50 {r['p50_ms']:>8.3f} ms  p95 {r['p95_ms']:>8.3f} ms  "
+              f"p99 {r['p99_ms']:>8.3f} ms  {r['throughput_per_s']:>9.1f}/s")
+    return results
+
+
+def _drive_day_plan(students: List[Dict], drives: List[Dict], requests: int, hot_drives: int,
+                    rng: random.Random) -> List[tuple]:
+    """Request mix for the drive-day spike: mostly applications to a few hot drives."""
+    hot = [d["id"] for d in drives[:hot_drives]]
+    pairs = iter(rng.sample([(s["id"], d) for s in students for d in hot], k=min(requests, len(students) * len(hot))))
+    plan = []
+    for _ in range(requests):
+        roll = rng.random()
+        if roll < 0.70:
+            pair = next(pairs, None)
+            if pair:
+                plan.append(("apply", "POST", "/apply", {"student_id": pair[0], "drive_id": pair[1]}))
+                continue
+        if roll < 0.85:
+            plan.append(("shortlist", "GET", f"/shortlist/{rng.choice(hot)}?limit=50", None))
+        elif roll < 0.95:
+            plan.append(("eligibility", "GET", f"/eligibility/{rng.choice(students)['id']}?details=false", None))
+        else:
+            plan.append(("analytics_overview", "GET", "/analytics/overview", None))
+    return plan
+
+
+async def http_load(plan: List[tuple], concurrency: int) -> Dict:
+    import httpx
+    import main
+    from ai_engine.warmup import warmup
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    async with main.lifespan(main.app):
+        while not warmup.ready() or any(s["status"] in ("pending", "running")
+                                        for s in warmup.report()["stages"].values()):
+            await asyncio.sleep(0.1)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            queue: "asyncio.Queue" = asyncio.Queue()
+            for item in plan:
+                queue.put_nowait(item)
+
+            async def user():
+                while not queue.empty():
+                    name, method, url, body = queue.get_nowait()
+                    started = time.perf_counter()
+                    r = await client.request(method, url, json=body)
+                    latencies[name].append(time.perf_counter() - started)
+                    statuses[name][str(r.status_code)] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        startup = warmup.report()
+
+    endpoints = {}
+    for name, values in sorted(latencies.items()):
+        endpoints[name] = {**_summary(values, elapsed), "status_codes": dict(statuses[name]),
+                           "errors": sum(n for code, n in statuses[name].items() if not code.startswith("2"))}
+        r = endpoints[name]
+        print(f"   {name:<20} n {r['count']:>6}  p50 {r['p50_ms']:>8.2f} ms  p95 {r['p95_ms']:>8.2f} ms  "
+              f"p99 {r['p99_ms']:>8.2f} ms  errors {r['errors']}")
+    every = [v for values in latencies.values() for v in values]
+    overall = {**_summary(every, elapsed), "duration_s": round(elapsed, 2), "concurrency": concurrency}
+    print(f"   overall: {overall['throughput_per_s']} req/s over {overall['duration_s']} s")
+    return {"overall": overall, "endpoints": endpoints, "startup": startup}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run(args) -> int:
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    students, drives = generate_cohort(args.students, args.drives, args.seed)
+    print(f"🧪 Cohort: {len(students)} students × {len(drives)} drives "
+          f"(generated in {time.perf_counter() - started:.1f}s), workdir {_WORKDIR}")
+    result = {"meta": {"commit": _git_commit(), "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                       "python": platform.python_version(), "platform": platform.platform(),
+                       "cpus": os.cpu_count(), "students": len(students), "drives": len(drives),
+                       "seed": args.seed, "embedding": model_key() or "fallback"}}
+    if not args.skip_micro:
+        print("⏱️  Micro-benchmarks")
+        result["micro"] = micro(students, drives, args.samples, rng)
+    if not args.skip_http:
+        load_cohort(students, drives)
+        print(f"🌐 Drive-day load: {args.requests} requests, {args.concurrency} concurrent users")
+        plan = _drive_day_plan(students, drives, args.requests, args.hot_drives, rng)
+        result["http"] = asyncio.run(http_load(plan, args.concurrency))
+    result["peak_rss_mb"] = _peak_rss_mb()
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"✅ Peak RSS {result['peak_rss_mb']} MB; results written to {args.out}")
+    return 0
+
+
+def _flatten(result: Dict) -> Dict[str, float]:
+    flat = {f"micro.{name}": r["p95_ms"] for name, r in result.get("micro", {}).items() if "p95_ms" in r}
+    flat.update({f"http.{name}": r["p95_ms"] for name, r in result.get("http", {}).get("endpoints", {}).items()
+                 if "p95_ms" in r})
+    return flat
+
+
+def compare(args) -> int:
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    before, after = _flatten(old), _flatten(new)
+    print(f"p95 latency {old['meta']['commit']} → {new['meta']['commit']}")
+    regressions = 0
+    for key in sorted(set(before) & set(after)):
+        change = (after[key] - before[key]) / before[key] if before[key] else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag, regressions = "  ❌ regression", regressions + 1
+        print(f"   {key:<36} {before[key]:>9.3f} → {after[key]:>9.3f} ms  {change:+7.1%}{flag}")
+    print(f"   peak RSS {old.get('peak_rss_mb')} → {new.get('peak_rss_mb')} MB")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+    r = sub.add_parser("run")
+    r.add_argument("--students", type=int, default=10000)
+    r.add_argument("--drives", type=int, default=50)
+    r.add_argument("--seed", type=int, default=0)
+    r.add_argument("--samples", type=int, default=2000, help="calls per micro-benchmark")
+    r.add_argument("--requests", type=int, default=3000)
+    r.add_argument("--concurrency", type=int, default=32)
+    r.add_argument("--hot-drives", type=int, default=3, help="drives receiving the application spike")
+    r.add_argument("--skip-micro", action="store_true")
+    r.add_argument("--skip-http", action="store_true")
+    r.add_argument("--out", default="bench_results.json")
+    c = sub.add_parser("compare")
+    c.add_argument("old")
+    c.add_argument("new")
+    c.add_argument("--threshold", type=float, default=0.15, help="p95 increase that counts as a regression")
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == "run" else compare(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Worker Memory Benchmark
+Measures what multi-worker serving costs in memory, with and without the
+pre-fork preload (gunicorn.conf.py, ai_engine/preload.py). For each mode it
+starts gunicorn with --workers N against a scratch database holding a
+synthetic cohort (and its saved ANN indexes), waits for the workers to be
+ready, sends a burst of /drives/{id}/recommend requests (encode + ANN
+search + CRS re-rank) so each worker has touched the model and the index
+matrices, then reads /proc/<pid>/smaps_rollup for the master and every
+worker:
+  RSS      resident pages, shared ones counted in full for every process
+  PSS      shared pages split between the processes that map them
+  private  pages only that process maps (what each extra worker costs)
+Summed PSS is the memory the server really uses. Linux only.
+
+Run from backend/:
+  python -m benchmarks.worker_memory [--workers 4] [--students 2000] [--requests 200]
+                                     [--modes preload,no-preload] [--out worker_memory.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# Point every store at a scratch directory before the app modules are imported.
+_WORKDIR = tempfile.mkdtemp(prefix="pathfinder-workers-")
+for _name, _value in {"DATABASE_URL": f"sqlite:///{_WORKDIR}/bench.db",
+                      "EMBEDDING_DB_PATH": f"{_WORKDIR}/embeddings.db",
+                      "ANN_INDEX_DIR": f"{_WORKDIR}/ann_index",
+                      "BULK_IMPORT_DIR": f"{_WORKDIR}/imports",
+                      "SEED_DATABASE": "0"}.items():
+    os.environ.setdefault(_name, _value)
+
+_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def prepare(students: int, drives: int, seed: int) -> List[str]:
+    """Create, migrate and fill the scratch database and save its ANN indexes; returns the drive ids."""
+    from benchmarks.cohort import generate_cohort, load_cohort
+    from database.models import engine
+    from database.migrations import run_migrations
+    from ai_engine.matcher import resume_text_for, jd_text_for
+    from ai_engine.ann_index import sync_indexes, save_indexes
+
+    cohort_students, cohort_drives = generate_cohort(students, drives, seed)
+    load_cohort(cohort_students, cohort_drives)
+    # Migrate here so N workers don't race to ALTER the same tables on startup.
+    run_migrations(engine)
+    sync_indexes(cohort_students, cohort_drives)
+    save_indexes()
+    return [d["id"] for d in cohort_drives]
+
+
+def _smaps_rollup(pid: int) -> Dict[str, float]:
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    mb = lambda *keys: round(sum(fields.get(k, 0) for k in keys) / 1024, 1)
+    return {"rss_mb": mb("Rss"), "pss_mb": mb("Pss"), "private_mb": mb("Private_Clean", "Private_Dirty"),
+            "shared_mb": mb("Shared_Clean", "Shared_Dirty")}
+
+
+def _children(pid: int) -> List[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def _wait_ready(base: str, workers: int, timeout: float) -> None:
+    """Wait until `workers` consecutive /readyz probes succeed (requests land on any worker)."""
+    import httpx
+    deadline, streak = time.monotonic() + timeout, 0
+    while streak < 3 * workers:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"workers not ready after {timeout:.0f}s")
+        try:
+            streak = streak + 1 if httpx.get(f"{base}/readyz", timeout=5).status_code == 200 else 0
+        except httpx.HTTPError:
+            streak = 0
+        time.sleep(0.2 if streak else 1.0)
+
+
+def measure(mode: str, workers: int, drive_ids: List[str], requests: int, port: int, timeout: float) -> Dict:
+    import httpx
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "PORT": str(port),
+           "PRELOAD_MODEL": "1" if mode == "preload" else "0"}
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+                              cwd=_BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(base, workers, timeout)
+        ready_s = time.perf_counter() - started
+        with httpx.Client(base_url=base, timeout=120) as client, ThreadPoolExecutor(2 * workers) as pool:
+            codes = list(pool.map(lambda i: client.get(f"/drives/{drive_ids[i % len(drive_ids)]}/recommend?k=20")
+                                  .status_code, range(requests)))
+        time.sleep(2.0)
+        master = _smaps_rollup(server.pid)
+        per_worker = [_smaps_rollup(pid) for pid in _children(server.pid)]
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    total = {k: round(master[k] + sum(w[k] for w in per_worker), 1) for k in ("rss_mb", "pss_mb", "private_mb")}
+    result = {"mode": mode, "workers": len(per_worker), "ready_s": round(ready_s, 1),
+              "errors": sum(code != 200 for code in codes), "master": master, "per_worker": per_worker,
+              "total": total}
+    mean = lambda key: round(sum(w[key] for w in per_worker) / max(1, len(per_worker)), 1)
+    print(f"   {mode:<11} {result['workers']} workers  ready {result['ready_s']:>5.1f}s  "
+          f"worker RSS {mean('rss_mb'):>7.1f}  PSS {mean('pss_mb'):>7.1f}  private {mean('private_mb'):>7.1f} MB  "
+          f"| total PSS {total['pss_mb']:>7.1f} MB  errors {result['errors']}")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--drives", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=200, help="recommend calls sent before measuring")
+    parser.add_argument("--modes", default="preload,no-preload")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for the workers")
+    parser.add_argument("--out", default="worker_memory.json")
+    args = parser.parse_args()
+
+    drive_ids = prepare(args.students, args.drives, args.seed)
+    print(f"🧪 {args.students} students × {args.drives} drives in {_WORKDIR}; "
+          f"{args.workers} workers on {os.cpu_count()} CPU(s)")
+    results = [measure(mode, args.workers, drive_ids, args.requests, args.port, args.timeout)
+               for mode in args.modes.split(",")]
+    with open(args.out, "w") as f:
+        json.dump({"students": args.students, "drives": args.drives, "cpus": os.cpu_count(),
+                   "runs": results}, f, indent=2)
+    print(f"✅ Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
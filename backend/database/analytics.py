@@ -0,0 +1,158 @@
+"""
+Placement Analytics
+Dashboard aggregates, each computed by a single grouped query using
+conditional SUM(CASE ...). With ANALYTICS_COUNTERS=1 the figures are read
+from the drive_counters table instead, which /apply, score-all and
+/shortlist/approve keep current inside their own transactions.
+"""
+import os
+from typing import Dict, Optional
+
+from sqlalchemy import case, delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from database.models import Application, DriveCounter, PlacementDrive, Student
+
+ANALYTICS_COUNTERS = os.getenv("ANALYTICS_COUNTERS", "0") == "1"
+
+_STATUS_COLUMNS = ("eligible", "rejected", "shortlisted")
+_COUNTER_COLUMNS = ("total", *_STATUS_COLUMNS, "crs_sum", "crs_count")
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def overview(db: Session) -> Dict:
+    """Platform-wide totals for the TPO dashboard."""
+    students = select(func.count(Student.id)).scalar_subquery()
+    drives = select(func.count(PlacementDrive.id)).scalar_subquery()
+    active = select(_count_if(PlacementDrive.status == "active")).scalar_subquery()
+    if ANALYTICS_COUNTERS:
+        apps = select(func.coalesce(func.sum(DriveCounter.total), 0),
+                      func.coalesce(func.sum(DriveCounter.shortlisted), 0),
+                      func.coalesce(func.sum(DriveCounter.rejected), 0),
+                      func.coalesce(func.sum(DriveCounter.eligible), 0))
+    else:
+        apps = select(func.count(Application.id),
+                      _count_if(Application.status == "shortlisted"),
+                      _count_if(Application.status == "rejected"),
+                      _count_if(Application.status == "eligible"))
+    row = db.execute(apps.add_columns(students, drives, active)).one()
+    total_apps, shortlisted, rejected, eligible, total_students, total_drives, active_drives = row
+    return {"total_students": total_students,
+            "total_drives": total_drives,
+            "active_drives": active_drives,
+            "total_applications": total_apps,
+            "shortlisted": shortlisted,
+            "rejected": rejected,
+            "eligible": eligible,
+            "placement_rate": round(shortlisted / total_students * 100, 1) if total_students else 0}
+
+
+def drive_stats(db: Session, drive_id: str) -> Dict:
+    """Applicant funnel and average CRS for one drive."""
+    if ANALYTICS_COUNTERS:
+        c = db.get(DriveCounter, drive_id)
+        total, passed = (c.total, c.eligible + c.shortlisted) if c else (0, 0)
+        rejected, shortlisted = (c.rejected, c.shortlisted) if c else (0, 0)
+        avg = c.crs_sum / c.crs_count if c and c.crs_count else None
+    else:
+        total, passed, rejected, shortlisted, avg = db.execute(
+            select(func.count(Application.id),
+                   _count_if(Application.status.in_(["eligible", "shortlisted"])),
+                   _count_if(Application.status == "rejected"),
+                   _count_if(Application.status == "shortlisted"),
+                   func.avg(Application.crs_score))
+            .where(Application.drive_id == drive_id)
+        ).one()
+    return {"drive_id": drive_id, "total_applicants": total,
+            "eligible": passed,
+            "rejected": rejected,
+            "shortlisted": shortlisted,
+            "average_crs": round(avg, 1) if avg is not None else 0,
+            "pass_rate": round(passed / total * 100, 1) if total else 0}
+
+
+# ── Materialized counters ─────────────────────────────────────────────────────
+def _bump(db: Session, drive_id: str, **deltas) -> None:
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    # One atomic upsert: an UPDATE-then-INSERT lets two first applications to a
+    # drive both see no row and both INSERT its primary key.
+    upsert = (pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert)(DriveCounter)
+    upsert = upsert.values(drive_id=drive_id, **{k: deltas.get(k, 0) for k in _COUNTER_COLUMNS})
+    db.execute(upsert.on_conflict_do_update(
+        index_elements=[DriveCounter.drive_id],
+        set_={k: getattr(DriveCounter, k) + getattr(upsert.excluded, k) for k in deltas}))
+
+
+def record_applications(db: Session, drive_id: str, statuses: Dict[str, int],
+                        crs_sum: float = 0.0, crs_count: int = 0) -> None:
+    """Count new applications for a drive. Call before the caller's commit."""
+    if not ANALYTICS_COUNTERS:
+        return
+    deltas = {k: statuses.get(k, 0) for k in _STATUS_COLUMNS}
+    _bump(db, drive_id, total=sum(statuses.values()), crs_sum=crs_sum, crs_count=crs_count, **deltas)
+
+
+def record_status_change(db: Session, drive_id: str, old: Optional[str], new: str) -> None:
+    """Move one application between status columns. Call before the caller's commit."""
+    if not ANALYTICS_COUNTERS or old == new:
+        return
+    deltas = {}
+    if old in _STATUS_COLUMNS:
+        deltas[old] = -1
+    if new in _STATUS_COLUMNS:
+        deltas[new] = 1
+    _bump(db, drive_id, **deltas)
+
+
+def record_rescore(db: Session, drive_id: str, old_status: Optional[str], new_status: str,
+                   old_crs: Optional[float], new_crs: Optional[float]) -> None:
+    """Adjust a drive's tallies for one re-scored application. Call before the caller's commit."""
+    if not ANALYTICS_COUNTERS:
+        return
+    deltas = {}
+    if old_status != new_status:
+        if old_status in _STATUS_COLUMNS:
+            deltas[old_status] = -1
+        if new_status in _STATUS_COLUMNS:
+            deltas[new_status] = 1
+    _bump(db, drive_id, crs_sum=(new_crs or 0.0) - (old_crs or 0.0),
+          crs_count=(new_crs is not None) - (old_crs is not None), **deltas)
+
+
+def rebuild_counters(db: Session) -> int:
+    """
+    Recompute drive_counters from the applications table (startup backfill).
+    Runs as one transaction that holds the counters' write lock from before
+    the aggregate until commit, so an /apply committing meanwhile (another
+    worker or host) is either in the aggregate or bumps the rebuilt rows
+    afterwards: never lost, never colliding with the rebuild's INSERT.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        # Blocks _bump (row-exclusive) until commit; plain reads still proceed.
+        db.execute(text("LOCK TABLE drive_counters IN EXCLUSIVE MODE"))
+    # On SQLite the first write takes the database write lock, so do it before the aggregate.
+    db.execute(delete(DriveCounter))
+    rows = db.execute(
+        select(Application.drive_id,
+               func.count(Application.id),
+               _count_if(Application.status == "eligible"),
+               _count_if(Application.status == "rejected"),
+               _count_if(Application.status == "shortlisted"),
+               func.coalesce(func.sum(Application.crs_score), 0.0),
+               func.count(Application.crs_score))
+        .group_by(Application.drive_id)
+    ).all()
+    if rows:
+        db.execute(insert(DriveCounter), [
+            {"drive_id": r[0], "total": r[1], "eligible": r[2], "rejected": r[3],
+             "shortlisted": r[4], "crs_sum": r[5], "crs_count": r[6]} for r in rows
+        ])
+    db.commit()
+    return len(rows)
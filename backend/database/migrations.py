@@ -0,0 +1,121 @@
+"""
+Schema migrations
+create_all only creates missing tables, so anything that changes an existing
+pathfinder.db (indexes, columns, constraints) is an ordered, idempotent step
+here. Applied versions are recorded in the schema_migrations table.
+"""
+import uuid
+import datetime
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy import and_, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from database.models import Application, AuditLog
+
+
+def _create_indexes(conn: Connection, table, names: List[str]) -> None:
+    for index in table.indexes:
+        if index.name in names:
+            index.create(conn, checkfirst=True)
+
+
+def _remove_duplicate_applications(conn: Connection) -> None:
+    """
+    Keep one application per (student, drive): a shortlisted one if any,
+    else the earliest applied. Each removed row gets an audit entry.
+    """
+    apps = Application.__table__.c
+    pairs = (select(apps.student_id, apps.drive_id).group_by(apps.student_id, apps.drive_id)
+             .having(func.count() > 1).subquery())
+    rows = conn.execute(select(apps.id, apps.student_id, apps.drive_id, apps.status, apps.crs_score, apps.applied_at)
+                        .join(pairs, and_(apps.student_id == pairs.c.student_id, apps.drive_id == pairs.c.drive_id))
+                        ).all()
+    groups: Dict[Tuple[str, str], list] = {}
+    for row in rows:
+        groups.setdefault((row.student_id, row.drive_id), []).append(row)
+    now = datetime.datetime.utcnow()
+    for (student_id, drive_id), dupes in sorted(groups.items()):
+        dupes.sort(key=lambda r: (r.status != "shortlisted", r.applied_at or datetime.datetime.max, r.id))
+        keep, removed = dupes[0], dupes[1:]
+        conn.execute(Application.__table__.delete().where(apps.id.in_([r.id for r in removed])))
+        conn.execute(insert(AuditLog.__table__), [
+            {"id": str(uuid.uuid4()), "timestamp": now, "student_id": student_id, "drive_id": drive_id,
+             "action": "DUPLICATE_REMOVED", "policy_check": None, "policy_details": {}, "ai_score": r.crs_score,
+             "missing_skills": [], "final_decision": (r.status or "").upper() or None, "actor": "MIGRATION",
+             "reasoning": f"Migration 001 removed duplicate application {r.id} (status {r.status}, applied "
+                          f"{r.applied_at}); kept {keep.id} (status {keep.status})."}
+            for r in removed])
+        print(f"🧹 Removed duplicate applications {[r.id for r in removed]} for {student_id} → {drive_id}; "
+              f"kept {keep.id} ({keep.status})")
+
+
+def _m001_hot_path_indexes(conn: Connection) -> None:
+    # The unique index fails on databases that already hold duplicate
+    # applications from the old check-then-insert race; keep one per pair.
+    _remove_duplicate_applications(conn)
+    _create_indexes(conn, Application.__table__,
+                    ["uq_applications_student_drive", "ix_applications_drive_policy_crs"])
+    _create_indexes(conn, AuditLog.__table__,
+                    ["ix_audit_logs_student_timestamp", "ix_audit_logs_drive_timestamp",
+                     "ix_audit_logs_timestamp"])
+
+
+def _m002_audit_stage_timings(conn: Connection) -> None:
+    if "stage_timings" in {c["name"] for c in inspect(conn).get_columns("audit_logs")}:
+        return
+    column_type = "JSONB" if conn.dialect.name == "postgresql" else "JSON"
+    conn.execute(text(f"ALTER TABLE audit_logs ADD COLUMN stage_timings {column_type}"))
+
+
+def _m003_application_score_version(conn: Connection) -> None:
+    if "score_version" in {c["name"] for c in inspect(conn).get_columns("applications")}:
+        return
+    conn.execute(text("ALTER TABLE applications ADD COLUMN score_version INTEGER NOT NULL DEFAULT 1"))
+
+
+def _m004_bulk_import_lease(conn: Connection) -> None:
+    columns = {c["name"] for c in inspect(conn).get_columns("bulk_imports")}
+    if "lease_owner" not in columns:
+        conn.execute(text("ALTER TABLE bulk_imports ADD COLUMN lease_owner VARCHAR"))
+    if "lease_expires_at" not in columns:
+        timestamp = "TIMESTAMP" if conn.dialect.name == "postgresql" else "DATETIME"
+        conn.execute(text(f"ALTER TABLE bulk_imports ADD COLUMN lease_expires_at {timestamp}"))
+
+
+def _m005_student_email_lower_index(conn: Connection) -> None:
+    # checkfirst can't see expression indexes on SQLite, so let the database skip it.
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_students_email_lower ON students (lower(email))"))
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "application and audit log indexes", _m001_hot_path_indexes),
+    (2, "audit log stage timings", _m002_audit_stage_timings),
+    (3, "application score version", _m003_application_score_version),
+    (4, "bulk import lease", _m004_bulk_import_lease),
+    (5, "case-insensitive student email index", _m005_student_email_lower_index),
+]
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """Apply every pending migration in order, one transaction each."""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations "
+            "(version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+        ))
+        done = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    applied = []
+    for version, name, upgrade in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            upgrade(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :t)"),
+                {"v": version, "n": name, "t": datetime.datetime.utcnow()},
+            )
+        print(f"✅ Applied migration {version:03d}: {name}")
+        applied.append(version)
+    return applied
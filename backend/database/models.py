@@ -1,14 +1,105 @@
-from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, JSON, Text, Enum
+"""
+Database models and engine
+The engine is built from DATABASE_URL, so the same code runs on the bundled
+SQLite file or on PostgreSQL (postgres://… URLs from Heroku/Railway are
+accepted). Connections come from a QueuePool sized by DB_POOL_SIZE /
+DB_MAX_OVERFLOW, pre-pinged and recycled so idle connections dropped by a
+proxy or server don't surface as request errors.
+
+On PostgreSQL the JSON columns are stored as JSONB. On SQLite every new
+connection switches to WAL with synchronous=NORMAL and a busy timeout, so
+readers don't block the writer and concurrent /apply commits wait for the
+lock instead of failing with "database is locked". SQLITE_TUNING=0 restores
+the old defaults (benchmarks/db_write_load.py compares the modes).
+
+Async routes use AsyncSessionLocal / get_async_db on a second engine with the
+same settings, over aiosqlite or asyncpg (ASYNC_DATABASE_URL overrides the
+driver URL derived from DATABASE_URL).
+"""
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, JSON, Text, Enum, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 import datetime
 import enum
+import os
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pathfinder.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; below typical proxy idle timeouts
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+SQLITE_TUNING = os.getenv("SQLITE_TUNING", "1") == "1"
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# JSON everywhere, JSONB on PostgreSQL (indexable, no re-parse on read).
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def normalize_url(url: str) -> str:
+    """Accept the postgres:// scheme many hosts hand out (SQLAlchemy wants postgresql://)."""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def async_url(url: str) -> str:
+    """The async-driver form of a sync URL (aiosqlite for SQLite, asyncpg for PostgreSQL)."""
+    url = normalize_url(url)
+    scheme, rest = url.split("://", 1)
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}.get(scheme.split("+")[0])
+    return f"{driver}://{rest}" if driver else url
+
+
+def _tune_sqlite(dbapi_conn, _record) -> None:
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def _engine_options(url: str, poolclass) -> dict:
+    options = dict(poolclass=poolclass, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                   pool_timeout=DB_POOL_TIMEOUT, pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=DB_POOL_PRE_PING)
+    if url.startswith("sqlite"):
+        # The busy timeout also applies at the driver level for the first connect.
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    return options
+
+
+def build_engine(url: str = DATABASE_URL, sqlite_tuning: bool = SQLITE_TUNING, **overrides) -> Engine:
+    """Engine for `url` with a tuned QueuePool; SQLite also gets WAL pragmas."""
+    url = normalize_url(url)
+    engine = create_engine(url, **{**_engine_options(url, QueuePool), **overrides})
+    if url.startswith("sqlite") and sqlite_tuning:
+        event.listen(engine, "connect", _tune_sqlite)
+    return engine
+
+
+def build_async_engine(url: str = ASYNC_DATABASE_URL or async_url(DATABASE_URL),
+                       sqlite_tuning: bool = SQLITE_TUNING, **overrides) -> AsyncEngine:
+    """Async counterpart of build_engine() (same pool settings and pragmas)."""
+    url = async_url(url)
+    engine = create_async_engine(url, **{**_engine_options(url, AsyncAdaptedQueuePool), **overrides})
+    if url.startswith("sqlite") and sqlite_tuning:
+        event.listen(engine.sync_engine, "connect", _tune_sqlite)
+    return engine
+
 
 Base = declarative_base()
-DATABASE_URL = "sqlite:///./pathfinder.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = build_async_engine()
+# expire_on_commit=False: attributes can't lazy-load under asyncio, so rows
+# stay readable after commit instead of raising MissingGreenlet.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 def get_db():
@@ -19,6 +110,11 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 class Student(Base):
     __tablename__ = "students"
     id = Column(String, primary_key=True)
@@ -29,12 +125,19 @@ class Student(Base):
     active_backlogs = Column(Integer, default=0)
     graduation_year = Column(Integer)
     resume_text = Column(Text, nullable=True)
-    skills = Column(JSON, default=[])
-    projects = Column(JSON, default=[])
-    certifications = Column(JSON, default=[])
+    skills = Column(JSONType, default=[])
+    projects = Column(JSONType, default=[])
+    certifications = Column(JSONType, default=[])
     phone = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    applications = relationship("Application", back_populates="student")
+
+    __table_args__ = (
+        # Emails are matched case-insensitively (POST /students, bulk import).
+        Index("ix_students_email_lower", func.lower(email)),
+    )
+
 
 class PlacementDrive(Base):
     __tablename__ = "placement_drives"
@@ -42,10 +145,10 @@ class PlacementDrive(Base):
     company_name = Column(String, nullable=False)
     job_role = Column(String, nullable=False)
     jd_text = Column(Text, nullable=True)
-    required_skills = Column(JSON, default=[])
+    required_skills = Column(JSONType, default=[])
     min_cgpa = Column(Float, default=6.0)
     max_backlogs = Column(Integer, default=0)
-    eligible_branches = Column(JSON, default=[])
+    eligible_branches = Column(JSONType, default=[])
     location = Column(String, nullable=True)
     package_min = Column(Float, nullable=True)
     package_max = Column(Float, nullable=True)
@@ -54,25 +157,48 @@ class PlacementDrive(Base):
     created_by = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    applications = relationship("Application", back_populates="drive")
+
 
 class Application(Base):
     __tablename__ = "applications"
     id = Column(String, primary_key=True)
-    student_id = Column(String, nullable=False)
-    drive_id = Column(String, nullable=False)
+    student_id = Column(String, ForeignKey("students.id"), nullable=False)
+    drive_id = Column(String, ForeignKey("placement_drives.id"), nullable=False)
     policy_passed = Column(Boolean, nullable=True)
-    policy_details = Column(JSON, default={})
+    policy_details = Column(JSONType, default={})
     crs_score = Column(Float, nullable=True)
     semantic_score = Column(Float, nullable=True)
     project_score = Column(Float, nullable=True)
     completeness_score = Column(Float, nullable=True)
-    matched_skills = Column(JSON, default=[])
-    missing_skills = Column(JSON, default=[])
+    matched_skills = Column(JSONType, default=[])
+    missing_skills = Column(JSONType, default=[])
     status = Column(String, default="pending")  # pending, eligible, rejected, shortlisted
+    score_version = Column(Integer, nullable=False, default=1, server_default="1")  # bumped on each rescore
     shortlisted_by = Column(String, nullable=True)
     applied_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+    student = relationship("Student", back_populates="applications")
+    drive = relationship("PlacementDrive", back_populates="applications")
+
+    __table_args__ = (
+        Index("uq_applications_student_drive", "student_id", "drive_id", unique=True),
+        Index("ix_applications_drive_policy_crs", "drive_id", "policy_passed", "crs_score"),
+    )
+
+
+class DriveCounter(Base):
+    """Materialized per-drive application tallies (see database/analytics.py)."""
+    __tablename__ = "drive_counters"
+    drive_id = Column(String, primary_key=True)
+    total = Column(Integer, default=0, nullable=False)
+    eligible = Column(Integer, default=0, nullable=False)  # status == "eligible"
+    rejected = Column(Integer, default=0, nullable=False)
+    shortlisted = Column(Integer, default=0, nullable=False)
+    crs_sum = Column(Float, default=0.0, nullable=False)
+    crs_count = Column(Integer, default=0, nullable=False)
+
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
@@ -82,9 +208,79 @@ class AuditLog(Base):
     drive_id = Column(String, nullable=False)
     action = Column(String)  # APPLIED, POLICY_CHECKED, AI_SCORED, SHORTLISTED, REJECTED
     policy_check = Column(String, nullable=True)  # PASSED / FAILED
-    policy_details = Column(JSON, default={})
+    policy_details = Column(JSONType, default={})
     ai_score = Column(Float, nullable=True)
-    missing_skills = Column(JSON, default=[])
+    missing_skills = Column(JSONType, default=[])
     final_decision = Column(String, nullable=True)
     reasoning = Column(Text, nullable=True)
     actor = Column(String, default="SYSTEM")
+    stage_timings = Column(JSONType, nullable=True)  # pipeline stage latencies (ms) behind the decision
+
+    __table_args__ = (
+        Index("ix_audit_logs_student_timestamp", "student_id", "timestamp"),
+        Index("ix_audit_logs_drive_timestamp", "drive_id", "timestamp"),
+        Index("ix_audit_logs_timestamp", "timestamp"),
+    )
+
+
+class BulkImport(Base):
+    """Progress and checkpoint of a student roster import (see ai_engine/bulk_import.py)."""
+    __tablename__ = "bulk_imports"
+    id = Column(String, primary_key=True)
+    status = Column(String, default="queued")  # queued, running, completed, failed
+    stage = Column(String, nullable=True)  # counting, parsing, extracting, skills, embedding, saving, indexing
+    roster_name = Column(String, nullable=True)
+    roster_format = Column(String, nullable=False)  # csv, ndjson
+    has_resumes = Column(Boolean, default=False)
+    total_rows = Column(Integer, nullable=True)
+    processed_rows = Column(Integer, default=0, nullable=False)  # rows before this are committed
+    created = Column(Integer, default=0, nullable=False)
+    updated = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    errors = Column(JSONType, default=[])  # [{"row", "email", "error"}], capped
+    error = Column(Text, nullable=True)  # why the job itself stopped
+    lease_owner = Column(String, nullable=True)  # host:pid of the process running it
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class Job(Base):
+    """A durable background job split into shards that workers lease (see ai_engine/jobs.py)."""
+    __tablename__ = "jobs"
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)  # score_drive, rebuild_indexes
+    params = Column(JSONType, default={})
+    status = Column(String, default="queued")  # queued, running, completed, failed, cancelled
+    total_shards = Column(Integer, default=0, nullable=False)
+    done_shards = Column(Integer, default=0, nullable=False)
+    failed_shards = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "created_at"),
+    )
+
+
+class JobShard(Base):
+    """One independently retryable slice of a Job; leased by one worker at a time."""
+    __tablename__ = "job_shards"
+    id = Column(String, primary_key=True)  # <job id>:<seq>
+    job_id = Column(String, ForeignKey("jobs.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    payload = Column(JSONType, default={})
+    status = Column(String, default="pending")  # pending, leased, done, failed, cancelled
+    attempts = Column(Integer, default=0, nullable=False)
+    lease_owner = Column(String, nullable=True)  # host:pid:thread of the worker holding the lease
+    lease_expires_at = Column(DateTime, nullable=True)
+    result = Column(JSONType, nullable=True)
+    error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_job_shards_job_status", "job_id", "status"),
+        Index("ix_job_shards_status_lease", "status", "lease_expires_at"),
+    )
@@ -1,3 +1,4 @@
+import os
 import uuid
 import datetime
 from database.models import Student, PlacementDrive, SessionLocal
@@ -113,9 +114,12 @@ MOCK_DRIVES = [
 
 
 def seed_database():
+    if os.getenv("SEED_DATABASE", "1") != "1":
+        return
     db = SessionLocal()
     try:
-        if db.query(Student).count() > 0:
+        # An indexed existence probe, not a full COUNT(*), on every startup.
+        if db.query(Student.id).first() is not None:
             print("Database already seeded.")
             return
         for s in MOCK_STUDENTS:
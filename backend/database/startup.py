@@ -0,0 +1,30 @@
+"""
+Database startup
+One-time preparation before serving: create missing tables, apply
+migrations, seed the demo data and backfill the analytics counters. None
+of these steps tolerate running concurrently with themselves, so under
+gunicorn the master runs prepare_database() once before forking (see
+gunicorn.conf.py) and the forked workers, which inherit the flag, skip it.
+A single uvicorn process runs it from the app lifespan.
+"""
+from database.models import Base, SessionLocal, engine
+from database.migrations import run_migrations
+from database.seed import seed_database
+from database import analytics
+
+_prepared = False
+
+
+def prepare_database() -> bool:
+    """Run the startup steps unless this process (or its parent before forking) already did; True if run."""
+    global _prepared
+    if _prepared:
+        return False
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    seed_database()
+    if analytics.ANALYTICS_COUNTERS:
+        with SessionLocal() as db:
+            analytics.rebuild_counters(db)
+    _prepared = True
+    return True
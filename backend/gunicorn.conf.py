@@ -0,0 +1,54 @@
+"""
+PathFinder AI - multi-worker serving
+  gunicorn -c gunicorn.conf.py main:app
+
+Runs WEB_CONCURRENCY uvicorn workers. With PRELOAD_MODEL=1 (the default)
+the master imports the app and loads the embedding model, the skill
+taxonomy and the saved ANN indexes once (ai_engine/preload.py), then
+forks, so the workers share those pages copy-on-write instead of each
+holding a private copy. Following the gc module's guidance for forking
+servers, the cyclic GC stays off while the master loads, everything is
+gc.freeze()-d right before the workers are forked and each worker turns
+the GC back on. Each worker caps torch at TORCH_THREADS_PER_WORKER threads.
+
+The one-time database steps (tables, migrations, seed, counter backfill)
+also run here in the master, before any worker exists, so N workers never
+race each other through them; the workers' lifespans skip them.
+"""
+import gc
+import os
+
+from ai_engine.preload import preload, init_worker
+from database.models import engine
+from database.startup import prepare_database
+
+PRELOAD_MODEL = os.getenv("PRELOAD_MODEL", "1") == "1"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = PRELOAD_MODEL
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+
+if PRELOAD_MODEL:
+    gc.disable()
+
+
+def on_starting(server):
+    prepare_database()
+    engine.dispose()  # the master serves nothing; don't keep its connections open
+
+
+def when_ready(server):
+    if not PRELOAD_MODEL:
+        return
+    preload()
+    gc.freeze()
+    server.log.info("Preloaded serving state; %d objects frozen for the workers", gc.get_freeze_count())
+
+
+def post_fork(server, worker):
+    gc.enable()
+    threads = init_worker(server.cfg.workers)
+    server.log.info("Worker %s: %d intra-op thread(s)", worker.pid, threads)
@@ -3,31 +3,89 @@ PathFinder AI - FastAPI Backend
 Trust-First Intelligent Campus Placement ERP
 Team algoRhythmss | Hackathon 2026
 """
-import sys, os, uuid, datetime, json
+import sys, os, uuid, datetime, json, time, base64, threading
 from typing import Optional, List
 from contextlib import asynccontextmanager
 sys.path.insert(0, os.path.dirname(__file__))
 
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
-
-from database.models import Base, engine, get_db, Student, PlacementDrive, Application, AuditLog
-from database.seed import seed_database
-from ai_engine.policy_gateway import check_eligibility
-from ai_engine.matcher import compute_crs, extract_skills_from_text
-from ai_engine.audit_logger import create_log, get_logs, export_logs_json, export_logs_csv
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, field_validator
+from sqlalchemy import func, insert, or_, and_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+from database.models import (get_db, SessionLocal, async_engine, get_async_db,
+                             Student, PlacementDrive, Application, AuditLog, BulkImport, Job)
+from database import analytics
+from database.startup import prepare_database
+from ai_engine.policy_gateway import check_eligibility, Cohort, evaluate_policies
+from ai_engine.metrics import registry
+from ai_engine.tracing import TracingMiddleware, span, stage_timings
+from ai_engine.inference_pool import inference_pool, InferenceBusy
+from ai_engine.resume_parser import extract_resume_text
+from ai_engine.matcher import (compute_crs, compute_crs_batch, extract_skills_from_text, precompute_embeddings,
+                               resume_text_for, jd_text_for, warm_crs_cache, model_available, model_key,
+                               fit_fallback_idf, warm_up)
+from ai_engine.embedding_store import store
+from ai_engine.warmup import warmup, WARMUP_ON_STARTUP
+from ai_engine.crs_cache import crs_cache
+from ai_engine.response_cache import response_cache
+from ai_engine.rescore import rescorer
+from ai_engine.jobs import (job_worker, job_kinds, register_job_kind, enqueue_job, cancel_job, job_progress,
+                            JOB_SHARD_SIZE)
+from ai_engine.bulk_import import bulk_importer, job_summary, roster_format, stage_upload
+from ai_engine.ann_index import (student_index, drive_index, sync_indexes, index_student, index_drive, nearest,
+                                 save_indexes)
+from ai_engine.audit_logger import (audit_sink, create_log, acreate_log, create_logs_bulk, build_log_entry, aget_logs,
+                                    iter_logs, stream_logs_json, stream_logs_csv, stream_logs_ndjson, gzip_stream)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    seed_database()
+    prepare_database()  # no-op in gunicorn workers: the master ran it before forking
+    audit_sink.start()
+    rescorer.start()
+    job_worker.start()
+    bulk_importer.resume_interrupted()
+    if WARMUP_ON_STARTUP:
+        warmup.start([("model", lambda: model_key() or "fallback"),
+                      ("warmup_encode", warm_up),
+                      ("indexes", _sync_ann_indexes)],
+                     required=["model", "warmup_encode"])
+    else:
+        threading.Thread(target=_sync_ann_indexes, name="ann-sync", daemon=True).start()
     yield
+    job_worker.close()
+    bulk_importer.close()
+    rescorer.close()
+    save_indexes()
+    audit_sink.close()
+    inference_pool.shutdown()
+    await async_engine.dispose()
+
+def _sync_ann_indexes():
+    with SessionLocal() as db:
+        students = [_student_dict(s) for s in db.query(Student).all()]
+        drives = [_drive_dict(d) for d in db.query(PlacementDrive).all()]
+    try:
+        if not model_available():
+            fit_fallback_idf([resume_text_for(s) for s in students] + [jd_text_for(d) for d in drives])
+        return sync_indexes(students, drives)
+    except Exception as e:
+        print(f"⚠️  ANN index sync failed: {e}; recommendations use exact scoring")
+        raise
 
 app = FastAPI(title="PathFinder AI", version="1.0.0", lifespan=lifespan)
-app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"],
+                   expose_headers=["ETag", "X-Next-Cursor"])
+app.add_middleware(TracingMiddleware)
+
+@app.exception_handler(InferenceBusy)
+async def inference_busy_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
 
 def safe_list(val):
     if val is None: return []
@@ -47,6 +105,12 @@ class StudentCreate(BaseModel):
     certifications: List[str] = []; phone: Optional[str] = None
     resume_text: Optional[str] = None
 
+    # Stored lowercased, as the bulk importer stores them, so one address is one student.
+    @field_validator("email")
+    @classmethod
+    def _normalise_email(cls, v):
+        return v.strip().lower()
+
 class DriveCreate(BaseModel):
     company_name: str; job_role: str; jd_text: Optional[str] = None
     required_skills: List[str] = []; min_cgpa: float = 6.0
@@ -54,26 +118,73 @@ class DriveCreate(BaseModel):
     location: Optional[str] = None; package_min: Optional[float] = None
     package_max: Optional[float] = None; drive_date: Optional[str] = None
 
+# Partial updates: only the fields sent are changed. Edits to scoring inputs
+# re-score the affected applications in the background (ai_engine/rescore.py).
+class StudentUpdate(BaseModel):
+    name: Optional[str] = None; branch: Optional[str] = None; cgpa: Optional[float] = None
+    active_backlogs: Optional[int] = None; graduation_year: Optional[int] = None
+    skills: Optional[List[str]] = None; projects: Optional[List[str]] = None
+    certifications: Optional[List[str]] = None; phone: Optional[str] = None
+    resume_text: Optional[str] = None
+
+    # Omit a field to leave it unchanged; null would break the policy gateway and CRS.
+    @field_validator("name", "branch", "cgpa", "active_backlogs", "skills", "projects", "certifications",
+                     mode="before")
+    @classmethod
+    def _not_null(cls, v):
+        if v is None: raise ValueError("may be omitted but not null")
+        return v
+
+class DriveUpdate(BaseModel):
+    company_name: Optional[str] = None; job_role: Optional[str] = None; jd_text: Optional[str] = None
+    required_skills: Optional[List[str]] = None; min_cgpa: Optional[float] = None
+    max_backlogs: Optional[int] = None; eligible_branches: Optional[List[str]] = None
+    location: Optional[str] = None; package_min: Optional[float] = None
+    package_max: Optional[float] = None; drive_date: Optional[str] = None
+
+    @field_validator("company_name", "job_role", "required_skills", "min_cgpa", "max_backlogs", "eligible_branches",
+                     mode="before")
+    @classmethod
+    def _not_null(cls, v):
+        if v is None: raise ValueError("may be omitted but not null")
+        return v
+
 class ApplyRequest(BaseModel):
     student_id: str; drive_id: str
 
+class JobCreate(BaseModel):
+    kind: str; params: dict = {}
+
 class ShortlistRequest(BaseModel):
     student_id: str; drive_id: str; approved_by: str = "TPO"
 
 # ── Student Routes ────────────────────────────────────────────────────────────
+# Lightweight reads are async (AsyncSession) so they don't hold a threadpool
+# slot while waiting on the database; routes that score stay sync and run in
+# the threadpool, and async routes hand CPU work to the inference pool.
+# List/detail reads are served from the response cache with ETags; `fields`
+# projects keys (e.g. fields=id,name,cgpa) and `limit`/`cursor` paginate by id.
 @app.get("/students", tags=["Students"])
-def list_students(db: Session = Depends(get_db)):
-    return [_student_dict(s) for s in db.query(Student).all()]
+async def list_students(request: Request, fields: Optional[str] = None,
+                        limit: Optional[int] = Query(None, ge=1, le=1000), cursor: Optional[str] = None,
+                        db: AsyncSession = Depends(get_async_db)):
+    keep = _fields(fields, _STUDENT_KEYS)
+    return await _cached_json(request, "students", (keep, limit, cursor),
+                              lambda: _list_page(db, Student, _student_dict, keep, limit, cursor))
 
 @app.get("/students/{student_id}", tags=["Students"])
-def get_student(student_id: str, db: Session = Depends(get_db)):
-    s = db.query(Student).filter(Student.id == student_id).first()
-    if not s: raise HTTPException(404, "Student not found")
-    return _student_dict(s)
+async def get_student(student_id: str, request: Request, fields: Optional[str] = None,
+                      db: AsyncSession = Depends(get_async_db)):
+    keep = _fields(fields, _STUDENT_KEYS)
+    async def load():
+        s = await db.get(Student, student_id)
+        if not s: raise HTTPException(404, "Student not found")
+        return _project(_student_dict(s), keep), {}
+    return await _cached_json(request, "students", keep, load)
 
 @app.post("/students", tags=["Students"])
 def create_student(data: StudentCreate, db: Session = Depends(get_db)):
-    if db.query(Student).filter(Student.email == data.email).first():
+    if db.query(Student).filter(func.lower(Student.email) == data.email).first():
         raise HTTPException(400, f"Email {data.email} already registered")
     s_id = f"STU_{datetime.datetime.utcnow().year}_{str(uuid.uuid4())[:6].upper()}"
     student = Student(id=s_id, name=data.name, email=data.email, branch=data.branch,
@@ -82,61 +193,108 @@ def create_student(data: StudentCreate, db: Session = Depends(get_db)):
                       projects=data.projects, certifications=data.certifications,
                       phone=data.phone, resume_text=data.resume_text)
     db.add(student); db.commit(); db.refresh(student)
+    response_cache.invalidate("students")
+    index_student(_student_dict(student))
+    return _student_dict(student)
+
+@app.put("/students/{student_id}", tags=["Students"])
+def update_student(student_id: str, data: StudentUpdate, db: Session = Depends(get_db)):
+    student = db.query(Student).filter(Student.id == student_id).first()
+    if not student: raise HTTPException(404, "Student not found")
+    for field, value in data.model_dump(exclude_unset=True).items():
+        setattr(student, field, value)
+    db.commit(); db.refresh(student)
+    response_cache.invalidate("students")
+    precompute_embeddings([resume_text_for(_student_dict(student)), " ".join(safe_list(student.projects))])
+    index_student(_student_dict(student))
     return _student_dict(student)
 
 @app.post("/upload-resume", tags=["Students"])
 async def upload_resume(student_id: str = Form(...), resume_text: str = Form(None),
-                        file: UploadFile = File(None), db: Session = Depends(get_db)):
-    student = db.query(Student).filter(Student.id == student_id).first()
+                        file: UploadFile = File(None), db: AsyncSession = Depends(get_async_db)):
+    student = await db.get(Student, student_id)
     if not student: raise HTTPException(404, "Student not found")
     extracted_text = resume_text or ""
     if file:
         content = await file.read()
-        fname = file.filename or ""
-        if fname.lower().endswith(".pdf"):
-            try:
-                from pdfminer.high_level import extract_text_to_fp
-                from pdfminer.layout import LAParams
-                import io
-                out = io.StringIO()
-                extract_text_to_fp(io.BytesIO(content), out, laparams=LAParams())
-                extracted_text = out.getvalue()
-            except Exception:
-                extracted_text = content.decode("utf-8", errors="ignore")
-        else:
-            extracted_text = content.decode("utf-8", errors="ignore")
+        extracted_text = await inference_pool.run(extract_resume_text, content, file.filename or "")
     if not extracted_text.strip():
         raise HTTPException(400, "No content found. Please paste text or upload a valid PDF.")
-    new_skills = extract_skills_from_text(extracted_text)
+    new_skills = await inference_pool.run(extract_skills_from_text, extracted_text)
     merged = list(set(safe_list(student.skills)).union(set(new_skills)))
     student.skills = merged; student.resume_text = extracted_text
-    db.commit()
+    await db.commit()
+    response_cache.invalidate("students")
+    await inference_pool.run(precompute_embeddings, [extracted_text, " ".join(safe_list(student.projects))])
+    await run_in_threadpool(index_student, _student_dict(student))
     return {"message": "Resume uploaded successfully", "student_id": student_id,
             "extracted_skills": new_skills, "total_skills": merged}
 
+@app.post("/students/bulk-import", tags=["Students"], status_code=202)
+async def bulk_import_students(roster: UploadFile = File(...), resumes: UploadFile = File(None),
+                               db: AsyncSession = Depends(get_async_db)):
+    fmt = roster_format(roster.filename)
+    if not fmt: raise HTTPException(400, "Roster must be a .csv, .ndjson or .jsonl file")
+    job = BulkImport(id=str(uuid.uuid4()), roster_name=roster.filename, roster_format=fmt,
+                     has_resumes=resumes is not None, errors=[])
+    try:
+        await run_in_threadpool(stage_upload, job.id, fmt, roster.file, resumes.file if resumes else None)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    db.add(job); await db.commit()
+    bulk_importer.submit(job.id)
+    return {"job_id": job.id, "status": job.status, "status_url": f"/students/bulk-import/{job.id}"}
+
+@app.get("/students/bulk-import/{job_id}", tags=["Students"])
+async def bulk_import_status(job_id: str, errors_limit: int = Query(100, ge=0, le=1000),
+                             db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(BulkImport, job_id)
+    if not job: raise HTTPException(404, "Import job not found")
+    return job_summary(job, errors_limit)
+
+@app.post("/students/bulk-import/{job_id}/resume", tags=["Students"], status_code=202)
+async def resume_bulk_import(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(BulkImport, job_id)
+    if not job: raise HTTPException(404, "Import job not found")
+    if job.status != "failed": raise HTTPException(409, f"Job is {job.status}; only failed jobs can be resumed")
+    job.status = "queued"; await db.commit()
+    bulk_importer.submit(job_id)
+    return {"job_id": job_id, "status": "queued", "resume_from_row": job.processed_rows + 1}
+
 @app.get("/eligibility/{student_id}", tags=["Students"])
-def get_eligibility(student_id: str, db: Session = Depends(get_db)):
+def get_eligibility(student_id: str, details: bool = True, db: Session = Depends(get_db)):
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student: raise HTTPException(404, "Student not found")
-    drives = db.query(PlacementDrive).filter(PlacementDrive.status == "active").all()
+    drives = [_drive_dict(d) for d in db.query(PlacementDrive).filter(PlacementDrive.status == "active").all()]
+    matrix = evaluate_policies(Cohort([_student_dict(student)]), drives)
     results = []
-    for drive in drives:
-        pr = check_eligibility(_student_dict(student), _drive_dict(drive))
-        results.append({"drive_id": drive.id, "company_name": drive.company_name,
-                        "job_role": drive.job_role, "eligible": pr["passed"],
-                        "checks": pr["checks"], "reasoning": pr["reasoning"]})
+    for j, drive in enumerate(drives):
+        row = {"drive_id": drive["id"], "company_name": drive["company_name"],
+               "job_role": drive["job_role"], "eligible": bool(matrix.eligible[0, j])}
+        if details:
+            pr = matrix.explain(0, j)
+            row.update(checks=pr["checks"], reasoning=pr["reasoning"])
+        results.append(row)
     return {"student_id": student_id, "student_name": student.name, "eligibility": results}
 
 # ── Drive Routes ──────────────────────────────────────────────────────────────
 @app.get("/drives", tags=["Drives"])
-def list_drives(db: Session = Depends(get_db)):
-    return [_drive_dict(d) for d in db.query(PlacementDrive).all()]
+async def list_drives(request: Request, fields: Optional[str] = None,
+                      limit: Optional[int] = Query(None, ge=1, le=1000), cursor: Optional[str] = None,
+                      db: AsyncSession = Depends(get_async_db)):
+    keep = _fields(fields, _DRIVE_KEYS)
+    return await _cached_json(request, "drives", (keep, limit, cursor),
+                              lambda: _list_page(db, PlacementDrive, _drive_dict, keep, limit, cursor))
 
 @app.get("/drives/{drive_id}", tags=["Drives"])
-def get_drive(drive_id: str, db: Session = Depends(get_db)):
-    d = db.query(PlacementDrive).filter(PlacementDrive.id == drive_id).first()
-    if not d: raise HTTPException(404, "Drive not found")
-    return _drive_dict(d)
+async def get_drive(drive_id: str, request: Request, fields: Optional[str] = None,
+                    db: AsyncSession = Depends(get_async_db)):
+    keep = _fields(fields, _DRIVE_KEYS)
+    async def load():
+        d = await db.get(PlacementDrive, drive_id)
+        if not d: raise HTTPException(404, "Drive not found")
+        return _project(_drive_dict(d), keep), {}
+    return await _cached_json(request, "drives", keep, load)
 
 @app.post("/create-drive", tags=["Drives"])
 def create_drive(data: DriveCreate, db: Session = Depends(get_db)):
@@ -148,6 +306,21 @@ def create_drive(data: DriveCreate, db: Session = Depends(get_db)):
                            location=data.location, package_min=data.package_min,
                            package_max=data.package_max, drive_date=data.drive_date)
     db.add(drive); db.commit(); db.refresh(drive)
+    response_cache.invalidate("drives")
+    precompute_embeddings([data.jd_text or " ".join(skills)])
+    index_drive(_drive_dict(drive))
+    return _drive_dict(drive)
+
+@app.put("/drives/{drive_id}", tags=["Drives"])
+def update_drive(drive_id: str, data: DriveUpdate, db: Session = Depends(get_db)):
+    drive = db.query(PlacementDrive).filter(PlacementDrive.id == drive_id).first()
+    if not drive: raise HTTPException(404, "Drive not found")
+    for field, value in data.model_dump(exclude_unset=True).items():
+        setattr(drive, field, value)
+    db.commit(); db.refresh(drive)
+    response_cache.invalidate("drives")
+    precompute_embeddings([jd_text_for(_drive_dict(drive))])
+    index_drive(_drive_dict(drive))
     return _drive_dict(drive)
 
 @app.put("/drives/{drive_id}/status", tags=["Drives"])
@@ -155,19 +328,26 @@ def update_drive_status(drive_id: str, status: str = Query(...), db: Session = D
     drive = db.query(PlacementDrive).filter(PlacementDrive.id == drive_id).first()
     if not drive: raise HTTPException(404, "Drive not found")
     drive.status = status; db.commit()
+    response_cache.invalidate("drives")
     return {"message": f"Status updated to '{status}'"}
 
 # ── Application Routes ────────────────────────────────────────────────────────
 @app.post("/apply", tags=["Applications"])
 def apply_to_drive(req: ApplyRequest, db: Session = Depends(get_db)):
-    student = db.query(Student).filter(Student.id == req.student_id).first()
-    if not student: raise HTTPException(404, "Student not found")
-    drive = db.query(PlacementDrive).filter(PlacementDrive.id == req.drive_id).first()
-    if not drive: raise HTTPException(404, "Drive not found")
-
-    existing = db.query(Application).filter(
-        Application.student_id == req.student_id,
-        Application.drive_id == req.drive_id).first()
+    # Each stage is a tracing span (pathfinder_pipeline_stage_seconds on /metrics);
+    # the timings so far are stored on the audit entry. "audit" only builds the
+    # entry — its insert is part of the "persist" commit.
+    with span("db_lookup"):
+        student = db.query(Student).filter(Student.id == req.student_id).first()
+        if not student: raise HTTPException(404, "Student not found")
+        drive = db.query(PlacementDrive).filter(PlacementDrive.id == req.drive_id).first()
+        if not drive: raise HTTPException(404, "Drive not found")
+
+        # Cheap early exit; the unique (student_id, drive_id) index is what
+        # actually guards against concurrent double applications.
+        existing = db.query(Application).filter(
+            Application.student_id == req.student_id,
+            Application.drive_id == req.drive_id).first()
     if existing:
         return {"message": "Already applied", "application": _app_dict(existing)}
 
@@ -175,21 +355,29 @@ def apply_to_drive(req: ApplyRequest, db: Session = Depends(get_db)):
     drive_data   = _drive_dict(drive)
 
     # Step 1: Policy Gateway
-    policy_result = check_eligibility(student_data, drive_data)
+    with span("policy"):
+        policy_result = check_eligibility(student_data, drive_data)
     app_id = str(uuid.uuid4())
 
     if not policy_result["passed"]:
         application = Application(id=app_id, student_id=req.student_id, drive_id=req.drive_id,
                                   policy_passed=False, policy_details=policy_result,
                                   matched_skills=[], missing_skills=[], status="rejected")
-        db.add(application); db.commit()
-        create_log(db, req.student_id, req.drive_id, "POLICY_REJECTED", "FAILED",
-                   policy_result, final_decision="REJECTED", reasoning=policy_result["reasoning"])
+        with span("audit"):
+            create_log(db, req.student_id, req.drive_id, "POLICY_REJECTED", "FAILED",
+                       policy_result, final_decision="REJECTED", reasoning=policy_result["reasoning"],
+                       commit=False, stage_timings=stage_timings())
+        with span("persist"):
+            analytics.record_applications(db, req.drive_id, {"rejected": 1})
+            existing = _commit_application(db, application)
+        if existing:
+            return {"message": "Already applied", "application": _app_dict(existing)}
         return {"status": "REJECTED", "reason": "Policy check failed",
                 "policy_result": policy_result, "crs": None}
 
-    # Step 2: AI Matcher
-    crs_raw = compute_crs(student_data, drive_data)
+    # Step 2: AI Matcher (embed/similarity/skill_match spans inside unless the CRS cache hits)
+    with span("crs"):
+        crs_raw = compute_crs(student_data, drive_data)
     crs_score  = float(crs_raw.get("crs_score") or 0)
     sem_score  = float(crs_raw.get("semantic_score") or 0)
     proj_score = float(crs_raw.get("project_score") or 0)
@@ -203,12 +391,18 @@ def apply_to_drive(req: ApplyRequest, db: Session = Depends(get_db)):
                               crs_score=crs_score, semantic_score=sem_score,
                               project_score=proj_score, completeness_score=comp_score,
                               matched_skills=matched, missing_skills=missing, status="eligible")
-    db.add(application); db.commit(); db.refresh(application)
 
-    # Step 3: Audit Log
-    create_log(db, req.student_id, req.drive_id, "AI_SCORED", "PASSED", policy_result,
-               ai_score=crs_score, missing_skills=missing, final_decision="ELIGIBLE",
-               reasoning=f"Policy: PASSED. CRS: {crs_score}/100 (Sem:{sem_score} Proj:{proj_score} Comp:{comp_score}). Missing: {', '.join(missing) or 'None'}")
+    # Step 3: Audit Log — committed together with the application
+    with span("audit"):
+        create_log(db, req.student_id, req.drive_id, "AI_SCORED", "PASSED", policy_result,
+                   ai_score=crs_score, missing_skills=missing, final_decision="ELIGIBLE",
+                   reasoning=_crs_reasoning(crs_score, sem_score, proj_score, comp_score, missing),
+                   commit=False, stage_timings=stage_timings())
+    with span("persist"):
+        analytics.record_applications(db, req.drive_id, {"eligible": 1}, crs_sum=crs_score, crs_count=1)
+        existing = _commit_application(db, application)
+    if existing:
+        return {"message": "Already applied", "application": _app_dict(existing)}
 
     return {"status": "ELIGIBLE", "application_id": app_id, "policy_result": policy_result,
             "crs": {"crs_score": crs_score, "semantic_score": sem_score,
@@ -216,15 +410,81 @@ def apply_to_drive(req: ApplyRequest, db: Session = Depends(get_db)):
                     "matched_skills": matched, "missing_skills": missing,
                     "improvement_suggestions": suggestions}}
 
+@app.post("/drives/{drive_id}/score-all", tags=["Applications"])
+def score_all_students(drive_id: str, top: int = Query(50, ge=0), background: bool = False,
+                       db: Session = Depends(get_db)):
+    started = time.perf_counter()
+    drive = db.query(PlacementDrive).filter(PlacementDrive.id == drive_id).first()
+    if not drive: raise HTTPException(404, "Drive not found")
+    if background:
+        # Sharded across job workers instead of scoring inside this request (see /jobs).
+        job = enqueue_job(db, "score_drive", {"drive_id": drive_id})
+        return JSONResponse(status_code=202, content=job_progress(db, job))
+    drive_data = _drive_dict(drive)
+    applied = {sid for (sid,) in db.query(Application.student_id).filter(Application.drive_id == drive_id)}
+    students = [_student_dict(s) for s in db.query(Student).all() if s.id not in applied]
+    try:
+        ranking = _score_students(db, drive_id, drive_data, students)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(409, "Applications were created concurrently for this drive; retry scoring")
+
+    ranking.sort(key=lambda r: r["crs_score"], reverse=True)
+    return {"drive_id": drive_id, "scored": len(ranking), "rejected": len(students) - len(ranking),
+            "skipped_existing": len(applied), "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "ranking": [{"rank": i + 1, **r} for i, r in enumerate(ranking[:top])]}
+
+def _score_students(db, drive_id, drive_data, students):
+    """Policy-check and score `students` for a drive and add their applications and audit rows (no commit)."""
+    # Step 1: Policy Gateway as a filter over the whole cohort
+    matrix = evaluate_policies(Cohort(students), [drive_data])
+    app_rows, log_rows, passed = [], [], []
+    for i, s in enumerate(students):
+        pr = matrix.explain(i, 0)
+        if matrix.eligible[i, 0]:
+            passed.append((s, pr)); continue
+        app_rows.append(_bulk_app_row(s["id"], drive_id, pr, None))
+        log_rows.append(build_log_entry(s["id"], drive_id, "POLICY_REJECTED", "FAILED", pr,
+                                        final_decision="REJECTED", reasoning=pr["reasoning"]))
+
+    # Step 2: AI Matcher — one batched encode and one matrix-vector product
+    ranking = []
+    for (s, pr), crs in zip(passed, compute_crs_batch([s for s, _ in passed], drive_data)):
+        app_rows.append(_bulk_app_row(s["id"], drive_id, pr, crs))
+        log_rows.append(build_log_entry(s["id"], drive_id, "AI_SCORED", "PASSED", pr,
+                                        ai_score=crs["crs_score"], missing_skills=crs["missing_skills"],
+                                        final_decision="ELIGIBLE",
+                                        reasoning=_crs_reasoning(crs["crs_score"], crs["semantic_score"],
+                                                                 crs["project_score"], crs["completeness_score"],
+                                                                 crs["missing_skills"])))
+        ranking.append({"student_id": s["id"], "student_name": s["name"], "crs_score": crs["crs_score"]})
+
+    # Step 3: bulk insert applications and audit rows in the caller's transaction
+    if app_rows: db.execute(insert(Application), app_rows)
+    analytics.record_applications(db, drive_id, {"eligible": len(passed), "rejected": len(students) - len(passed)},
+                                  crs_sum=sum(r["crs_score"] for r in ranking), crs_count=len(ranking))
+    create_logs_bulk(db, log_rows)
+    return ranking
+
 @app.get("/shortlist/{drive_id}", tags=["Applications"])
-def get_shortlist(drive_id: str, db: Session = Depends(get_db)):
-    apps = (db.query(Application)
-            .filter(Application.drive_id == drive_id, Application.policy_passed == True)
-            .order_by(Application.crs_score.desc()).all())
+async def get_shortlist(drive_id: str, limit: Optional[int] = Query(None, ge=1, le=1000),
+                        cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    eligible = (Application.drive_id == drive_id, Application.policy_passed == True)
+    q = select(Application).options(joinedload(Application.student)).where(*eligible)
+    rank = 0
+    if cursor:
+        rank, score, last_id = _decode_cursor(cursor)
+        q = q.where(or_(Application.crs_score < score,
+                        and_(Application.crs_score == score, Application.id > last_id)))
+    q = q.order_by(Application.crs_score.desc(), Application.id).limit(limit + 1 if limit else None)
+    apps = list((await db.execute(q)).scalars())
+    has_more = bool(limit) and len(apps) > limit
+    apps = apps[:limit] if limit else apps
     results = []
     for app in apps:
-        s = db.query(Student).filter(Student.id == app.student_id).first()
-        results.append({"rank": len(results)+1, "student_id": app.student_id,
+        s = app.student
+        results.append({"rank": rank+len(results)+1, "student_id": app.student_id,
                         "student_name": s.name if s else "Unknown",
                         "branch": s.branch if s else "", "cgpa": s.cgpa if s else 0,
                         "crs_score": app.crs_score or 0, "semantic_score": app.semantic_score or 0,
@@ -233,26 +493,35 @@ def get_shortlist(drive_id: str, db: Session = Depends(get_db)):
                         "missing_skills": safe_list(app.missing_skills),
                         "status": app.status,
                         "applied_at": app.applied_at.isoformat() if app.applied_at else None})
-    return {"drive_id": drive_id, "total_eligible": len(results), "candidates": results}
+    next_cursor = _encode_cursor(rank + len(results), apps[-1]) if has_more else None
+    # A page only holds part of the list; count the rest on the (drive_id, policy_passed) index.
+    total = len(results) if not limit and not cursor else \
+        (await db.execute(select(func.count()).select_from(Application).where(*eligible))).scalar_one()
+    return {"drive_id": drive_id, "total_eligible": total, "candidates": results,
+            "next_cursor": next_cursor}
 
 @app.post("/shortlist/approve", tags=["Applications"])
-def approve_shortlist(req: ShortlistRequest, db: Session = Depends(get_db)):
-    app = db.query(Application).filter(Application.student_id == req.student_id,
-                                       Application.drive_id == req.drive_id).first()
+async def approve_shortlist(req: ShortlistRequest, db: AsyncSession = Depends(get_async_db)):
+    app = (await db.execute(select(Application).where(Application.student_id == req.student_id,
+                                                      Application.drive_id == req.drive_id))).scalar()
     if not app: raise HTTPException(404, "Application not found")
+    await db.run_sync(analytics.record_status_change, req.drive_id, app.status, "shortlisted")
     app.status = "shortlisted"; app.shortlisted_by = req.approved_by
-    app.updated_at = datetime.datetime.utcnow(); db.commit()
-    create_log(db, req.student_id, req.drive_id, "SHORTLISTED", "PASSED",
-               ai_score=app.crs_score, final_decision="SHORTLISTED",
-               reasoning=f"Approved by {req.approved_by}. CRS: {app.crs_score}/100.", actor=req.approved_by)
+    app.updated_at = datetime.datetime.utcnow()
+    await acreate_log(db, req.student_id, req.drive_id, "SHORTLISTED", "PASSED",
+                      ai_score=app.crs_score, final_decision="SHORTLISTED",
+                      reasoning=f"Approved by {req.approved_by}. CRS: {app.crs_score}/100.", actor=req.approved_by,
+                      commit=False)
+    await db.commit()
     return {"message": "Candidate shortlisted", "student_id": req.student_id}
 
 @app.get("/applications/{student_id}", tags=["Applications"])
-def get_student_applications(student_id: str, db: Session = Depends(get_db)):
-    apps = db.query(Application).filter(Application.student_id == student_id).all()
+async def get_student_applications(student_id: str, db: AsyncSession = Depends(get_async_db)):
+    apps = (await db.execute(select(Application).options(joinedload(Application.drive))
+                             .where(Application.student_id == student_id))).scalars()
     results = []
     for app in apps:
-        drive = db.query(PlacementDrive).filter(PlacementDrive.id == app.drive_id).first()
+        drive = app.drive
         results.append({**_app_dict(app),
                         "company_name": drive.company_name if drive else "",
                         "job_role": drive.job_role if drive else "",
@@ -261,49 +530,213 @@ def get_student_applications(student_id: str, db: Session = Depends(get_db)):
                         "package_max": drive.package_max if drive else None})
     return results
 
+# ── Recommendation Routes ─────────────────────────────────────────────────────
+@app.get("/drives/{drive_id}/recommend", tags=["Recommendations"])
+def recommend_students(drive_id: str, k: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
+    drive = db.query(PlacementDrive).filter(PlacementDrive.id == drive_id).first()
+    if not drive: raise HTTPException(404, "Drive not found")
+    drive_data = _drive_dict(drive)
+    eligible = {}
+    def accept(ids=None):
+        students = [_student_dict(s) for s in _rows_by_id(db.query(Student), Student.id, ids)]
+        matrix = evaluate_policies(Cohort(students), [drive_data])
+        eligible.update((s["id"], s) for i, s in enumerate(students) if matrix.eligible[i, 0])
+        return [s["id"] for i, s in enumerate(students) if matrix.eligible[i, 0]]
+
+    # Nearest resumes that pass the policy filter (2k of them, so the CRS
+    # re-rank has room to reorder), or every eligible student without an index.
+    hits = nearest(student_index, jd_text_for(drive_data), 2 * k, accept)
+    if hits is None:
+        accept()
+        candidates = list(eligible.values())
+    else:
+        candidates = [eligible[sid] for sid, _ in hits]
+    scored = sorted(zip(candidates, compute_crs_batch(candidates, drive_data)),
+                    key=lambda pair: pair[1]["crs_score"], reverse=True)[:k]
+    return {"drive_id": drive_id, "method": "exact" if hits is None else "ann",
+            "candidates_considered": len(candidates),
+            "recommendations": [{"rank": i + 1, "student_id": s["id"], "student_name": s["name"],
+                                 "branch": s["branch"], "cgpa": s["cgpa"], **_crs_summary(crs)}
+                                for i, (s, crs) in enumerate(scored)]}
+
+@app.get("/students/{student_id}/recommend-drives", tags=["Recommendations"])
+def recommend_drives(student_id: str, k: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+    student = db.query(Student).filter(Student.id == student_id).first()
+    if not student: raise HTTPException(404, "Student not found")
+    student_data = _student_dict(student)
+    eligible = {}
+    def accept(ids=None):
+        active = db.query(PlacementDrive).filter(PlacementDrive.status == "active")
+        drives = [_drive_dict(d) for d in _rows_by_id(active, PlacementDrive.id, ids)]
+        matrix = evaluate_policies(Cohort([student_data]), drives)
+        eligible.update((d["id"], d) for j, d in enumerate(drives) if matrix.eligible[0, j])
+        return [d["id"] for j, d in enumerate(drives) if matrix.eligible[0, j]]
+
+    hits = nearest(drive_index, resume_text_for(student_data), 2 * k, accept)
+    if hits is None:
+        accept()
+        candidates = list(eligible.values())
+    else:
+        candidates = [eligible[did] for did, _ in hits]
+    scored = sorted(((d, compute_crs(student_data, d)) for d in candidates),
+                    key=lambda pair: pair[1]["crs_score"], reverse=True)[:k]
+    return {"student_id": student_id, "method": "exact" if hits is None else "ann",
+            "candidates_considered": len(candidates),
+            "recommendations": [{"rank": i + 1, "drive_id": d["id"], "company_name": d["company_name"],
+                                 "job_role": d["job_role"], "location": d["location"],
+                                 "package_min": d["package_min"], "package_max": d["package_max"],
+                                 **_crs_summary(crs)}
+                                for i, (d, crs) in enumerate(scored)]}
+
+# ── Job Routes ────────────────────────────────────────────────────────────────
+# Durable, sharded background jobs (ai_engine/jobs.py), drained by job workers
+# in this process (JOB_WORKER_THREADS) and by `python worker.py` processes.
+@app.post("/jobs", tags=["Jobs"], status_code=202)
+def create_job(data: JobCreate, db: Session = Depends(get_db)):
+    if data.kind not in job_kinds:
+        raise HTTPException(400, f"Unknown job kind '{data.kind}' (expected one of: {', '.join(sorted(job_kinds))})")
+    try:
+        job = enqueue_job(db, data.kind, data.params)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    return job_progress(db, job)
+
+@app.get("/jobs", tags=["Jobs"])
+async def list_jobs(status: Optional[str] = None, kind: Optional[str] = None,
+                    limit: int = Query(50, ge=1, le=500), db: AsyncSession = Depends(get_async_db)):
+    q = select(Job).order_by(Job.created_at.desc()).limit(limit)
+    if status: q = q.where(Job.status == status)
+    if kind: q = q.where(Job.kind == kind)
+    return [_job_dict(j) for j in (await db.execute(q)).scalars()]
+
+@app.get("/jobs/{job_id}", tags=["Jobs"])
+async def get_job(job_id: str, errors_limit: int = Query(20, ge=0, le=1000),
+                  db: AsyncSession = Depends(get_async_db)):
+    job = await db.get(Job, job_id)
+    if not job: raise HTTPException(404, "Job not found")
+    return await db.run_sync(job_progress, job, errors_limit)
+
+@app.post("/jobs/{job_id}/cancel", tags=["Jobs"])
+def cancel_job_route(job_id: str, db: Session = Depends(get_db)):
+    job = db.get(Job, job_id)
+    if not job: raise HTTPException(404, "Job not found")
+    if not cancel_job(db, job_id):
+        raise HTTPException(409, f"Job is already {job.status}")
+    db.refresh(job)
+    return job_progress(db, job)
+
+def _plan_score_drive(db, params):
+    drive_id = params.get("drive_id")
+    if not drive_id or not db.get(PlacementDrive, drive_id):
+        raise ValueError(f"Drive '{drive_id}' not found")
+    applied = {sid for (sid,) in db.query(Application.student_id).filter(Application.drive_id == drive_id)}
+    ids = [sid for (sid,) in db.query(Student.id).order_by(Student.id) if sid not in applied]
+    return [{"student_ids": ids[i:i + JOB_SHARD_SIZE]} for i in range(0, len(ids), JOB_SHARD_SIZE)]
+
+def _run_score_drive(db, params, payload):
+    drive = db.get(PlacementDrive, params["drive_id"])
+    if not drive: raise ValueError(f"Drive '{params['drive_id']}' was deleted")
+    ids = payload["student_ids"]
+    # Retries and re-leased shards skip students whose application already committed.
+    applied = {sid for (sid,) in db.query(Application.student_id)
+               .filter(Application.drive_id == drive.id, Application.student_id.in_(ids))}
+    students = [_student_dict(s) for s in db.query(Student).filter(Student.id.in_(ids)).order_by(Student.id)
+                if s.id not in applied]
+    ranking = _score_students(db, drive.id, _drive_dict(drive), students)
+    return {"scored": len(ranking), "rejected": len(students) - len(ranking), "skipped_existing": len(applied)}
+
+def _run_rebuild_indexes(db, params, payload):
+    # Rebuilds this process's indexes and saves them to ANN_INDEX_DIR; serving
+    # processes reload the newer files on their next recommendation query.
+    results = _sync_ann_indexes() or []
+    save_indexes()
+    return {"indexes": len(results), "vectors": sum(r.get("size", 0) for r in results)}
+
+register_job_kind("score_drive", _plan_score_drive, _run_score_drive)
+register_job_kind("rebuild_indexes", lambda db, params: [{}], _run_rebuild_indexes)
+
 # ── Audit Routes ──────────────────────────────────────────────────────────────
 @app.get("/audit-logs", tags=["Audit"])
-def list_audit_logs(student_id: Optional[str] = None, drive_id: Optional[str] = None,
-                    limit: int = 100, db: Session = Depends(get_db)):
-    return [_log_dict(l) for l in get_logs(db, student_id, drive_id, limit)]
+async def list_audit_logs(student_id: Optional[str] = None, drive_id: Optional[str] = None,
+                          limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    return [_log_dict(l) for l in await aget_logs(db, student_id, drive_id, limit)]
 
 @app.get("/audit-logs/export/json", tags=["Audit"])
-def export_json_logs(student_id: Optional[str] = None, drive_id: Optional[str] = None,
-                     db: Session = Depends(get_db)):
-    logs = get_logs(db, student_id, drive_id, 1000)
-    return Response(content=export_logs_json(logs), media_type="application/json",
-                    headers={"Content-Disposition": "attachment; filename=audit_logs.json"})
+def export_json_logs(student_id: Optional[str] = None, drive_id: Optional[str] = None, gzip: bool = False):
+    return _export_response(stream_logs_json, "json", "application/json", student_id, drive_id, gzip)
 
 @app.get("/audit-logs/export/csv", tags=["Audit"])
-def export_csv_logs(student_id: Optional[str] = None, drive_id: Optional[str] = None,
-                    db: Session = Depends(get_db)):
-    logs = get_logs(db, student_id, drive_id, 1000)
-    return Response(content=export_logs_csv(logs), media_type="text/csv",
-                    headers={"Content-Disposition": "attachment; filename=audit_logs.csv"})
+def export_csv_logs(student_id: Optional[str] = None, drive_id: Optional[str] = None, gzip: bool = False):
+    return _export_response(stream_logs_csv, "csv", "text/csv", student_id, drive_id, gzip)
+
+@app.get("/audit-logs/export/ndjson", tags=["Audit"])
+def export_ndjson_logs(student_id: Optional[str] = None, drive_id: Optional[str] = None, gzip: bool = False):
+    return _export_response(stream_logs_ndjson, "ndjson", "application/x-ndjson", student_id, drive_id, gzip)
+
+def _export_response(serializer, ext, media_type, student_id, drive_id, gzip):
+    # The stream outlives the request-scoped session, so it owns its own.
+    def body():
+        with SessionLocal() as db:
+            yield from serializer(iter_logs(db, student_id, drive_id))
+    chunks, filename = body(), f"audit_logs.{ext}"
+    if gzip:
+        chunks, filename, media_type = gzip_stream(chunks), filename + ".gz", "application/gzip"
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={"Content-Disposition": f"attachment; filename={filename}"})
 
 # ── Analytics Routes ──────────────────────────────────────────────────────────
 @app.get("/analytics/overview", tags=["Analytics"])
-def get_analytics(db: Session = Depends(get_db)):
-    total_students = db.query(Student).count()
-    return {"total_students": total_students,
-            "total_drives": db.query(PlacementDrive).count(),
-            "active_drives": db.query(PlacementDrive).filter(PlacementDrive.status=="active").count(),
-            "total_applications": db.query(Application).count(),
-            "shortlisted": db.query(Application).filter(Application.status=="shortlisted").count(),
-            "rejected": db.query(Application).filter(Application.status=="rejected").count(),
-            "eligible": db.query(Application).filter(Application.status=="eligible").count(),
-            "placement_rate": round(db.query(Application).filter(Application.status=="shortlisted").count() / total_students * 100, 1) if total_students else 0}
+async def get_analytics(db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(analytics.overview)
 
 @app.get("/analytics/drive/{drive_id}", tags=["Analytics"])
-def drive_analytics(drive_id: str, db: Session = Depends(get_db)):
-    total = db.query(Application).filter(Application.drive_id==drive_id).count()
-    apps  = db.query(Application).filter(Application.drive_id==drive_id, Application.crs_score.isnot(None)).all()
-    return {"drive_id": drive_id, "total_applicants": total,
-            "eligible": db.query(Application).filter(Application.drive_id==drive_id, Application.status.in_(["eligible","shortlisted"])).count(),
-            "rejected": db.query(Application).filter(Application.drive_id==drive_id, Application.status=="rejected").count(),
-            "shortlisted": db.query(Application).filter(Application.drive_id==drive_id, Application.status=="shortlisted").count(),
-            "average_crs": round(sum(a.crs_score for a in apps)/len(apps),1) if apps else 0,
-            "pass_rate": round(db.query(Application).filter(Application.drive_id==drive_id, Application.status.in_(["eligible","shortlisted"])).count() / total * 100, 1) if total else 0}
+async def drive_analytics(drive_id: str, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(analytics.drive_stats, drive_id)
+
+# ── Admin Routes ──────────────────────────────────────────────────────────────
+@app.post("/admin/crs-cache/warm/{drive_id}", tags=["Admin"])
+def warm_crs_cache_for_drive(drive_id: str, db: Session = Depends(get_db)):
+    started = time.perf_counter()
+    drive = db.query(PlacementDrive).filter(PlacementDrive.id == drive_id).first()
+    if not drive: raise HTTPException(404, "Drive not found")
+    drive_data = _drive_dict(drive)
+    students = [_student_dict(s) for s in db.query(Student).all()]
+    matrix = evaluate_policies(Cohort(students), [drive_data])
+    result = warm_crs_cache([s for i, s in enumerate(students) if matrix.eligible[i, 0]], drive_data)
+    return {"drive_id": drive_id, **result, "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+@app.get("/admin/crs-cache/stats", tags=["Admin"])
+def crs_cache_stats():
+    return crs_cache.stats()
+
+@app.get("/admin/response-cache/stats", tags=["Admin"])
+def response_cache_stats():
+    return response_cache.stats()
+
+@app.get("/admin/rescore/stats", tags=["Admin"])
+def rescore_stats():
+    return rescorer.stats()
+
+# ── Monitoring Routes ─────────────────────────────────────────────────────────
+@app.get("/healthz", tags=["Monitoring"])
+def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz", tags=["Monitoring"])
+def readyz():
+    checks = {"warmup": warmup.ready()}
+    for name, probe in (("database", _ping_db), ("embedding_store", store.ping)):
+        try:
+            probe(); checks[name] = True
+        except Exception as e:
+            checks[name] = False; checks[f"{name}_error"] = str(e)
+    ready = all(v for k, v in checks.items() if not k.endswith("_error"))
+    return JSONResponse(status_code=200 if ready else 503,
+                        content={"ready": ready, "checks": checks, "startup": warmup.report()})
+
+@app.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 def _student_dict(s):
@@ -322,20 +755,114 @@ def _drive_dict(d):
             "drive_date": d.drive_date, "status": d.status, "created_by": d.created_by,
             "created_at": d.created_at.isoformat() if d.created_at else None}
 
+_STUDENT_KEYS = ("id", "name", "email", "branch", "cgpa", "active_backlogs", "graduation_year", "resume_text",
+                 "skills", "projects", "certifications", "phone", "created_at")
+_DRIVE_KEYS = ("id", "company_name", "job_role", "jd_text", "required_skills", "min_cgpa", "max_backlogs",
+               "eligible_branches", "location", "package_min", "package_max", "drive_date", "status",
+               "created_by", "created_at")
+
+def _fields(fields, allowed):
+    """Parse a `fields=a,b` projection; None means every field."""
+    if not fields: return None
+    keep = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in keep if f not in allowed]
+    if unknown: raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+    return keep
+
+def _project(row, keep):
+    return row if keep is None else {k: row[k] for k in keep}
+
+async def _list_page(db, model, to_dict, keep, limit, cursor):
+    """One page of `model` rows ordered by id (or all rows, unordered, without paging)."""
+    q, headers = select(model), {}
+    if limit or cursor:
+        q = q.order_by(model.id)
+        if cursor: q = q.where(model.id > cursor)
+        if limit: q = q.limit(limit + 1)
+    rows = [to_dict(r) for r in (await db.execute(q)).scalars()]
+    if limit and len(rows) > limit:
+        rows = rows[:limit]; headers["X-Next-Cursor"] = rows[-1]["id"]
+    return [_project(r, keep) for r in rows], headers
+
+async def _cached_json(request, namespace, key, loader):
+    """Serve `loader()`'s payload from the response cache, honouring If-None-Match."""
+    entry = await response_cache.get_or_build(namespace, (request.url.path, key), loader)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", **entry.headers}
+    if entry.matches(request.headers.get("if-none-match")):
+        response_cache.not_modified(namespace)
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
 def _app_dict(a):
     return {"id": a.id, "student_id": a.student_id, "drive_id": a.drive_id,
             "policy_passed": a.policy_passed, "policy_details": a.policy_details,
             "crs_score": a.crs_score or 0, "semantic_score": a.semantic_score or 0,
             "project_score": a.project_score or 0, "completeness_score": a.completeness_score or 0,
             "matched_skills": safe_list(a.matched_skills), "missing_skills": safe_list(a.missing_skills),
-            "status": a.status, "applied_at": a.applied_at.isoformat() if a.applied_at else None}
+            "status": a.status, "score_version": a.score_version,
+            "applied_at": a.applied_at.isoformat() if a.applied_at else None}
+
+def _bulk_app_row(student_id, drive_id, policy_result, crs):
+    crs = crs or {}
+    return {"id": str(uuid.uuid4()), "student_id": student_id, "drive_id": drive_id,
+            "policy_passed": policy_result["passed"], "policy_details": policy_result,
+            "crs_score": crs.get("crs_score"), "semantic_score": crs.get("semantic_score"),
+            "project_score": crs.get("project_score"), "completeness_score": crs.get("completeness_score"),
+            "matched_skills": crs.get("matched_skills", []), "missing_skills": crs.get("missing_skills", []),
+            "status": "eligible" if policy_result["passed"] else "rejected"}
+
+def _commit_application(db, application):
+    """Insert an application; if the pair already exists, return the stored row instead."""
+    db.add(application)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return db.query(Application).filter(Application.student_id == application.student_id,
+                                            Application.drive_id == application.drive_id).first()
+    return None
+
+def _encode_cursor(rank, app):
+    raw = f"{rank}|{app.crs_score!r}|{app.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    try:
+        rank, score, app_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 2)
+        return int(rank), float(score), app_id
+    except Exception:
+        raise HTTPException(400, "Invalid cursor")
+
+def _rows_by_id(query, column, ids, chunk=500):
+    """All rows of `query`, or those whose `column` is in `ids` (chunked IN lists)."""
+    if ids is None: return query.all()
+    return [row for i in range(0, len(ids), chunk) for row in query.filter(column.in_(ids[i:i + chunk]))]
+
+def _ping_db():
+    with SessionLocal() as db:
+        db.execute(text("SELECT 1"))
+
+def _crs_summary(crs):
+    return {k: crs[k] for k in ("crs_score", "semantic_score", "project_score", "completeness_score",
+                                "matched_skills", "missing_skills")}
+
+def _crs_reasoning(crs_score, sem_score, proj_score, comp_score, missing):
+    return (f"Policy: PASSED. CRS: {crs_score}/100 (Sem:{sem_score} Proj:{proj_score} Comp:{comp_score}). "
+            f"Missing: {', '.join(missing) or 'None'}")
+
+def _job_dict(j):
+    return {"job_id": j.id, "kind": j.kind, "params": j.params, "status": j.status,
+            "total_shards": j.total_shards, "done_shards": j.done_shards, "failed_shards": j.failed_shards,
+            "created_at": j.created_at.isoformat() if j.created_at else None,
+            "finished_at": j.finished_at.isoformat() if j.finished_at else None}
 
 def _log_dict(l):
     return {"id": l.id, "timestamp": l.timestamp.isoformat() if l.timestamp else None,
             "student_id": l.student_id, "drive_id": l.drive_id, "action": l.action,
             "policy_check": l.policy_check, "policy_details": l.policy_details,
             "ai_score": l.ai_score, "missing_skills": safe_list(l.missing_skills),
-            "final_decision": l.final_decision, "reasoning": l.reasoning, "actor": l.actor}
+            "final_decision": l.final_decision, "reasoning": l.reasoning, "actor": l.actor,
+            "stage_timings": l.stage_timings}
 
 if __name__ == "__main__":
     import uvicorn
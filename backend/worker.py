@@ -0,0 +1,44 @@
+"""
+PathFinder AI - Job Worker
+Claims and runs shards from the durable job queue (ai_engine/jobs.py) so
+long scoring work runs outside the API processes. Start as many as needed,
+on one host or on several sharing a PostgreSQL DATABASE_URL:
+  python worker.py [--threads 2]
+Set JOB_WORKER_THREADS=0 on the API servers to leave every job to these.
+"""
+import sys, os, signal, argparse, threading
+sys.path.insert(0, os.path.dirname(__file__))
+
+import main  # registers the job kinds
+from database.models import Base, engine
+from database.migrations import run_migrations
+from ai_engine.jobs import job_worker, JOB_WORKER_THREADS
+from ai_engine.audit_logger import audit_sink
+from ai_engine.inference_pool import inference_pool
+
+
+def run() -> None:
+    parser = argparse.ArgumentParser(description="PathFinder AI job worker")
+    parser.add_argument("--threads", type=int, default=max(1, JOB_WORKER_THREADS),
+                        help="shards run concurrently by this process")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    audit_sink.start()
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    job_worker.start(args.threads)
+    print(f"🛠️  Job worker {job_worker.prefix} running {args.threads} thread(s)")
+    while not stop.wait(1.0):
+        pass
+    print("🛑 Stopping job worker; unfinished shards are retried once their lease lapses")
+    job_worker.close()
+    audit_sink.close()
+    inference_pool.shutdown()
+
+
+if __name__ == "__main__":
+    run()
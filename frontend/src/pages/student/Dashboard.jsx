@@ -25,7 +25,7 @@ export default function StudentDashboard() {
     setStudent(s || null);
     Promise.all([
       getStudentApplications(selectedId),
-      getEligibility(selectedId),
+      getEligibility(selectedId, { details: false }),
     ]).then(([apps, elig]) => {
       setApplications(apps.data);
       setEligibility(elig.data.eligibility || []);
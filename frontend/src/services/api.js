@@ -10,7 +10,7 @@ export const getStudents = () => API.get('/students');
 export const getStudent = (id) => API.get(`/students/${id}`);
 export const createStudent = (data) => API.post('/students', data);
 export const uploadResume = (formData) => API.post('/upload-resume', formData);
-export const getEligibility = (studentId) => API.get(`/eligibility/${studentId}`);
+export const getEligibility = (studentId, params = {}) => API.get(`/eligibility/${studentId}`, { params });
 export const getStudentApplications = (studentId) => API.get(`/applications/${studentId}`);
 
 // Drives